@@ -4,6 +4,8 @@ import { ListAnswerSheetDto } from './dto/list-answer-sheet.dto';
 import { PaginatedAnswerSheetResponse } from './interfaces/paginated-response.interface';
 import { JwtAuthGuard } from '../auth/jwt-auth.guard';
 import { AnswerSheetDetailResponse } from './interfaces/answer-sheet-detail-response-interface';
+import { SummaryQueryDto } from './dto/summary-query.dto';
+import { AnswerSheetSummaryItem } from './interfaces/summary-response.interface';
 
 @Controller('answer-sheet')
 export class AnswerSheetController {
@@ -17,6 +19,14 @@ export class AnswerSheetController {
         return await this.answerSheetService.getPaginatedAnswerSheets(query);
     }
 
+    @UseGuards(JwtAuthGuard)
+    @Get('summary')
+    getSummary(
+        @Query() query: SummaryQueryDto,
+    ): AnswerSheetSummaryItem[] {
+        return this.answerSheetService.getSummary(query.scope);
+    }
+
     @UseGuards(JwtAuthGuard)
     @Get(':id')
     async getAnswerSheetById(
@@ -6,9 +6,14 @@ import { currentSchools, omrScans, students, previousSchools, studentAnswers } f
 import { PaginatedAnswerSheetResponse } from './interfaces/paginated-response.interface';
 import { AnswerSheetListItem } from './interfaces/answer-sheet-list-item.interface';
 import { AnswerSheetDetailResponse } from './interfaces/answer-sheet-detail-response-interface';
+import { AnswerSheetSummaryItem } from './interfaces/summary-response.interface';
+
+const SUBJECTS = ['math', 'english', 'science', 'filipino', 'ap'];
 
 @Injectable()
 export class AnswerSheetService {
+    private searchIndex = false;
+
     constructor(
         private readonly dbService: DatabaseService,
     ) { }
@@ -46,14 +51,21 @@ export class AnswerSheetService {
             .leftJoin(currentSchools, eq(currentSchools.scanId, omrScans.id))
             .leftJoin(previousSchools, eq(previousSchools.scanId, omrScans.id));
 
-        const keywordFilter = keyword
-            ? or(
-                like(students.firstName, `%${keyword}%`),
-                like(students.lastName, `%${keyword}%`),
-                // search by school_id (not school name)
-                like(currentSchools.schoolId, `%${keyword}%`),
-            )
-            : undefined;
+        // Keywords of 3+ characters go through omr-server's trigram index
+        // (db/search.py): same substring match, without scanning every row
+        const keywordFilter = !keyword
+            ? undefined
+            : keyword.length >= 3 && this.hasSearchIndex()
+                ? sql`${omrScans.id} IN (
+                    SELECT rowid FROM scan_search
+                    WHERE scan_search MATCH ${`"${keyword.replace(/"/g, '""')}"`}
+                )`
+                : or(
+                    like(students.firstName, `%${keyword}%`),
+                    like(students.lastName, `%${keyword}%`),
+                    // search by school_id (not school name)
+                    like(currentSchools.schoolId, `%${keyword}%`),
+                );
 
         const filteredQuery = keywordFilter ? baseQuery.where(keywordFilter) : baseQuery;
 
@@ -88,19 +100,26 @@ export class AnswerSheetService {
             createdAt: new Date(row.createdAt),
         }));
 
-        // Total count (same joins + same filter)
-        const totalBaseQuery = db
-            .select({ total: sql<number>`count(*)` })
-            .from(omrScans)
-            .leftJoin(students, eq(students.scanId, omrScans.id))
-            .leftJoin(currentSchools, eq(currentSchools.scanId, omrScans.id))
-            .leftJoin(previousSchools, eq(previousSchools.scanId, omrScans.id));
+        // Unfiltered total from the ingest-side summary; otherwise count
+        // (same joins + same filter)
+        let total: number | undefined = keywordFilter
+            ? undefined
+            : this.getSummaryRows('all')[0]?.scans;
 
-        const totalResult = keywordFilter
-            ? await totalBaseQuery.where(keywordFilter)
-            : await totalBaseQuery;
+        if (total === undefined) {
+            const totalBaseQuery = db
+                .select({ total: sql<number>`count(*)` })
+                .from(omrScans)
+                .leftJoin(students, eq(students.scanId, omrScans.id))
+                .leftJoin(currentSchools, eq(currentSchools.scanId, omrScans.id))
+                .leftJoin(previousSchools, eq(previousSchools.scanId, omrScans.id));
 
-        const total = Number(totalResult[0]?.total ?? 0);
+            const totalResult = keywordFilter
+                ? await totalBaseQuery.where(keywordFilter)
+                : await totalBaseQuery;
+
+            total = Number(totalResult[0]?.total ?? 0);
+        }
         
         return {
             page,
@@ -111,6 +130,79 @@ export class AnswerSheetService {
         };
     }
 
+    /**
+     * Whether omr-server created scan_search (on its first ingest).
+     */
+    private hasSearchIndex(): boolean {
+        if (!this.searchIndex) {
+            this.searchIndex = Boolean(this.dbService.get(
+                sql`SELECT 1 FROM sqlite_master WHERE name = 'scan_search'`,
+            ));
+        }
+        return this.searchIndex;
+    }
+
+    /**
+     * Rows of scan_summary, maintained by omr-server (db/summary.py) in
+     * the same transaction as the scans they count. Empty before
+     * omr-server created the table.
+     */
+    private getSummaryRows(scope: string): Record<string, any>[] {
+        try {
+            return this.dbService.all(
+                sql`SELECT * FROM scan_summary WHERE scope = ${scope} ORDER BY scope_key`,
+            ) as Record<string, any>[];
+        } catch {
+            return [];
+        }
+    }
+
+    getSummary(scope: string): AnswerSheetSummaryItem[] {
+        return this.getSummaryRows(scope).map((row) => {
+            const average = (sum: number) =>
+                row.scored_scans ? sum / row.scored_scans : null;
+
+            return {
+                key: row.scope_key,
+                scans: row.scans,
+                reviewScans: row.review_scans,
+                reviewRate: row.scans ? row.review_scans / row.scans : 0,
+                sectionReviewScans: {
+                    student: row.student_review_scans,
+                    previousSchool: row.previous_school_review_scans,
+                    currentSchool: row.current_school_review_scans,
+                    answers: row.answers_review_scans,
+                },
+                successScans: row.success_scans,
+                errorScans: row.error_scans,
+                scoredScans: row.scored_scans,
+                averageScore: average(row.total_score_sum),
+                averagePercent: row.max_score_sum
+                    ? (100 * row.total_score_sum) / row.max_score_sum
+                    : null,
+                subjectAverages: Object.fromEntries(
+                    SUBJECTS.map((subject) => [subject, average(row[`${subject}_score_sum`])]),
+                ),
+                updatedAt: row.updated_at,
+            };
+        });
+    }
+
+    /**
+     * Per-subject totals stored at ingest by omr-server (scoring.py),
+     * NULL while the scan's exam has no answer key. scan_score is
+     * created by omr-server on its first ingest.
+     */
+    private getScanScore(scanId: number): Record<string, number | null> | undefined {
+        try {
+            return this.dbService.get(
+                sql`SELECT * FROM scan_score WHERE scan_id = ${scanId}`,
+            ) as Record<string, number | null> | undefined;
+        } catch {
+            return undefined;
+        }
+    }
+
     async getAnswerSheetById(scanId: number): Promise<AnswerSheetDetailResponse | null> {
         const db = this.dbService.db;
 
@@ -150,24 +242,30 @@ export class AnswerSheetService {
             .from(studentAnswers)
             .where(eq(studentAnswers.scanId, scanId));
 
-        // Group answers by subject with score (count of isCorrect === true)
-        const groupedAnswers: Record<
-            string,
-            { score: number; answers: typeof studentAnswers.$inferSelect[] }
-        > = {};
+        const scanScore = this.getScanScore(scanId);
+
+        // Unscored scans (no answer key at ingest) have no score and no
+        // correctness; their stored is_correct = false means nothing
+        const scored = !scanScore || scanScore.total_score !== null;
+
+        // Group answers by subject; scans stored before scan_score existed
+        // fall back to counting isCorrect === true
+        const groupedAnswers: AnswerSheetDetailResponse['answers'] = {};
 
         for (const ans of answers) {
             if (!groupedAnswers[ans.subject]) {
                 groupedAnswers[ans.subject] = {
-                    score: 0,
+                    score: scored ? scanScore?.[`${ans.subject}_score`] ?? 0 : null,
                     answers: [],
                 };
             }
 
-            groupedAnswers[ans.subject].answers.push(ans);
+            groupedAnswers[ans.subject].answers.push(
+                scored ? ans : { ...ans, isCorrect: null },
+            );
 
-            if (ans.isCorrect === true) {
-                groupedAnswers[ans.subject].score += 1;
+            if (!scanScore && ans.isCorrect === true) {
+                groupedAnswers[ans.subject].score! += 1;
             }
         }
 
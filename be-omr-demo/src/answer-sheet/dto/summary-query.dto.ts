@@ -0,0 +1,7 @@
+import { IsIn, IsOptional } from 'class-validator';
+
+export class SummaryQueryDto {
+    @IsOptional()
+    @IsIn(['all', 'region', 'division', 'school', 'day'])
+    scope: 'all' | 'region' | 'division' | 'school' | 'day' = 'all';
+}
@@ -17,8 +17,11 @@ export interface AnswerSheetDetailResponse {
     answers: Record<
         string,
         {
-            score: number;
-            answers: (typeof studentAnswers.$inferSelect)[];
+            // null (and every isCorrect null) while the exam has no answer key
+            score: number | null;
+            answers: (Omit<typeof studentAnswers.$inferSelect, 'isCorrect'> & {
+                isCorrect: boolean | null;
+            })[];
         }
     >;
 }
\ No newline at end of file
@@ -0,0 +1,21 @@
+export interface AnswerSheetSummaryItem {
+    // "" for scope "all", "region/division" for divisions, YYYY-MM-DD for days
+    key: string;
+    scans: number;
+    reviewScans: number;
+    reviewRate: number;
+    sectionReviewScans: {
+        student: number;
+        previousSchool: number;
+        currentSchool: number;
+        answers: number;
+    };
+    successScans: number;
+    errorScans: number;
+    scoredScans: number;
+    // Averages over scored scans, null when none was scored
+    averageScore: number | null;
+    averagePercent: number | null;
+    subjectAverages: Record<string, number | null>;
+    updatedAt: string;
+}
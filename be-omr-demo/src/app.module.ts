@@ -7,6 +7,7 @@ import { ConfigModule } from '@nestjs/config';
 import { ServeStaticModule } from '@nestjs/serve-static';
 import { join } from 'path';
 import { AnswerSheetModule } from './answer-sheet/answer-sheet.module';
+import { ArchiveModule } from './archive/archive.module';
 
 @Module({
   imports: [
@@ -19,7 +20,8 @@ import { AnswerSheetModule } from './answer-sheet/answer-sheet.module';
     }),
     DatabaseModule,
     AuthModule,
-    AnswerSheetModule
+    AnswerSheetModule,
+    ArchiveModule
   ],
   controllers: [AppController],
   providers: [AppService],
@@ -0,0 +1,33 @@
+import { Controller, Get, NotFoundException, Param, StreamableFile } from '@nestjs/common';
+import { createReadStream } from 'fs';
+import { ArchiveService } from './archive.service';
+
+// Scans packed by omr-server/archive.py; their omr_scan.file_url points here
+@Controller('archive')
+export class ArchiveController {
+    constructor(private readonly archiveService: ArchiveService) { }
+
+    @Get(':status/:day/:shard/:name')
+    getMember(
+        @Param('status') status: string,
+        @Param('day') day: string,
+        @Param('shard') shard: string,
+        @Param('name') name: string,
+    ): StreamableFile {
+        const member = this.archiveService.findMember(status, day, shard, name);
+
+        if (!member) {
+            throw new NotFoundException(`No archived file ${status}/${day}/${shard}/${name}`);
+        }
+
+        const stream = createReadStream(member.packPath, {
+            start: member.offset,
+            end: member.offset + member.length - 1,
+        });
+
+        return new StreamableFile(stream, {
+            type: member.contentType,
+            length: member.length,
+        });
+    }
+}
@@ -0,0 +1,83 @@
+import { Injectable } from '@nestjs/common';
+import { readFileSync, statSync } from 'fs';
+import * as path from 'path';
+
+// Per-day packs written by omr-server/archive.py --pack:
+// bucket/archive/<status>/<day>.pack and its offset index
+// <day>.index.json ({ "<shard>/<name>": [offset, length] })
+const STATUSES = ['success', 'error'];
+const DAY = /^\d{4}-\d{2}-\d{2}$/;
+const SHARD = /^[0-9a-f]+$/;
+
+const CONTENT_TYPES: Record<string, string> = {
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.jpg': 'image/jpeg',
+    '.json': 'application/json',
+};
+
+export interface ArchiveMember {
+    packPath: string;
+    offset: number;
+    length: number;
+    contentType: string;
+}
+
+interface PackIndex {
+    mtimeMs: number;
+    members: Record<string, [number, number]>;
+}
+
+@Injectable()
+export class ArchiveService {
+    private readonly root = path.join(process.cwd(), '..', 'bucket', 'archive');
+
+    // Index per pack, reloaded when archive.py rewrites it
+    private readonly indexes = new Map<string, PackIndex>();
+
+    findMember(status: string, day: string, shard: string, name: string): ArchiveMember | null {
+        if (!STATUSES.includes(status) || !DAY.test(day) || !SHARD.test(shard)) {
+            return null;
+        }
+
+        const member = `${shard}/${name}`;
+
+        const packPath = path.join(this.root, status, `${day}.pack`);
+        const index = this.loadIndex(path.join(this.root, status, `${day}.index.json`));
+        const entry = index && Object.prototype.hasOwnProperty.call(index.members, member)
+            ? index.members[member]
+            : undefined;
+
+        if (!entry) {
+            return null;
+        }
+
+        return {
+            packPath,
+            offset: entry[0],
+            length: entry[1],
+            contentType: CONTENT_TYPES[path.extname(name).toLowerCase()] ?? 'application/octet-stream',
+        };
+    }
+
+    private loadIndex(indexPath: string): PackIndex | null {
+        let mtimeMs: number;
+        try {
+            mtimeMs = statSync(indexPath).mtimeMs;
+        } catch {
+            return null;
+        }
+
+        const cached = this.indexes.get(indexPath);
+        if (cached && cached.mtimeMs === mtimeMs) {
+            return cached;
+        }
+
+        const index = {
+            mtimeMs,
+            members: JSON.parse(readFileSync(indexPath, 'utf8')) as Record<string, [number, number]>,
+        };
+        this.indexes.set(indexPath, index);
+        return index;
+    }
+}
@@ -7,7 +7,7 @@ export function Answers({ answers }: {
     answers: Record<
         string,
         {
-            score: number;
+            score: number | null;
             answers: StudentAnswer[];
         }
     > | null
@@ -116,7 +116,8 @@ export function Answers({ answers }: {
                                                 const isCorrect = answer.isCorrect;
                                                 const needsReview = answer.reviewRequired;
 
-                                                const cellColor = !isCorrect
+                                                // null: not scored, the exam had no answer key
+                                                const cellColor = isCorrect === false
                                                     ? "bg-red-100 text-red-700"
                                                     : "";
 
@@ -154,6 +155,9 @@ export function Answers({ answers }: {
                                                 className="p-2 text-center border-r border-gray-200"
                                             >
                                                 {(() => {
+                                                    if (score === null) {
+                                                        return "Not scored";
+                                                    }
                                                     const percentage = total > 0
                                                         ? Math.round((score / total) * 100)
                                                         : 0;
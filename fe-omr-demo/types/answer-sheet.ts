@@ -17,7 +17,7 @@ export interface StudentAnswer {
     answer: string | null;
     confidence: number | null;
     reviewRequired: boolean;
-    isCorrect: boolean;
+    isCorrect: boolean | null;
     createdAt: string;
 }
 
@@ -73,7 +73,7 @@ export interface AnswerSheetDetailResponse {
     answers: Record<
         string,
         {
-            score: number;
+            score: number | null;
             answers: StudentAnswer[];
         }
     >;
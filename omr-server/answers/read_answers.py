@@ -1,5 +1,18 @@
 import cv2
 import numpy as np
+from config import Config
+from reader.binarize import equalized_adaptive_page
+from reader.illumination import INK_RATIO, Illumination
+from reader.calibration import calibrated
+from reader.confidence import review_cutoff
+from reader.engine import (
+    BLANK,
+    MULTI,
+    SINGLE_CHOICE,
+    Field,
+    SectionReader,
+    column
+)
 
 IMAGE_PATH = "../template/answer3.png"
 
@@ -8,7 +21,9 @@ ROI_WIDTH = 32
 ROI_HEIGHT = 24
 FILL_THRESHOLD = 0.20
 DOMINANCE_GAP = 0.07  # minimum difference between top and second score
-REVIEW_THRESHOLD = 0.60
+# Normalized scores count the pencil only, not the printed ring the
+# adaptive threshold also picks up, so a clean fill scores lower
+REVIEW_THRESHOLD = 0.35 if Config.PAGE_THRESHOLD_MODE == "normalized" else 0.60
 
 # ---- Calibration clicks (6 per subject) ----
 # Order per subject:
@@ -69,89 +84,197 @@ def build_subject_grid(subject_clicks):
     return grid
 
 
-def detect_answers(
-    img
-):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    gray = cv2.equalizeHist(gray)
-
-    thresh = cv2.adaptiveThreshold(
-        gray,
-        255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV,
-        31,
-        5
-    )
+CHOICES = ["A", "B", "C", "D"]
+QUESTIONS_PER_SUBJECT = 40
 
-    results = {}
 
+def build_answer_centers():
+    """
+    Bubble centers for the whole answer block as one array.
+
+    Shape: (subjects, questions, choices, 2) holding (x, y).
+    Question q of a subject lives at index q - 1, choice A at 0.
+    """
     calibrated_subject_count = len(clicks) // 6
 
+    centers = np.zeros(
+        (calibrated_subject_count, QUESTIONS_PER_SUBJECT, len(CHOICES), 2),
+        dtype=np.int32
+    )
+
     for i in range(calibrated_subject_count):
-        subject = SUBJECTS[i]
-        subject_clicks = clicks[i*6:(i+1)*6]
-        grid = build_subject_grid(subject_clicks)
-
-        subject_result = {
-            "answers": {},
-        }
-
-        for q in sorted(grid.keys()):
-            scores = {}
-            marked_choices = []
-
-            for choice, (x, y) in grid[q].items():
-                x1 = int(x - ROI_WIDTH // 2)
-                x2 = int(x + ROI_WIDTH // 2)
-                y1 = int(y - ROI_HEIGHT // 2)
-                y2 = int(y + ROI_HEIGHT // 2)
-
-                roi = thresh[y1:y2, x1:x2]
-                if roi.size == 0:
-                    scores[choice] = 0.0
-                    continue
-
-                dark_pixels = cv2.countNonZero(roi)
-                fill_ratio = dark_pixels / float(roi.size)
-
-                scores[choice] = round(float(fill_ratio), 2)
-
-                if fill_ratio > FILL_THRESHOLD:
-                    marked_choices.append((choice, fill_ratio))
-
-            # Sort by raw (non-rounded) confidence for decision logic
-            marked_choices.sort(key=lambda x: x[1], reverse=True)
-
-            if len(marked_choices) == 0:
-                answer = None
-                confidence = 0.0
-                review_required = True
-            else:
-                top_choice, top_conf = marked_choices[0]
-
-                if len(marked_choices) > 1:
-                    second_conf = marked_choices[1][1]
-                    dominance = top_conf - second_conf
-                    if dominance < DOMINANCE_GAP:
-                        review_required = True
-                    else:
-                        review_required = top_conf < REVIEW_THRESHOLD
-                else:
-                    review_required = top_conf < REVIEW_THRESHOLD
-
-                answer = top_choice
-                confidence = round(float(top_conf), 2)
-
-            subject_result["answers"][str(q)] = {
-                "answer": answer,
-                "confidence": round(float(confidence), 2),
-                "review_required": review_required,
+        grid = build_subject_grid(clicks[i*6:(i+1)*6])
+
+        for q, row in grid.items():
+            for j, choice in enumerate(CHOICES):
+                centers[i, q - 1, j] = row[choice]
+
+    return centers
+
+
+# Grid geometry never changes at runtime, so build it once per process
+ANSWER_CENTERS = build_answer_centers()
+
+
+def build_answer_section(mode=Config.PAGE_THRESHOLD_MODE):
+    """
+    Every question is a single-choice column of A-D bubbles.
+    """
+    fields = []
+
+    for i, subject_centers in enumerate(ANSWER_CENTERS.tolist()):
+        for q, choice_centers in enumerate(subject_centers):
+            fields.append(Field(
+                f"{SUBJECTS[i]}.{q + 1}",
+                SINGLE_CHOICE,
+                [column(choice_centers, CHOICES)],
+                threshold=FILL_THRESHOLD,
+                dominance_gap=DOMINANCE_GAP,
+                roi_size=(ROI_WIDTH, ROI_HEIGHT),
+                group="answer"
+            ))
+
+    if mode == "normalized":
+        return SectionReader(fields, ink_ratio=INK_RATIO)
+
+    return SectionReader(fields, binarize=equalized_adaptive_page)
+
+
+ANSWER_SECTION = calibrated(build_answer_section(), "answers")
+
+
+def decide_answers(scores, paper=None):
+    """
+    Answer decision over the whole block as arrays.
+
+    scores: (..., bubbles) from ANSWER_SECTION, e.g. one sheet or a
+    batch of sheets. A question keeps its top choice even when the
+    dominance gap is too small; that only forces review.
+    paper: matching (..., bubbles) paper levels (SectionReader.paper);
+    with a confidence table attached, review follows P(correct) instead.
+
+    Returns (..., subjects, questions[, choices]) arrays:
+        fill: raw fill ratio per choice
+        answer_idx: index of the chosen choice, -1 when nothing is marked
+        confidence: raw fill ratio of the chosen choice (0.0 when blank)
+        review_required: boolean mask
+        p_correct: calibrated P(correct), None without a table
+    """
+    lead = scores.shape[:-1]
+    block = ANSWER_CENTERS.shape[:2]
+
+    decision = ANSWER_SECTION.decide(scores)
+    top_idx, top, status = (
+        decision[key].reshape(*lead, *block)
+        for key in ("top_idx", "top", "status")
+    )
+
+    has_answer = status != BLANK
+
+    p_correct = None
+    if ANSWER_SECTION.confidence is not None and paper is not None:
+        p_correct = ANSWER_SECTION.p_correct(scores, decision, paper).reshape(*lead, *block)
+        review_required = p_correct < review_cutoff()
+    else:
+        review_required = ~has_answer | (status == MULTI) | (top < REVIEW_THRESHOLD)
+
+    answer_idx = np.where(has_answer, top_idx, -1)
+    confidence = np.where(has_answer, top, 0.0)
+
+    fill = ANSWER_SECTION.column_scores(scores).reshape(*lead, *block, len(CHOICES))
+
+    return fill, answer_idx, confidence, review_required, p_correct
+
+
+def answers_to_json(fill, answer_idx, confidence, review_required, p_correct=None):
+    """
+    Convert one sheet's answer arrays into the persisted JSON shape.
+    """
+    results = {}
+
+    fill = fill.tolist()
+    answer_idx = answer_idx.tolist()
+    confidence = confidence.tolist()
+    review_required = review_required.tolist()
+    if p_correct is not None:
+        p_correct = p_correct.round(3).tolist()
+
+    for i, subject_fill in enumerate(fill):
+        answers = {}
+
+        for q, choice_fill in enumerate(subject_fill):
+            idx = answer_idx[i][q]
+
+            answers[str(q + 1)] = {
+                "answer": CHOICES[idx] if idx >= 0 else None,
+                "confidence": round(confidence[i][q], 2),
+                "review_required": review_required[i][q],
                 "details": {
-                    "scores": scores
+                    "scores": {
+                        choice: round(score, 2)
+                        for choice, score in zip(CHOICES, choice_fill)
+                    }
                 }
             }
 
-        results[subject] = subject_result
-    
+            if p_correct is not None:
+                answers[str(q + 1)]["p_correct"] = p_correct[i][q]
+
+        results[SUBJECTS[i]] = {"answers": answers}
+
     return results
+
+
+def detect_answers(
+    img
+):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    return detect_answers_gray(gray)
+
+
+def detect_answers_gray(gray, illumination=None):
+    """
+    detect_answers over an already converted grayscale page.
+    """
+    illumination = illumination or Illumination(gray)
+    scores = ANSWER_SECTION.score(gray, illumination)
+
+    paper = None
+    if ANSWER_SECTION.confidence is not None:
+        paper = ANSWER_SECTION.paper(illumination)
+
+    return answers_to_json(*decide_answers(scores, paper))
+
+
+def detect_answers_batch(
+    imgs
+):
+    """
+    detect_answers for a stack of same-size sheets.
+
+    Thresholding is still per sheet, but ROI scoring and the decision
+    logic run once over the whole (sheets, subjects, questions, choices)
+    array, amortizing Python overhead during bulk backfills.
+    """
+    grays = [cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) for img in imgs]
+
+    paper = None
+    if ANSWER_SECTION.confidence is not None:
+        paper = np.stack([ANSWER_SECTION.paper(Illumination(gray)) for gray in grays])
+
+    fill, answer_idx, confidence, review_required, p_correct = decide_answers(
+        ANSWER_SECTION.score_batch(grays),
+        paper
+    )
+
+    return [
+        answers_to_json(
+            fill[n],
+            answer_idx[n],
+            confidence[n],
+            review_required[n],
+            None if p_correct is None else p_correct[n]
+        )
+        for n in range(len(grays))
+    ]
@@ -0,0 +1,299 @@
+"""
+Archive compaction of processed scans.
+
+Every section reader starts from the grayscale page
+(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)), so that is all a scan needs to
+keep once it is processed: day folders (bucket/success/<day>/, see
+bucket_layout.py) older than ARCHIVE_AFTER_DAYS are recompressed to
+lossless grayscale at full resolution, about a third of the color PNG.
+Each file is decoded back and compared before it replaces the original,
+so re-reading an archived scan gives the same results.
+
+- png   (default) grayscale PNG under the same name; the database is
+        unchanged
+- webp  lossless WebP, ~13% smaller again but ~3x slower to encode;
+        renamed <stem>.webp (with its <name>.reason.json, if rejected)
+        and omr_scan updated
+
+With --pack every compacted day folder then becomes one file,
+bucket/archive/<status>/<day>.pack, plus its offset index
+<day>.index.json ({"<shard>/<name>": [offset, length]}, the path
+under the day folder). omr_scan and scan_asset point at
+bucket/archive/<status>/<day>/<shard>/<name>, served by be-omr-demo at
+/archive/<status>/<day>/<shard>/<name>. A day backed up or
+copied is then two files instead of thousands. Scans landing in a day
+already packed are appended on the next run.
+
+Usage (from omr-server/):
+    python archive.py [--days N] [--format png|webp] [--pack] [--workers N] [--dry-run]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from bucket_layout import STATUSES, bucket_relative, fsync_path
+from config import Config
+
+# Format -> (suffix, cv2.imencode params)
+ARCHIVE_FORMATS = {
+    "png": (".png", [cv2.IMWRITE_PNG_COMPRESSION, 9]),
+    "webp": (".webp", [cv2.IMWRITE_WEBP_QUALITY, 101]),  # above 100: lossless
+}
+
+PNG_GRAY = 0  # IHDR color type of a grayscale PNG
+
+
+def is_compacted(path: Path) -> bool:
+    """
+    Already archived: a WebP, or a grayscale PNG (checked in its header).
+    """
+    if path.suffix.lower() == ".webp":
+        return True
+
+    with open(path, "rb") as f:
+        header = f.read(26)
+
+    return len(header) == 26 and header[25] == PNG_GRAY
+
+
+def sync(path: Path):
+    if Config.FSYNC_POLICY != "none":
+        fsync_path(path)
+
+
+def compact_scan(path: Path, image_format: str):
+    """
+    Recompress one scan next to itself, keeping its mtime (its shard day).
+
+    Returns (path, new path, bytes before, bytes after, error). The
+    original is replaced when the name is unchanged and otherwise left
+    for the caller to remove once the database points at the new file.
+    """
+    try:
+        suffix, params = ARCHIVE_FORMATS[image_format]
+        stat = path.stat()
+
+        img = cv2.imread(str(path))
+        if img is None:
+            raise ValueError("failed to load image")
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        ok, data = cv2.imencode(suffix, gray, params)
+        if not ok or not np.array_equal(cv2.imdecode(data, cv2.IMREAD_GRAYSCALE), gray):
+            raise ValueError(f"{image_format} round trip is not lossless")
+
+        target = path.with_suffix(suffix)
+        tmp = path.with_name(f".{target.name}.tmp")
+        tmp.write_bytes(data.tobytes())
+        os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        sync(tmp)
+        os.replace(tmp, target)
+
+        return path, target, stat.st_size, len(data), None
+    except Exception as e:
+        return path, None, 0, 0, str(e)
+
+
+def old_days(bucket_path: Path, days: int):
+    """
+    (status, day folder) of the sharded days more than `days` days old.
+    """
+    cutoff = (date.today() - timedelta(days=days)).isoformat()
+
+    return [
+        (status, folder)
+        for status in STATUSES
+        if (bucket_path / status).is_dir()
+        for folder in sorted((bucket_path / status).iterdir())
+        if folder.is_dir() and len(folder.name) == 10 and folder.name < cutoff
+    ]
+
+
+def move_rows(rows, moves):
+    """
+    (table, id, file_path, file_url) updates for (old path, new path,
+    new url) moves; rows ({file_path: [(table, id)]}) follows them.
+    """
+    updates = []
+
+    for old, new, url in moves:
+        for table, row_id in rows.pop(old, []):
+            updates.append((table, row_id, new, url))
+            rows.setdefault(new, []).append((table, row_id))
+
+    return updates
+
+
+def compact_day(bucket_path: Path, folder: Path, image_format, executor, storage, rows):
+    """
+    Recompress the scans of one day folder. Returns (scans, bytes
+    before, bytes after).
+    """
+    scans = [
+        path for path in sorted(folder.glob("*/*"))
+        if path.suffix.lower() == ".png" and not is_compacted(path)
+    ]
+
+    results = list(executor.map(compact_scan, scans, [image_format] * len(scans)))
+
+    renamed = []
+    before = after = 0
+    for path, target, size, compacted, error in results:
+        if error:
+            print(f"[WARN] {path.name}: kept as is: {error}")
+            continue
+
+        before += size
+        after += compacted
+        if target != path:
+            renamed.append((path, target))
+
+    # Database first, then drop the originals: a run stopped in between
+    # leaves both files and the next one redoes the scan
+    storage.update_file_paths(move_rows(rows, [
+        (
+            bucket_relative(bucket_path, path),
+            bucket_relative(bucket_path, target),
+            f"{Config.STATIC_URL}/{bucket_relative(bucket_path, target)}",
+        )
+        for path, target in renamed
+    ]))
+    for path, target in renamed:
+        # Rejection reasons are named after their scan (watcher.py)
+        reason = path.with_name(f"{path.name}.reason.json")
+        if reason.exists():
+            os.replace(reason, target.with_name(f"{target.name}.reason.json"))
+        path.unlink()
+
+    return len(scans), before, after
+
+
+def pack_day(bucket_path: Path, status, folder: Path, storage, rows):
+    """
+    Append every file of a day folder to its pack, point the database at
+    the packed members and remove the folder. Returns the number of files.
+    """
+    archive_dir = bucket_path / "archive" / status
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    day = folder.name
+    pack_path = archive_dir / f"{day}.pack"
+    index_path = archive_dir / f"{day}.index.json"
+    index = json.loads(index_path.read_text()) if index_path.exists() else {}
+
+    files = sorted(
+        path for path in folder.glob("*/*")
+        if path.is_file() and not path.name.startswith(".")
+    )
+
+    # Appended, then the index swapped in: a run stopped part-way leaves
+    # unindexed bytes at the end of the pack, never a wrong offset
+    # Keyed by the path under the day folder: names are only unique
+    # within their shard
+    members = [path.relative_to(folder).as_posix() for path in files]
+
+    with open(pack_path, "ab") as pack:
+        offset = pack.seek(0, os.SEEK_END)
+        for path, member in zip(files, members):
+            data = path.read_bytes()
+            pack.write(data)
+            index[member] = [offset, len(data)]
+            offset += len(data)
+        pack.flush()
+        if Config.FSYNC_POLICY != "none":
+            os.fsync(pack.fileno())
+
+    tmp = index_path.with_name(f".{index_path.name}.tmp")
+    tmp.write_text(json.dumps(index))
+    sync(tmp)
+    os.replace(tmp, index_path)
+    sync(archive_dir)
+
+    storage.update_file_paths(move_rows(rows, [
+        (
+            bucket_relative(bucket_path, path),
+            f"bucket/archive/{status}/{day}/{member}",
+            f"{Config.STATIC_URL}/archive/{status}/{day}/{member}",
+        )
+        for path, member in zip(files, members)
+    ]))
+    shutil.rmtree(folder)
+
+    return len(files)
+
+
+def compact(bucket_path: Path, storage, days, image_format="png", pack=False, workers=1, dry_run=False):
+    """
+    Compact (and with pack, pack) every day folder older than days,
+    encoding on `workers` processes.
+    """
+    rows = {}
+    for table, row_id, file_path in storage.file_paths():
+        rows.setdefault(file_path, []).append((table, row_id))
+
+    folders = old_days(bucket_path, days)
+    print(f"[ARCHIVE] {len(folders)} day folders older than {days} days")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for status, folder in folders:
+            name = f"{status}/{folder.name}"
+
+            if dry_run:
+                todo = [
+                    path for path in folder.glob("*/*")
+                    if path.suffix.lower() == ".png" and not is_compacted(path)
+                ]
+                size = sum(path.stat().st_size for path in todo) / 2**20
+                print(f"[ARCHIVE] {name}: {len(todo)} scans to compact ({size:.0f} MB)")
+                continue
+
+            started = time.perf_counter()
+            scans, before, after = compact_day(bucket_path, folder, image_format, executor, storage, rows)
+            print(
+                f"[ARCHIVE] {name}: {scans} scans compacted, "
+                f"{before / 2**20:.0f} MB -> {after / 2**20:.0f} MB "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+            if pack:
+                files = pack_day(bucket_path, status, folder, storage, rows)
+                print(f"[ARCHIVE] {name}: {files} files packed into archive/{status}/{folder.name}.pack")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompress (and pack) old processed scans.")
+    parser.add_argument("--bucket", type=Path, default=Config.BASE_DIR / "bucket", help="bucket folder")
+    parser.add_argument("--days", type=int, default=Config.ARCHIVE_AFTER_DAYS, help="compact day folders older than this")
+    parser.add_argument("--format", choices=list(ARCHIVE_FORMATS), default=Config.ARCHIVE_FORMAT)
+    parser.add_argument("--pack", action="store_true", help="pack each compacted day into one file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="encoding processes")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be compacted")
+    args = parser.parse_args()
+
+    from db.storage import open_storage
+
+    storage = open_storage()
+    try:
+        compact(
+            args.bucket.resolve(),
+            storage,
+            args.days,
+            image_format=args.format,
+            pack=args.pack,
+            workers=args.workers,
+            dry_run=args.dry_run,
+        )
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Review-UI derivatives of a decoded sheet.
+
+The frontend pages through scans far faster when it loads a small page
+thumbnail and the crops a reviewer actually looks at (name block,
+answer block) instead of the multi-megabyte original. They are encoded
+from the image the pipeline already decoded, written next to the stored
+PNG and recorded in scan_asset with their URLs.
+
+Fields flagged review_required also get their own crop, boxed from the
+compiled grid, so the review UI fetches just the region that needs
+attention. Those crops are a few KB each and are stored as BLOBs in
+review_crop, keyed by scan id.
+"""
+from pathlib import Path
+
+import cv2
+from config import Config
+
+REVIEW_SCALE = 2   # crops are cut from the page shrunk by this factor
+PAGE_WIDTH = 600   # max width of the page thumbnail
+CROP_MARGIN = 40   # page px of printed labels kept around the bubbles
+FIELD_MARGIN = 24  # page px kept around a flagged field's bubbles
+
+ENCODE_PARAMS = {
+    "webp": [cv2.IMWRITE_WEBP_QUALITY, Config.ASSET_QUALITY],
+    "jpg": [cv2.IMWRITE_JPEG_QUALITY, Config.ASSET_QUALITY],
+}
+
+
+def crop_boxes():
+    """
+    Crop kind -> (left, top, right, bottom) on the page.
+    """
+    from student.read_student_info import STUDENT_SECTION
+    from answers.read_answers import ANSWER_SECTION
+
+    return {
+        "names": STUDENT_SECTION.bounds(
+            ["last_name", "first_name", "middle_initial"],
+            margin=CROP_MARGIN
+        ),
+        "answers": ANSWER_SECTION.bounds(margin=CROP_MARGIN),
+    }
+
+
+CROP_BOXES = crop_boxes()
+
+
+def section_readers():
+    """
+    Section key (as in read_sections()) -> its SectionReader.
+    """
+    from student.read_student_info import STUDENT_SECTION
+    from school.previous.prev_read_info import PREVIOUS_SCHOOL_SECTION
+    from school.current.curr_read_info import CURRENT_SCHOOL_SECTION
+    from answers.read_answers import ANSWER_SECTION
+
+    return {
+        "student": STUDENT_SECTION,
+        "previous_school": PREVIOUS_SCHOOL_SECTION,
+        "current_school": CURRENT_SCHOOL_SECTION,
+        "answers": ANSWER_SECTION,
+    }
+
+
+def field_path(section, name):
+    """
+    Path of a reader field in the section JSON: "student.lrn",
+    "previous_school.final_grade.Math", "answers.math.12" (answer fields
+    are named "<subject>.<question>").
+    """
+    from school.previous.prev_read_info import SUBJECT_NAMES
+
+    if section == "previous_school" and name in SUBJECT_NAMES:
+        return f"{section}.final_grade.{name}"
+    return f"{section}.{name}"
+
+
+def field_boxes():
+    """
+    Field path (as in review_crop.field) -> (left, top, right, bottom).
+    """
+    return {
+        field_path(section, name): box
+        for section, reader in section_readers().items()
+        for name, box in reader.field_boxes(FIELD_MARGIN).items()
+    }
+
+
+FIELD_BOXES = field_boxes()
+
+
+def shrink(img, width):
+    """
+    Downscale to at most width px wide. Integer factors first: OpenCV's
+    INTER_AREA has a fast path for them.
+    """
+    h, w = img.shape[:2]
+
+    factor = w // width
+    if factor > 1:
+        img = cv2.resize(img, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+        h, w = img.shape[:2]
+
+    if w > width:
+        img = cv2.resize(img, (width, round(h * width / w)), interpolation=cv2.INTER_AREA)
+
+    return img
+
+
+def encode(img):
+    """
+    Compress one derivative, returning an asset dict without its path.
+    """
+    ok, data = cv2.imencode(f".{Config.ASSET_FORMAT}", img, ENCODE_PARAMS[Config.ASSET_FORMAT])
+    if not ok:
+        raise ValueError(f"Failed to encode {Config.ASSET_FORMAT} asset.")
+
+    return {
+        "width": img.shape[1],
+        "height": img.shape[0],
+        "bytes": len(data),
+        "data": data.tobytes(),
+    }
+
+
+def review_image(img):
+    """
+    The page at 1 / REVIEW_SCALE, shared by every derivative.
+    """
+    return cv2.resize(
+        img,
+        None,
+        fx=1 / REVIEW_SCALE,
+        fy=1 / REVIEW_SCALE,
+        interpolation=cv2.INTER_AREA
+    )
+
+
+def render_assets(review):
+    """
+    Page thumbnail and section crops of one sheet, encoded in memory:
+    {kind: asset}. review comes from review_image().
+    """
+    assets = {"page": encode(shrink(review, PAGE_WIDTH))}
+
+    for kind, box in CROP_BOXES.items():
+        left, top, right, bottom = (v // REVIEW_SCALE for v in box)
+        assets[kind] = encode(review[top:bottom, left:right])
+
+    return assets
+
+
+def flagged_fields(sections):
+    """
+    Paths of every field with review_required set, in section order.
+    """
+    flagged = []
+
+    for section, fields in sections.items():
+        if section == "answers":
+            for subject, block in fields.items():
+                for q, answer in block.get("answers", {}).items():
+                    if answer.get("review_required"):
+                        flagged.append(f"answers.{subject}.{q}")
+            continue
+
+        for name, field in fields.items():
+            if name == "final_grade":
+                for subject, grade in field.items():
+                    if grade.get("review_required"):
+                        flagged.append(f"{section}.final_grade.{subject}")
+            elif isinstance(field, dict) and field.get("review_required"):
+                flagged.append(f"{section}.{name}")
+
+    return flagged
+
+
+def render_review_crops(review, sections):
+    """
+    One encoded crop per flagged field. Boxes stay in page coordinates;
+    the pixels come from the review image.
+    """
+    crops = []
+
+    for path in flagged_fields(sections):
+        box = FIELD_BOXES.get(path)
+        if box is None:
+            continue
+
+        left, top, right, bottom = box
+        crop = encode(review[
+            top // REVIEW_SCALE:bottom // REVIEW_SCALE,
+            left // REVIEW_SCALE:right // REVIEW_SCALE
+        ])
+
+        crops.append({
+            "field": path,
+            "x": left,
+            "y": top,
+            "width": right - left,
+            "height": bottom - top,
+            "bytes": crop["bytes"],
+            "data": crop["data"],
+        })
+
+    return crops
+
+
+def write_assets(file_path: Path, assets, relative_dir: str):
+    """
+    Write assets next to file_path as <stem>.<kind>.<ext>.
+
+    Returns the asset dicts with bucket-relative paths (relative_dir is
+    the bucket-relative folder of file_path, e.g.
+    "bucket/success/2026-10-19/3f").
+    """
+    written = []
+
+    for kind, asset in assets.items():
+        name = f"{file_path.stem}.{kind}.{Config.ASSET_FORMAT}"
+        (file_path.parent / name).write_bytes(asset["data"])
+
+        written.append({
+            "kind": kind,
+            "path": f"{relative_dir}/{name}",
+            "width": asset["width"],
+            "height": asset["height"],
+            "bytes": asset["bytes"],
+        })
+
+    return written
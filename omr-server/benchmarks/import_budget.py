@@ -0,0 +1,94 @@
+"""
+Import-time budget for the production entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter
+per module (best of several runs) and fails when a module exceeds its
+budget or pulls in something it must not (overlay/debug tooling, or the
+readers for modules that should stay light).
+
+Usage (from omr-server/):
+    python -m benchmarks.import_budget [--runs N]
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+# module -> (budget in ms, modules that must not be imported).
+# Budgets are ~1.5-2x what a warm-cache run measured; the readers are
+# dominated by OpenCV + NumPy (~95 ms), config by pathlib.
+BUDGETS = {
+    "config": (35, ["dotenv"]),
+    "db.persist_scan": (60, ["cv2", "numpy", "random"]),
+    "processor": (40, ["cv2", "numpy"]),
+    "manual_trigger": (40, ["cv2", "numpy"]),
+    "workers": (60, ["cv2", "numpy"]),
+    "student.read_student_info": (220, ["student.student_overlay_test"]),
+    "school.current.curr_read_info": (220, ["school.current.curr_overlay_test"]),
+    "school.previous.prev_read_info": (220, ["school.previous.prev_overlay_test"]),
+    "answers.read_answers": (220, ["answers.overlay_test"]),
+    "classifier": (240, ["answers.overlay_test"]),
+}
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module):
+    """
+    Cumulative import time of module (ms) and every module it imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total = None
+    imported = set()
+
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+
+        _, cumulative, _, name = match.groups()
+        imported.add(name)
+
+        if name == module:
+            total = int(cumulative) / 1000.0
+
+    return total, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = 0
+
+    for module, (budget, forbidden) in BUDGETS.items():
+        best = None
+        imported = set()
+
+        for _ in range(args.runs):
+            total, imported = measure(module)
+            best = total if best is None else min(best, total)
+
+        leaked = [name for name in forbidden if name in imported]
+        ok = best <= budget and not leaked
+        failures += not ok
+
+        status = "OK  " if ok else "FAIL"
+        print(f"[{status}] {module:<32} {best:7.1f} ms  (budget {budget} ms)")
+
+        for name in leaked:
+            print(f"         imports {name}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
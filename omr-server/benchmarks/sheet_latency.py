@@ -0,0 +1,65 @@
+"""
+Single-sheet latency of the four section readers, serial vs threaded.
+
+Reads every sheet both ways through processor.read_sections, checks the
+results are identical and reports median / worst ms per sheet.
+
+Usage (from omr-server/):
+    python -m benchmarks.sheet_latency <sheets_dir> [--repeat N]
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import cv2
+
+from processor import load_readers, read_sections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sheets_dir", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    images = []
+    for path in sorted(args.sheets_dir.glob("*.png")):
+        img = cv2.imread(str(path))
+        if img is None:
+            print(f"[SKIP] {path.name}: unreadable")
+            continue
+        images.append((path.name, img))
+
+    if not images:
+        print("[INFO] No PNG files found.")
+        return
+
+    load_readers()
+
+    # Warm up both paths (thread pool creation, first-call allocations)
+    read_sections(images[0][1], parallel=False)
+    read_sections(images[0][1], parallel=True)
+
+    timings = {False: [], True: []}
+
+    for name, img in images:
+        results = {}
+
+        for _ in range(args.repeat):
+            for parallel in (False, True):
+                start = time.perf_counter()
+                results[parallel] = read_sections(img, parallel=parallel)
+                timings[parallel].append(time.perf_counter() - start)
+
+        if results[False] != results[True]:
+            print(f"[MISMATCH] {name}: threaded result differs from serial")
+
+    print(f"{len(images)} sheets x {args.repeat} runs")
+    for parallel, label in ((False, "serial"), (True, "threaded")):
+        ms = [t * 1000 for t in timings[parallel]]
+        print(f"  {label:<9} median {statistics.median(ms):6.1f} ms   worst {max(ms):6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Write throughput of the storage backends (db/storage.py).
+
+Persists synthetic sheets (random answers, names and schools) one at a
+time, as the watcher does, and in batches, then checks every table got
+its rows. SQLite writes to a temporary omr.db unless --db is given;
+PostgreSQL writes to POSTGRES_DSN, so point it at a scratch database
+(see db/postgres_storage.py for a throwaway server).
+
+Usage (from omr-server/):
+    python -m benchmarks.storage_backends [--backend sqlite|postgres] [--sheets N] [--batch N]
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from config import Config
+from db.storage import open_storage
+
+SUBJECTS = ["math", "english", "science", "filipino", "ap"]
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Rows each sheet adds per table
+ROWS_PER_SHEET = {
+    "omr_scan": 1,
+    "student": 1,
+    "previous_school": 1,
+    "current_school": 1,
+    "student_answer": 200,
+    "scan_score": 1,
+    "scan_field": 219,  # 19 section fields + 200 answers, no columns
+}
+
+
+def field(answer, rng):
+    return {"answer": answer, "review_required": rng.random() < 0.05}
+
+
+def synthetic_sheet(rng):
+    """
+    Section results shaped like the readers' output.
+    """
+    word = lambda n: "".join(rng.choice(LETTERS) for _ in range(n))
+
+    return {
+        "student": {
+            "last_name": field(word(8), rng),
+            "first_name": field(word(6), rng),
+            "middle_initial": field(word(1), rng),
+            "birth_month": field(str(rng.randint(1, 12)), rng),
+            "birth_day": field(str(rng.randint(1, 28)), rng),
+            "birth_year": field(str(rng.randint(2008, 2014)), rng),
+            "gender": field(rng.choice("MF"), rng),
+            "lrn": field(str(rng.randrange(10 ** 11, 10 ** 12)), rng),
+            "special_classes": field([], rng),
+        },
+        "previous_school": {
+            "school_id": field(str(rng.randrange(100000, 110000)), rng),
+            "class_size": field(str(rng.randint(20, 50)), rng),
+            "final_grade": {
+                subject: field(str(rng.randint(75, 99)), rng)
+                for subject in ["Math", "English", "Science", "Filipino", "AP"]
+            },
+        },
+        "current_school": {
+            "region": field(rng.choice(["NCR", "CAR", "REGION I", "REGION VII"]), rng),
+            "division": field(word(4), rng),
+            "school_id": field(str(rng.randrange(100000, 110000)), rng),
+        },
+        "answers": {
+            subject: {
+                "answers": {
+                    str(q): {
+                        "answer": rng.choice("ABCD") if rng.random() < 0.95 else None,
+                        "confidence": round(rng.random(), 3),
+                        "review_required": rng.random() < 0.01,
+                    }
+                    for q in range(1, 41)
+                }
+            }
+            for subject in SUBJECTS
+        },
+    }
+
+
+def migrate(db_path):
+    """
+    Create the core tables of a new omr.db from be-omr-demo's drizzle
+    migrations (omr-server only creates its own tables).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        for migration in sorted((Config.BASE_DIR / "be-omr-demo/drizzle/migrations").glob("*.sql")):
+            for statement in migration.read_text().split("--> statement-breakpoint"):
+                conn.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def count_rows(backend, scan_ids):
+    """
+    Rows per table written for scan_ids, read back outside the backend.
+    """
+    lo, hi = min(scan_ids), max(scan_ids)
+
+    if backend == "sqlite":
+        conn = sqlite3.connect(Config.DB_PATH)
+        placeholder = "?"
+    else:
+        import psycopg
+        conn = psycopg.connect(Config.POSTGRES_DSN)
+        placeholder = "%s"
+
+    try:
+        return {
+            table: conn.execute(
+                f"SELECT count(*) FROM {table} WHERE {'id' if table == 'omr_scan' else 'scan_id'} "
+                f"BETWEEN {placeholder} AND {placeholder}",
+                (lo, hi),
+            ).fetchone()[0]
+            for table in ROWS_PER_SHEET
+        }
+    finally:
+        conn.close()
+
+
+def run(storage, sheets, batch):
+    """
+    Persist sheets in batches; returns (scan ids, seconds).
+    """
+    scan_ids = []
+    started = time.perf_counter()
+
+    for i in range(0, len(sheets), batch):
+        chunk = [(Path(f"bench_{i + n}.png"), sheet) for n, sheet in enumerate(sheets[i:i + batch])]
+        if batch == 1:
+            scan_ids.append(storage.persist_scan(*chunk[0], Config.EXAM_ID))
+        else:
+            scan_ids.extend(storage.persist_scans(chunk, Config.EXAM_ID))
+
+    return scan_ids, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=["sqlite", "postgres"], default=Config.STORAGE_BACKEND)
+    parser.add_argument("--sheets", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=50, help="sheets per persist_scans() call")
+    parser.add_argument("--db", type=Path, help="SQLite file (default: a temporary one)")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        Config.DB_PATH = args.db or Path(tempfile.mkdtemp()) / "omr.db"
+        if not Config.DB_PATH.exists():
+            migrate(Config.DB_PATH)
+        print(f"[BENCH] sqlite: {Config.DB_PATH}")
+    else:
+        print("[BENCH] postgres: POSTGRES_DSN")
+
+    storage = open_storage(args.backend)
+    rng = random.Random(0)
+    sheets = [synthetic_sheet(rng) for _ in range(args.sheets)]
+
+    for label, batch in [("per sheet", 1), (f"batch {args.batch}", args.batch)]:
+        scan_ids, seconds = run(storage, sheets, batch)
+        counts = count_rows(args.backend, scan_ids)
+        ok = all(counts[table] == n * len(scan_ids) for table, n in ROWS_PER_SHEET.items())
+
+        print(
+            f"[BENCH] {label:<12} {len(scan_ids) / seconds:8.0f} sheets/s "
+            f"({1000 * seconds / len(scan_ids):.1f} ms/sheet)  rows {'OK' if ok else counts}"
+        )
+
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
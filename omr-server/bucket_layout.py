@@ -0,0 +1,284 @@
+"""
+Sharded bucket layout.
+
+Processed scans are filed under bucket/success/ and bucket/error/ by the
+day the PNG was written (its mtime) and the first hex digits of a hash
+of its name, with everything derived from it alongside:
+
+    bucket/success/2026-10-19/3f/scan_0001.png
+    bucket/success/2026-10-19/3f/scan_0001.thumb.jpg
+    bucket/error/2026-10-19/a0/scan_0002.png
+    bucket/error/2026-10-19/a0/scan_0002.png.reason.json
+
+so a folder holds about a day's scans / 256 instead of the whole
+season, and listing, moving and serving a file stay fast. omr_scan and
+scan_asset keep the bucket-relative path (bucket/success/2026-10-19/...).
+
+Scans are moved with os.replace, never copied: the watcher checks at
+startup that the bucket and its status folders are one filesystem.
+FileMover makes the moves durable per Config.FSYNC_POLICY.
+
+Scans filed flat by older versions (bucket/success/<name>) are moved
+into their shards, and their database paths updated, by
+
+    python -m bucket_layout migrate [--bucket PATH] [--dry-run]     (from omr-server/)
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import Config
+
+STATUSES = ["success", "error"]
+SHARD_DIGITS = 2           # hash prefix length: 16 ** 2 folders per day
+REASON_SUFFIX = ".reason.json"
+MIGRATE_CHUNK = 2000       # scans per database transaction when migrating
+FSYNC_POLICIES = ["file", "batch", "none"]
+
+
+def shard_dir(file_path: Path, day=None) -> Path:
+    """
+    Shard of a scan, relative to its status folder: <day>/<hash prefix>,
+    day ("YYYY-MM-DD") defaulting to the file's mtime.
+    """
+    day = day or datetime.fromtimestamp(file_path.stat().st_mtime).strftime("%Y-%m-%d")
+    prefix = hashlib.sha1(file_path.name.encode()).hexdigest()[:SHARD_DIGITS]
+    return Path(day) / prefix
+
+
+def shard_path(folder: Path, file_path: Path) -> Path:
+    """
+    Where file_path goes in a status folder (e.g. bucket/success); its
+    shard directory is created.
+    """
+    target = folder / shard_dir(file_path) / file_path.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    return target
+
+
+def bucket_relative(bucket_path: Path, path: Path) -> str:
+    """
+    Path as stored in the database: "bucket/" + path under bucket_path.
+    """
+    return f"bucket/{path.relative_to(bucket_path).as_posix()}"
+
+
+# -----------------------------
+# Moving files
+# -----------------------------
+
+def check_same_filesystem(*folders: Path):
+    """
+    Raise if folders are on different filesystems, where os.replace
+    cannot move a scan between them.
+    """
+    devices = {folder: os.stat(folder).st_dev for folder in folders}
+
+    if len(set(devices.values())) > 1:
+        listing = ", ".join(f"{folder} (device {device})" for folder, device in devices.items())
+        raise RuntimeError(f"Bucket folders must be on one filesystem: {listing}")
+
+
+def fsync_path(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FileMover:
+    """
+    Moves scans with os.replace and syncs them to disk per policy:
+
+    - "file"  the scan and both folders are fsynced before move()
+              returns, so a path stored after it survives a crash
+    - "batch" synced every `batch` moves and on flush(); a crash can
+              lose the last moves (the scan reappears where it was)
+    - "none"  left to the OS
+
+    Thread-safe: the pipeline moves failed scans from its decode and
+    read threads.
+    """
+
+    def __init__(self, policy=None, batch=None):
+        self.policy = policy or Config.FSYNC_POLICY
+        self.batch = batch or Config.FSYNC_BATCH
+
+        if self.policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown FSYNC_POLICY: {self.policy!r} ({', '.join(FSYNC_POLICIES)})")
+
+        self.lock = threading.Lock()
+        self.pending = []      # moved files not synced yet
+        self.folders = set()   # and the folders they left / entered
+
+    def move(self, source: Path, target: Path):
+        os.replace(source, target)
+
+        if self.policy == "none":
+            return
+
+        with self.lock:
+            self.pending.append(target)
+            self.folders.update((source.parent, target.parent))
+
+            if self.policy == "file" or len(self.pending) >= self.batch:
+                self._sync()
+
+    def flush(self):
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        # File contents before the folder entries naming them
+        for path in self.pending:
+            fsync_path(path)
+        for folder in self.folders:
+            fsync_path(folder)
+
+        self.pending = []
+        self.folders = set()
+
+
+# -----------------------------
+# Migration of flat folders
+# -----------------------------
+
+def flat_groups(folder: Path):
+    """
+    Files directly in folder, grouped by the scan they belong to.
+
+    Returns ({png name: [file names, the PNG last]}, [names of files
+    whose PNG is not there]). Review assets are <stem>.<kind>.<ext> and
+    rejection reasons <name>.reason.json (see assets.write_assets,
+    watcher.move_to_error).
+    """
+    names = [entry.name for entry in os.scandir(folder) if entry.is_file()]
+    pngs = {Path(name).stem: name for name in names if name.lower().endswith(".png")}
+
+    groups = {png: [] for png in pngs.values()}
+    orphans = []
+
+    for name in names:
+        if name in groups:
+            continue
+
+        if name.endswith(REASON_SUFFIX):
+            owner = name[:-len(REASON_SUFFIX)]
+        else:
+            owner = pngs.get(name.rsplit(".", 2)[0])
+
+        if owner in groups:
+            groups[owner].append(name)
+        else:
+            orphans.append(name)
+
+    # Moved last, so a scan whose PNG is still flat has all its files there
+    for png, group in groups.items():
+        group.append(png)
+
+    return groups, orphans
+
+
+def migrate(bucket_path: Path, storage, dry_run=False, chunk=MIGRATE_CHUNK):
+    """
+    Move the flat files of every status folder into their shards and
+    point omr_scan / scan_asset at the new paths. Returns the number of
+    files moved (or, with dry_run, that would be).
+
+    Each chunk updates the database first, then moves its files: a run
+    stopped in between leaves files still flat with the database already
+    pointing at their shard, which the next run (same mtime, same shard)
+    moves them into. Moves are synced in batches, and at the end of each
+    chunk, unless FSYNC_POLICY is "none".
+    """
+    mover = FileMover("none" if Config.FSYNC_POLICY == "none" else "batch")
+
+    rows = {}
+    for table, row_id, file_path in storage.file_paths():
+        rows.setdefault(file_path, []).append((table, row_id))
+
+    moved = 0
+
+    for status in STATUSES:
+        folder = bucket_path / status
+        if not folder.is_dir():
+            continue
+
+        groups, orphans = flat_groups(folder)
+        scans = list(groups.items())
+        print(
+            f"[SHARD] {status}/: {len(scans)} flat scans, "
+            f"{len(orphans)} files without their PNG left in place"
+        )
+
+        started = time.perf_counter()
+
+        for start in range(0, len(scans), chunk):
+            moves = []
+            updates = []
+
+            for png, names in scans[start:start + chunk]:
+                shard = shard_dir(folder / png)
+
+                for name in names:
+                    source = folder / name
+                    target = folder / shard / name
+                    moves.append((source, target))
+
+                    path = bucket_relative(bucket_path, target)
+                    for table, row_id in rows.get(bucket_relative(bucket_path, source), []):
+                        updates.append((table, row_id, path, f"{Config.STATIC_URL}/{path}"))
+
+            if dry_run:
+                if start == 0 and moves:
+                    print(f"[SHARD] e.g. {moves[0][0].name} -> {moves[0][1].relative_to(bucket_path)}")
+                moved += len(moves)
+                continue
+
+            storage.update_file_paths(updates)
+
+            for source, target in moves:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                mover.move(source, target)
+            mover.flush()
+
+            moved += len(moves)
+            done = min(start + chunk, len(scans))
+            elapsed = time.perf_counter() - started
+            print(
+                f"[SHARD] {status}/: {done}/{len(scans)} scans "
+                f"({len(updates)} database rows, {done / elapsed:.0f} scans/s)"
+            )
+
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("migrate", help="move flat success/ and error/ files into shards")
+    run.add_argument("--bucket", type=Path, default=Config.BASE_DIR / "bucket", help="bucket folder")
+    run.add_argument("--dry-run", action="store_true", help="only count what would move")
+    run.add_argument("--chunk", type=int, default=MIGRATE_CHUNK, help="scans per transaction")
+
+    args = parser.parse_args()
+
+    from db.storage import open_storage
+
+    storage = open_storage()
+    try:
+        moved = migrate(args.bucket.resolve(), storage, dry_run=args.dry_run, chunk=args.chunk)
+    finally:
+        storage.close()
+
+    print(f"[SHARD] {moved} files {'to move' if args.dry_run else 'moved'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Fast pre-check that an image is a filled-in answer sheet.
+
+Runs between decode and the section readers and costs a few
+milliseconds instead of a full read:
+
+1. size: the page must be portrait and large enough to hold every
+   bubble (checked from the PNG header, before decoding)
+2. blank page: almost no ink anywhere on a strided thumbnail
+3. layout: a form is mostly paper and shows a printed bubble outline at
+   (nearly) every bubble position of the compiled grids and plain paper
+   in the gaps between neighbouring bubbles
+4. marks: at least one bubble holds pencil-dark pixels
+
+Work is done on the green channel, where the orange print stays light
+and graphite stays dark. Rejected sheets carry a reason code.
+"""
+import struct
+
+import numpy as np
+from reader.grid import CompiledGrid
+
+# =========================
+# REASON CODES
+# =========================
+
+WRONG_SIZE = "wrong_size"
+BLANK_PAGE = "blank_page"
+NOT_A_FORM = "not_a_form"
+NO_MARKS = "no_marks"
+
+# =========================
+# CONFIG
+# =========================
+
+PROBE_SIZE = 24         # page px inspected around each bubble center
+GAP_SIZE = 12           # page px inspected halfway to the next bubble
+ROW_TOLERANCE = 4       # page px of center y that still counts as one row
+THUMB_STEP = 8          # page px per thumbnail px for page-wide checks
+
+PRINT_LEVEL = 215       # green below this: any print or writing
+MARK_LEVEL = 110        # green below this: pencil
+
+MIN_PAGE_INK = 0.002        # share of inked thumbnail pixels on a non-blank page
+MAX_PAGE_INK = 0.50         # a form is mostly paper; photos / noise are not
+MIN_BOX_PRINT = 0.05        # share of a probe's pixels that must be print
+MIN_PRINTED_BUBBLES = 0.80  # share of bubble positions showing an outline
+MAX_PRINTED_GAPS = 0.30     # share of gap positions allowed to show print
+MIN_MARK_PIXELS = 20        # pencil pixels for a bubble to count as marked
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class SheetRejected(ValueError):
+    def __init__(self, reason, details):
+        super().__init__(f"{reason} {details}")
+        self.reason = reason
+        self.details = details
+
+
+def gap_centers(centers):
+    """
+    Points halfway from each bubble center to its right-hand neighbour
+    in the same row of one grid. Bubbles closer than a bubble probe plus
+    a gap probe (no clear paper between them) and bubbles beyond the
+    grid's usual pitch (last column, block edges) get none.
+    """
+    x = centers[:, 0]
+    y = centers[:, 1]
+
+    dx = x[None, :] - x[:, None]
+    same_row = np.abs(y[None, :] - y[:, None]) <= ROW_TOLERANCE
+    pitch = np.where(same_row & (dx > 0), dx, np.iinfo(dx.dtype).max).min(axis=1)
+
+    has_neighbour = pitch < np.iinfo(dx.dtype).max
+    if not has_neighbour.any():
+        return centers[:0]
+
+    usual = np.median(pitch[has_neighbour])
+    keep = has_neighbour & (pitch >= PROBE_SIZE + GAP_SIZE) & (pitch <= 1.5 * usual)
+
+    return np.stack([x[keep] + pitch[keep] // 2, y[keep]], axis=-1)
+
+
+def build_probe_grids():
+    """
+    Probe boxes on every bubble center of the four sections, and on the
+    gap to the right of each (see gap_centers()).
+    """
+    from student.read_student_info import STUDENT_SECTION
+    from school.previous.prev_read_info import PREVIOUS_SCHOOL_SECTION
+    from school.current.curr_read_info import CURRENT_SCHOOL_SECTION
+    from answers.read_answers import ANSWER_SECTION
+
+    centers = []
+    gaps = []
+    for section in (
+        STUDENT_SECTION,
+        PREVIOUS_SCHOOL_SECTION,
+        CURRENT_SCHOOL_SECTION,
+        ANSWER_SECTION,
+    ):
+        for grid in section.grids:
+            grid_centers = np.stack([
+                (grid.x1 + grid.x2) // 2,
+                (grid.y1 + grid.y2) // 2,
+            ], axis=-1)
+            centers.append(grid_centers)
+            gaps.append(gap_centers(grid_centers))
+
+    centers = np.concatenate(centers)
+    gaps = np.concatenate(gaps)
+
+    return (
+        CompiledGrid(centers, PROBE_SIZE, PROBE_SIZE),
+        CompiledGrid(gaps, GAP_SIZE, GAP_SIZE),
+    )
+
+
+BUBBLE_PROBES, GAP_PROBES = build_probe_grids()
+
+# Smallest page that still holds every probe
+MIN_WIDTH = int(max(BUBBLE_PROBES.x2.max(), GAP_PROBES.x2.max()))
+MIN_HEIGHT = int(max(BUBBLE_PROBES.y2.max(), GAP_PROBES.y2.max()))
+
+
+def png_size(file_path):
+    """
+    (width, height) from a PNG header, None for anything else.
+    """
+    with open(file_path, "rb") as f:
+        return png_header_size(f.read(24))
+
+
+def png_header_size(header):
+    """
+    (width, height) from the first 24 bytes of a file, None if not a PNG.
+    """
+    if len(header) < 24 or not header.startswith(PNG_SIGNATURE):
+        return None
+
+    return struct.unpack(">II", header[16:24])
+
+
+def size_reason(width, height):
+    if width < MIN_WIDTH or height < MIN_HEIGHT or width >= height:
+        return WRONG_SIZE
+    return None
+
+
+def classify_sheet(img):
+    """
+    Returns (reason, details); reason is None for a sheet worth reading.
+    """
+    height, width = img.shape[:2]
+    details = {"width": width, "height": height}
+
+    if size_reason(width, height):
+        return WRONG_SIZE, details
+
+    green = img[:, :, 1] if img.ndim == 3 else img
+
+    thumb = green[::THUMB_STEP, ::THUMB_STEP]
+    details["page_ink"] = round(float((thumb < PRINT_LEVEL).mean()), 4)
+
+    if details["page_ink"] < MIN_PAGE_INK:
+        return BLANK_PAGE, details
+
+    if details["page_ink"] > MAX_PAGE_INK:
+        return NOT_A_FORM, details
+
+    bubbles = BUBBLE_PROBES.cut(green).reshape(BUBBLE_PROBES.size, -1)
+    gaps = GAP_PROBES.cut(green).reshape(GAP_PROBES.size, -1)
+
+    printed = np.count_nonzero(bubbles < PRINT_LEVEL, axis=1) >= MIN_BOX_PRINT * bubbles.shape[1]
+    printed_gaps = np.count_nonzero(gaps < PRINT_LEVEL, axis=1) >= MIN_BOX_PRINT * gaps.shape[1]
+    details["printed_bubbles"] = round(float(printed.mean()), 3)
+    details["printed_gaps"] = round(float(printed_gaps.mean()), 3)
+
+    if (
+        details["printed_bubbles"] < MIN_PRINTED_BUBBLES
+        or details["printed_gaps"] > MAX_PRINTED_GAPS
+    ):
+        return NOT_A_FORM, details
+
+    marked = np.count_nonzero(bubbles < MARK_LEVEL, axis=1) >= MIN_MARK_PIXELS
+    details["marked_bubbles"] = int(marked.sum())
+
+    if details["marked_bubbles"] == 0:
+        return NO_MARKS, details
+
+    return None, details
+
+
+def check_sheet(img):
+    """
+    classify_sheet that raises SheetRejected for anything but a sheet.
+    """
+    reason, details = classify_sheet(img)
+    if reason is not None:
+        raise SheetRejected(reason, details)
+    return details
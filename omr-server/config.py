@@ -1,10 +1,130 @@
-from dotenv import load_dotenv
 import os
 from pathlib import Path
 
-load_dotenv()
+
+def load_env():
+    """
+    Load .env the way load_dotenv() finds it (config.py's folder, then
+    its parents), importing python-dotenv only when there is one.
+    """
+    here = Path(__file__).resolve().parent
+
+    if any((folder / ".env").is_file() for folder in (here, *here.parents)):
+        from dotenv import load_dotenv
+        load_dotenv()
+
+
+load_env()
 
 class Config:
     STATIC_URL= os.getenv("STATIC_URL", "http://localhost:4000")
     BASE_DIR = Path(__file__).resolve().parent.parent
-    DB_PATH = Path(os.getenv("DB_PATH")) if os.getenv("DB_PATH") else BASE_DIR / "omr.db"
\ No newline at end of file
+    DB_PATH = Path(os.getenv("DB_PATH")) if os.getenv("DB_PATH") else BASE_DIR / "omr.db"
+
+    # Student and answer sections: "global" (default) runs the full-page
+    # OTSU / equalizeHist + adaptive threshold, "normalized" compares each
+    # ROI with the sheet's paper level (reader/illumination.py). Normalized
+    # holds up under shadows but drops pencil lighter than INK_RATIO of
+    # the paper, and its answer thresholds are not measured against truth
+    # yet: it changes every sheet's output, so it is opt-in
+    PAGE_THRESHOLD_MODE = os.getenv("PAGE_THRESHOLD_MODE", "global")
+
+    # Worker processes for bulk runs (manual_trigger.py); 1 = in-process
+    WORKERS = int(os.getenv("WORKERS", "1"))
+
+    # Run the four section readers of a sheet on threads (lowest latency
+    # for one sheet at a time; leave off when WORKERS > 1)
+    PARALLEL_SECTIONS = os.getenv("PARALLEL_SECTIONS", "0") == "1"
+
+    # Ingest lanes (watcher): files in bucket/priority/ or named with
+    # PRIORITY_PREFIX go ahead of bulk drops. A lane's concurrency counts
+    # its files anywhere in the pipeline. PRIORITY_DECODE_THREADS decode
+    # threads only take priority files, so one is free for a priority
+    # scan whatever the bulk files on the DECODE_THREADS shared ones are
+    # doing (waiting for the file to stabilize can take up to 10 s); keep
+    # BULK_CONCURRENCY below MAX_DECODED_IMAGES so a decoded-image slot is
+    # free for it too.
+    PRIORITY_PREFIX = os.getenv("PRIORITY_PREFIX", "priority_")
+    PRIORITY_CONCURRENCY = int(os.getenv("PRIORITY_CONCURRENCY", "1"))
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "3"))
+
+    # Pipeline (watcher): detect -> decode -> read -> persist with bounded
+    # queues; intake pauses while MAX_DECODED_IMAGES images are alive or
+    # their pixels exceed MEMORY_BUDGET_MB
+    DECODE_THREADS = int(os.getenv("DECODE_THREADS", "1"))
+    PRIORITY_DECODE_THREADS = int(os.getenv("PRIORITY_DECODE_THREADS", "1"))
+    READ_THREADS = int(os.getenv("READ_THREADS", "2"))
+    STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", "4"))
+    MAX_DECODED_IMAGES = int(os.getenv("MAX_DECODED_IMAGES", "4"))
+    MEMORY_BUDGET_MB = int(os.getenv("MEMORY_BUDGET_MB", "256"))
+    METRICS_INTERVAL = int(os.getenv("METRICS_INTERVAL", "60"))
+
+    # Review-UI derivatives (page thumbnail, name / answer crops) written
+    # next to each processed scan. ASSET_FORMAT "jpg" or "webp" (about a
+    # third smaller, but ~25x slower to encode)
+    ASSETS_ENABLED = os.getenv("ASSETS_ENABLED", "1") == "1"
+    ASSET_FORMAT = os.getenv("ASSET_FORMAT", "jpg")
+    ASSET_QUALITY = int(os.getenv("ASSET_QUALITY", "80"))
+
+    # Debug overlays (bubbles, scores, decisions) in bucket/debug/<day>/
+    # for sheets named with OVERLAY_PREFIX and a random
+    # OVERLAY_SAMPLE_RATE share of the rest (e.g. 0.01). Days older than
+    # OVERLAY_KEEP_DAYS are deleted (0 keeps everything)
+    OVERLAY_PREFIX = os.getenv("OVERLAY_PREFIX", "debug_")
+    OVERLAY_SAMPLE_RATE = float(os.getenv("OVERLAY_SAMPLE_RATE", "0"))
+    OVERLAY_KEEP_DAYS = int(os.getenv("OVERLAY_KEEP_DAYS", "7"))
+
+    # Online threshold calibration (reader/calibration.py): each field
+    # group's fill threshold follows the valley between empty and filled
+    # bubble scores of the last CALIBRATION_WINDOW sheets, within
+    # CALIBRATION_MAX_SHIFT of the declared value. Moves are logged and
+    # appended to CALIBRATION_AUDIT_PATH (JSON lines) when set.
+    ADAPTIVE_THRESHOLDS = os.getenv("ADAPTIVE_THRESHOLDS", "0") == "1"
+    CALIBRATION_WINDOW = int(os.getenv("CALIBRATION_WINDOW", "200"))
+    CALIBRATION_MIN_SHEETS = int(os.getenv("CALIBRATION_MIN_SHEETS", "20"))
+    CALIBRATION_MAX_SHIFT = float(os.getenv("CALIBRATION_MAX_SHIFT", "0.10"))
+    CALIBRATION_AUDIT_PATH = os.getenv("CALIBRATION_AUDIT_PATH", "")
+
+    # Review routing (reader/confidence.py): with a table trained by
+    # train_confidence.py at CONFIDENCE_TABLE, a field goes to review
+    # when its calibrated P(correct) is below 1 - REVIEW_MAX_ERROR.
+    # Without the file every reader keeps its own review rule.
+    CONFIDENCE_TABLE = Path(os.getenv(
+        "CONFIDENCE_TABLE",
+        Path(__file__).resolve().parent / "confidence_table.json"
+    ))
+    REVIEW_MAX_ERROR = float(os.getenv("REVIEW_MAX_ERROR", "0.01"))
+
+    # Where results are written (db/storage.py): "sqlite" (omr.db at
+    # DB_PATH, read by be-omr-demo) or "postgres" (POSTGRES_DSN, at most
+    # POSTGRES_POOL_SIZE connections per process)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite")
+    POSTGRES_DSN = os.getenv("POSTGRES_DSN", "")
+    POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "4"))
+
+    # Moved scans (bucket_layout.FileMover): "file" fsyncs each scan and
+    # its folders before its new path is stored, "batch" every
+    # FSYNC_BATCH scans (a crash can lose the last moves), "none" leaves
+    # it to the OS
+    FSYNC_POLICY = os.getenv("FSYNC_POLICY", "file")
+    FSYNC_BATCH = int(os.getenv("FSYNC_BATCH", "64"))
+
+    # Decode scans from a read-only memory map of the PNG (header check
+    # and decoder read the same mapped pages) instead of reading it
+    # into a buffer
+    MMAP_DECODE = os.getenv("MMAP_DECODE", "0") == "1"
+
+    # Archive compaction (archive.py): day folders of processed scans
+    # older than ARCHIVE_AFTER_DAYS are recompressed to lossless
+    # grayscale ARCHIVE_FORMAT ("png" or "webp")
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+    ARCHIVE_FORMAT = os.getenv("ARCHIVE_FORMAT", "png")
+
+    # Exam (answer-key version, see scoring.py) new scans are scored against
+    EXAM_ID = os.getenv("EXAM_ID", "default")
+
+    # Analytics export (export.py): Parquet / Arrow files and their
+    # watermark. Each run rewrites the last EXPORT_REFRESH_DAYS ingest days
+    # (status changes, review) and every day holding a re-scored scan
+    EXPORT_DIR = Path(os.getenv("EXPORT_DIR", BASE_DIR / "exports"))
+    EXPORT_REFRESH_DAYS = int(os.getenv("EXPORT_REFRESH_DAYS", "7"))
@@ -0,0 +1,236 @@
+"""
+Per-field results: everything in omr_scan.raw_json, as indexed rows.
+
+scan_field has one row per field of a sheet and one per column of a
+multi-column field (a name letter, an LRN digit, the tens / ones of a
+grade), keyed by
+
+    field  "student.lrn", "previous_school.final_grade.Math", "answers.math.12"
+    part   "" for the field itself, "1".."n" for digits, "tens" / "ones"
+
+with the read value, confidence, review flag (fields only), calibrated
+p_correct (when a confidence table is attached) and the bubble scores
+packed one byte per option (round(score * 100)). The options of each
+(field, part), in packed order, are in field_layout. So "LRN digits
+read with confidence < 0.5" is an index range instead of a JSON parse
+per scan:
+
+    SELECT scan_id, part, value, confidence FROM scan_field
+    WHERE field = 'student.lrn' AND confidence < 0.5 AND part != ''
+
+Rows are written at ingest (db/storage.py). Scans stored before that
+are filled from their raw_json, in chunks, by
+
+    python -m db.fields backfill [--chunk N]      (from omr-server/)
+
+The backfill works on omr.db and refuses to run unless STORAGE_BACKEND
+is sqlite.
+"""
+import argparse
+import json
+import sqlite3
+import time
+
+from config import Config
+from db.schema import ensure_schema
+
+SECTIONS = ["student", "previous_school", "current_school"]
+
+FIELD_COLUMNS = [
+    "scan_id",
+    "field",
+    "part",
+    "value",
+    "confidence",
+    "review_required",
+    "p_correct",
+    "scores",
+]
+
+BACKFILL_CHUNK = 500  # scans per backfill transaction
+
+
+def pack_scores(scores):
+    """
+    One byte per option of an {option: score} dict, round(score * 100).
+    """
+    return bytes([min(255, int(score * 100 + 0.5)) for score in scores.values()])
+
+
+def value_text(value):
+    # Multi-select answers (special_classes) are lists, stored as JSON
+    # like student.special_classes
+    if isinstance(value, list):
+        return json.dumps(value)
+    return None if value is None else str(value)
+
+
+def add_field(rows, name, field):
+    """
+    Append the entries of one reader field and each of its columns:
+    (field, part, value, confidence, review_required, p_correct,
+    scores dict, packed scores).
+    """
+    details = field.get("details", {})
+    scores = details.get("scores", {})
+
+    rows.append((
+        name,
+        "",
+        value_text(field.get("answer")),
+        field.get("confidence"),
+        bool(field.get("review_required", False)),
+        field.get("p_correct"),
+        scores,
+        pack_scores(scores),
+    ))
+
+    columns = [(str(i + 1), column) for i, column in enumerate(details.get("digits", []))]
+    columns += [
+        (part, column) for part, column in details.items()
+        if isinstance(column, dict) and "selected" in column
+    ]
+
+    for part, column in columns:
+        scores = column.get("scores", {})
+        rows.append((
+            name,
+            part,
+            value_text(column.get("selected")),
+            column.get("confidence"),
+            None,
+            None,
+            scores,
+            pack_scores(scores),
+        ))
+
+
+def field_rows(sheet):
+    """
+    Entries (see add_field) of every field of a sheet's section results.
+    """
+    rows = []
+
+    def walk(name, node):
+        if "answer" in node:
+            add_field(rows, name, node)
+            return
+        for key, child in node.items():
+            if isinstance(child, dict):
+                walk(f"{name}.{key}", child)
+
+    for section in SECTIONS:
+        walk(section, sheet.get(section, {}))
+
+    for subject, answers in sheet.get("answers", {}).items():
+        for question, field in answers.get("answers", {}).items():
+            add_field(rows, f"answers.{subject}.{question}", field)
+
+    return rows
+
+
+def insert_fields(conn, scans, layouts):
+    """
+    Insert (scan_id, field_rows()) pairs (inside the caller's
+    transaction). layouts: (field, part) already in field_layout.
+    Returns the (field, part) it added there.
+    """
+    new_layouts = {}
+    values = []
+
+    for scan_id, rows in scans:
+        for field, part, value, confidence, review, p_correct, options, scores in rows:
+            values.append((scan_id, field, part, value, confidence, review, p_correct, scores))
+            if (field, part) not in layouts:
+                new_layouts[(field, part)] = json.dumps(list(options))
+
+    conn.executemany(
+        f"""
+        INSERT INTO scan_field ({", ".join(FIELD_COLUMNS)})
+        VALUES ({", ".join("?" * len(FIELD_COLUMNS))})
+        """,
+        values,
+    )
+
+    if new_layouts:
+        conn.executemany(
+            "INSERT OR IGNORE INTO field_layout (field, part, options) VALUES (?, ?, ?)",
+            [(field, part, options) for (field, part), options in new_layouts.items()],
+        )
+
+    return set(new_layouts)
+
+
+def backfill(conn, chunk=BACKFILL_CHUNK):
+    """
+    Give every scan without scan_field rows its rows from raw_json, one
+    transaction per chunk of scans. Returns the number of scans.
+    """
+    total = conn.execute(
+        """
+        SELECT count(*) FROM omr_scan o
+        WHERE raw_json IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM scan_field f WHERE f.scan_id = o.id)
+        """
+    ).fetchone()[0]
+    print(f"[FIELDS] {total} scans to backfill")
+
+    layouts = set()
+    done = 0
+    last_id = 0
+    started = time.perf_counter()
+
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, raw_json FROM omr_scan o
+            WHERE id > ?
+              AND raw_json IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM scan_field f WHERE f.scan_id = o.id)
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, chunk)
+        ).fetchall()
+        if not rows:
+            break
+
+        with conn:
+            added = insert_fields(
+                conn,
+                [(scan_id, field_rows(json.loads(raw))) for scan_id, raw in rows],
+                layouts,
+            )
+        layouts |= added
+
+        done += len(rows)
+        last_id = rows[-1][0]
+
+        elapsed = time.perf_counter() - started
+        print(f"[FIELDS] {done}/{total} scans ({done / elapsed:.0f} scans/s)")
+
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fill = commands.add_parser("backfill", help="fill scan_field from raw_json for scans stored before it")
+    fill.add_argument("--chunk", type=int, default=BACKFILL_CHUNK, help="scans per transaction")
+
+    args = parser.parse_args()
+
+    if Config.STORAGE_BACKEND != "sqlite":
+        raise SystemExit(f"[FIELDS] STORAGE_BACKEND is {Config.STORAGE_BACKEND!r}: the backfill works on omr.db, sqlite only")
+
+    conn = sqlite3.connect(Config.DB_PATH)
+    try:
+        ensure_schema(conn, Config.DB_PATH)
+        backfill(conn, chunk=args.chunk)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
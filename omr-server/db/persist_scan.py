@@ -1,35 +1,10 @@
 from pathlib import Path
-import sqlite3
-import json
 from typing import Dict, Any
 from config import Config
-import random
+from db.storage import open_storage
 
-# omr.db is located at project root (one level above omr-server)
-DB_PATH = Config.DB_PATH
 STATIC_URL=Config.STATIC_URL
 
-def _aggregate_review_flag(section: Dict[str, Any]) -> bool:
-    """
-    Returns True if ANY field in the section has review_required=True.
-    """
-    return any(
-        field.get("review_required", False)
-        for field in section.values()
-        if isinstance(field, dict)
-    )
-
-
-def _aggregate_answers_review_flag(answers_json: Dict[str, Any]) -> bool:
-    """
-    Returns True if ANY question across all subjects has review_required=True.
-    """
-    for subject in answers_json.values():
-        for q in subject.get("answers", {}).values():
-            if q.get("review_required", False):
-                return True
-    return False
-
 
 def persist_scan(
     file_path: Path,
@@ -39,7 +14,8 @@ def persist_scan(
     answers_json: Dict[str, Any],
 ):
     """
-    Persist full scan into database.
+    Persist full scan into the storage backend (Config.STORAGE_BACKEND,
+    see db/storage.py).
 
     Flow:
     1. Compute aggregated review flags
@@ -47,207 +23,20 @@ def persist_scan(
     3. Insert student
     4. Insert previous_school
     5. Insert current_school
-    6. Insert student_answers (bulk style loop)
+    6. Score the answers against the key of Config.EXAM_ID
+    7. Insert student_answers and scan_score
+    8. SQLite: add the scan to the dashboard summaries (db/summary.py)
+       and the name / school id search index (db/search.py)
     All wrapped in a single transaction.
     """
+    sheet = {
+        "student": student_json,
+        "previous_school": prev_school_json,
+        "current_school": curr_school_json,
+        "answers": answers_json,
+    }
 
-    print( ">>>> ", DB_PATH )
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-
-    try:
-        with conn:  # transaction boundary
-
-            # -----------------------------
-            # Aggregate review flags
-            # -----------------------------
-            student_review = _aggregate_review_flag(student_json)
-            prev_review = _aggregate_review_flag(prev_school_json)
-            curr_review = _aggregate_review_flag(curr_school_json)
-            answers_review = _aggregate_answers_review_flag(answers_json)
-
-            scan_review = (
-                student_review
-                or prev_review
-                or curr_review
-                or answers_review
-            )
-
-            # -----------------------------
-            # Insert omr_scan (parent)
-            # -----------------------------
-            scan_cursor = conn.execute(
-                """
-                INSERT INTO omr_scan (
-                    file_name,
-                    file_path,
-                    raw_json,
-                    review_required
-                )
-                VALUES (?, ?, ?, ?)
-                """,
-                (
-                    file_path.name,
-                    f"bucket/{file_path.name}",
-                    json.dumps({
-                        "student": student_json,
-                        "previous_school": prev_school_json,
-                        "current_school": curr_school_json,
-                        "answers": answers_json,
-                    }),
-                    int(scan_review),
-                ),
-            )
-
-            scan_id = scan_cursor.lastrowid
-            generated_scan_id = scan_id
-
-            # -----------------------------
-            # Insert student
-            # -----------------------------
-            conn.execute(
-                """
-                INSERT INTO student (
-                    scan_id,
-                    last_name,
-                    first_name,
-                    middle_initial,
-                    birth_month,
-                    birth_day,
-                    birth_year,
-                    gender,
-                    lrn,
-                    ssc,
-                    four_ps,
-                    special_classes,
-                    review_required
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    scan_id,
-                    student_json.get("last_name", {}).get("answer"),
-                    student_json.get("first_name", {}).get("answer"),
-                    student_json.get("middle_initial", {}).get("answer"),
-                    student_json.get("birth_month", {}).get("answer"),
-                    student_json.get("birth_day", {}).get("answer"),
-                    student_json.get("birth_year", {}).get("answer"),
-                    student_json.get("gender", {}).get("answer"),
-                    student_json.get("lrn", {}).get("answer"),
-                    student_json.get("ssc", {}).get("answer"),
-                    student_json.get("four_ps", {}).get("answer"),
-                    json.dumps(
-                        student_json.get("special_classes", {}).get("answer", [])
-                    ),
-                    int(student_review),
-                ),
-            )
-
-            # -----------------------------
-            # Insert previous school
-            # -----------------------------
-            conn.execute(
-                """
-                INSERT INTO previous_school (
-                    scan_id,
-                    school_id,
-                    class_size,
-                    school_year,
-                    math_grade,
-                    english_grade,
-                    science_grade,
-                    filipino_grade,
-                    ap_grade,
-                    review_required
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    scan_id,
-                    prev_school_json.get("school_id", {}).get("answer"),
-                    prev_school_json.get("class_size", {}).get("answer"),
-                    prev_school_json.get("school_year", {}).get("answer"),
-                    prev_school_json.get("final_grade", {}).get("Math", {}).get("answer"),
-                    prev_school_json.get("final_grade", {}).get("English", {}).get("answer"),
-                    prev_school_json.get("final_grade", {}).get("Science", {}).get("answer"),
-                    prev_school_json.get("final_grade", {}).get("Filipino", {}).get("answer"),
-                    prev_school_json.get("final_grade", {}).get("AP", {}).get("answer"),
-                    int(prev_review),
-                ),
-            )
-
-            # -----------------------------
-            # Insert current school
-            # -----------------------------
-            conn.execute(
-                """
-                INSERT INTO current_school (
-                    scan_id,
-                    region,
-                    division,
-                    school_id,
-                    school_type,
-                    review_required
-                )
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    scan_id,
-                    curr_school_json.get("region", {}).get("answer"),
-                    curr_school_json.get("division", {}).get("answer"),
-                    curr_school_json.get("school_id", {}).get("answer"),
-                    curr_school_json.get("school_type", {}).get("answer"),
-                    int(curr_review),
-                ),
-            )
-
-            # -----------------------------
-            # Insert answers (per question)
-            # -----------------------------
-            for subject_name, subject in answers_json.items():
-                for question_number, q in subject.get("answers", {}).items():
-
-                    answer_value = q.get("answer")
-                    review_flag = q.get("review_required", False)
-
-                    # Demo high-score logic (target ~85%–98% overall)
-                    # - Blank answers are always incorrect
-                    # - All non-blank answers are mostly correct
-                    if not answer_value:
-                        is_correct = False
-                    else:
-                        # Randomize between 85% and 98% likelihood
-                        probability = random.uniform(0.85, 0.98)
-                        is_correct = random.random() < probability
-
-                    conn.execute(
-                        """
-                        INSERT INTO student_answer (
-                            scan_id,
-                            subject,
-                            question_number,
-                            answer,
-                            confidence,
-                            is_correct,
-                            review_required
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            scan_id,
-                            subject_name,
-                            int(question_number),
-                            answer_value,
-                            q.get("confidence"),
-                            int(is_correct),
-                            int(review_flag),
-                        ),
-                    )
-
-        return generated_scan_id
-    finally:
-        conn.close()
+    return open_storage().persist_scan(file_path, sheet, Config.EXAM_ID)
 
 
 def update_scan_status(
@@ -260,11 +49,10 @@ def update_scan_status(
 
     Args:
         scan_id: ID returned from persist_scan()
-        new_file_path: Final filesystem location (success/ or error/)
+        new_file_path: Final location, bucket-relative (bucket/success/<day>/<shard>/...
+            or bucket/error/..., see bucket_layout.py)
         status: 'success' or 'error'
     """
-
-    conn = sqlite3.connect(DB_PATH)
     # Store only bucket-relative path (never full filesystem path)
     path_str = str(new_file_path)
     if "bucket/" in path_str:
@@ -272,22 +60,57 @@ def update_scan_status(
     else:
         relative_path = f"bucket/{new_file_path.name}"
 
-    try:
-        with conn:
-            conn.execute(
-                """
-                UPDATE omr_scan
-                SET file_path = ?,
-                    file_url = ?,
-                    status = ?
-                WHERE id = ?
-                """,
-                (
-                    relative_path,
-                    f"{STATIC_URL}/{relative_path}",
-                    status,
-                    scan_id,
-                ),
-            )
-    finally:
-        conn.close()
+    open_storage().update_scan_status(
+        scan_id,
+        relative_path,
+        f"{STATIC_URL}/{relative_path}",
+        status,
+    )
+
+
+def persist_scan_assets(scan_id: int, assets):
+    """
+    Record the review-UI derivatives written next to a scan.
+
+    Args:
+        scan_id: ID returned from persist_scan()
+        assets: list of {"kind", "path", "width", "height", "bytes"},
+            path bucket-relative like omr_scan.file_path
+    """
+    open_storage().persist_scan_assets([
+        (
+            scan_id,
+            asset["kind"],
+            str(asset["path"]),
+            f"{STATIC_URL}/{asset['path']}",
+            asset["width"],
+            asset["height"],
+            asset["bytes"],
+        )
+        for asset in assets
+    ])
+
+
+def persist_review_crops(scan_id: int, crops, image_format: str):
+    """
+    Store the crops of a scan's review-flagged fields.
+
+    Args:
+        scan_id: ID returned from persist_scan()
+        crops: list of {"field", "x", "y", "width", "height", "data"},
+            box in page coordinates, data the encoded image
+        image_format: encoding of data, e.g. "jpg"
+    """
+    open_storage().persist_review_crops([
+        (
+            scan_id,
+            crop["field"],
+            crop["x"],
+            crop["y"],
+            crop["width"],
+            crop["height"],
+            image_format,
+            crop["data"],
+        )
+        for crop in crops
+    ])
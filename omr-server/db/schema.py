@@ -0,0 +1,159 @@
+"""
+Tables owned by omr-server.
+
+The core schema (omr_scan, student, student_answer, ...) is managed by
+the drizzle migrations in be-omr-demo. Tables that only the ingest side
+writes live here instead and are created on first use, with the same
+column conventions as the drizzle DDL.
+"""
+import sqlite3
+
+SCHEMA = [
+    # Review-UI derivatives (thumbnail, section crops) of a scan
+    """
+    CREATE TABLE IF NOT EXISTS `scan_asset` (
+        `id` integer PRIMARY KEY AUTOINCREMENT NOT NULL,
+        `scan_id` integer NOT NULL,
+        `kind` text NOT NULL,
+        `file_path` text NOT NULL,
+        `file_url` text NOT NULL,
+        `width` integer,
+        `height` integer,
+        `bytes` integer,
+        `created_at` text DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        FOREIGN KEY (`scan_id`) REFERENCES `omr_scan`(`id`) ON UPDATE no action ON DELETE cascade
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS `idx_asset_scan_kind` ON `scan_asset` (`scan_id`, `kind`)",
+    # Crop of each field flagged for review; box in page coordinates
+    """
+    CREATE TABLE IF NOT EXISTS `review_crop` (
+        `id` integer PRIMARY KEY AUTOINCREMENT NOT NULL,
+        `scan_id` integer NOT NULL,
+        `field` text NOT NULL,
+        `x` integer NOT NULL,
+        `y` integer NOT NULL,
+        `width` integer NOT NULL,
+        `height` integer NOT NULL,
+        `format` text NOT NULL,
+        `image` blob NOT NULL,
+        `created_at` text DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        FOREIGN KEY (`scan_id`) REFERENCES `omr_scan`(`id`) ON UPDATE no action ON DELETE cascade
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS `idx_review_crop_scan_field` ON `review_crop` (`scan_id`, `field`)",
+    # Answer key of each exam (form version), one row per scored question
+    """
+    CREATE TABLE IF NOT EXISTS `answer_key` (
+        `id` integer PRIMARY KEY AUTOINCREMENT NOT NULL,
+        `exam` text NOT NULL,
+        `subject` text NOT NULL,
+        `question_number` integer NOT NULL,
+        `answer` text NOT NULL,
+        `created_at` text DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS `idx_answer_key_item` ON `answer_key` (`exam`, `subject`, `question_number`)",
+    # Scored answers of a scan: one byte per question (choice index, -1
+    # blank, subject-major) and the totals against its exam's key (NULL,
+    # and max_score 0, while the exam has no key)
+    """
+    CREATE TABLE IF NOT EXISTS `scan_score` (
+        `id` integer PRIMARY KEY AUTOINCREMENT NOT NULL,
+        `scan_id` integer NOT NULL,
+        `exam` text NOT NULL,
+        `answers` blob NOT NULL,
+        `math_score` integer,
+        `english_score` integer,
+        `science_score` integer,
+        `filipino_score` integer,
+        `ap_score` integer,
+        `total_score` integer,
+        `max_score` integer DEFAULT 0 NOT NULL,
+        `scored_at` text DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        FOREIGN KEY (`scan_id`) REFERENCES `omr_scan`(`id`) ON UPDATE no action ON DELETE cascade
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS `idx_scan_score_scan` ON `scan_score` (`scan_id`)",
+    "CREATE INDEX IF NOT EXISTS `idx_scan_score_exam` ON `scan_score` (`exam`, `scan_id`)",
+    # Dashboard counters per scope: all / region / division / school / day
+    # (db/summary.py)
+    """
+    CREATE TABLE IF NOT EXISTS `scan_summary` (
+        `id` integer PRIMARY KEY AUTOINCREMENT NOT NULL,
+        `scope` text NOT NULL,
+        `scope_key` text NOT NULL,
+        `scans` integer DEFAULT 0 NOT NULL,
+        `review_scans` integer DEFAULT 0 NOT NULL,
+        `student_review_scans` integer DEFAULT 0 NOT NULL,
+        `previous_school_review_scans` integer DEFAULT 0 NOT NULL,
+        `current_school_review_scans` integer DEFAULT 0 NOT NULL,
+        `answers_review_scans` integer DEFAULT 0 NOT NULL,
+        `success_scans` integer DEFAULT 0 NOT NULL,
+        `error_scans` integer DEFAULT 0 NOT NULL,
+        `scored_scans` integer DEFAULT 0 NOT NULL,
+        `max_score_sum` integer DEFAULT 0 NOT NULL,
+        `total_score_sum` integer DEFAULT 0 NOT NULL,
+        `math_score_sum` integer DEFAULT 0 NOT NULL,
+        `english_score_sum` integer DEFAULT 0 NOT NULL,
+        `science_score_sum` integer DEFAULT 0 NOT NULL,
+        `filipino_score_sum` integer DEFAULT 0 NOT NULL,
+        `ap_score_sum` integer DEFAULT 0 NOT NULL,
+        `updated_at` text DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS `idx_scan_summary_scope` ON `scan_summary` (`scope`, `scope_key`)",
+    # Every field and field column of a scan (db/fields.py); no rowid,
+    # rows live in (scan_id, field, part) order
+    """
+    CREATE TABLE IF NOT EXISTS `scan_field` (
+        `scan_id` integer NOT NULL,
+        `field` text NOT NULL,
+        `part` text DEFAULT '' NOT NULL,
+        `value` text,
+        `confidence` real,
+        `review_required` integer,
+        `p_correct` real,
+        `scores` blob,
+        PRIMARY KEY (`scan_id`, `field`, `part`),
+        FOREIGN KEY (`scan_id`) REFERENCES `omr_scan`(`id`) ON UPDATE no action ON DELETE cascade
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS `idx_scan_field_confidence` ON `scan_field` (`field`, `confidence`)",
+    # Options of each (field, part), in scan_field.scores byte order
+    """
+    CREATE TABLE IF NOT EXISTS `field_layout` (
+        `field` text NOT NULL,
+        `part` text NOT NULL,
+        `options` text NOT NULL,
+        PRIMARY KEY (`field`, `part`)
+    ) WITHOUT ROWID
+    """,
+    # Substring search over names and school ids, rowid = scan id (db/search.py)
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS `scan_search` USING fts5(
+        `last_name`,
+        `first_name`,
+        `school_id`,
+        tokenize = 'trigram'
+    )
+    """,
+]
+
+# Databases already brought up to date by this process
+_ensured = set()
+
+
+def ensure_schema(conn: sqlite3.Connection, db_path):
+    """
+    Create the omr-server tables once per process and database.
+    """
+    key = str(db_path)
+    if key in _ensured:
+        return
+
+    with conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    _ensured.add(key)
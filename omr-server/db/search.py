@@ -0,0 +1,98 @@
+"""
+Trigram search index over student names and school ids.
+
+The answer-sheet list searches with LIKE '%keyword%', which no B-tree
+index can serve. scan_search is an FTS5 table with the trigram
+tokenizer, one row per scan (rowid = omr_scan.id), so any substring of
+3+ characters is an index lookup:
+
+    SELECT rowid FROM scan_search WHERE scan_search MATCH '"dela cruz"'
+
+Rows are written by persist_scan in the scan's transaction. rebuild()
+fills the index from the stored rows; it runs on its own the first time
+a database with scans but no index is written to, and by hand with
+
+    python -m db.search rebuild      (from omr-server/)
+
+SQLite only, like the summaries (db/summary.py): only the sqlite backend
+keeps the index, and rebuild refuses to run with any other
+STORAGE_BACKEND.
+"""
+import sqlite3
+import sys
+import time
+
+from config import Config
+from db.schema import ensure_schema
+
+# Databases whose index this process has checked
+_ensured = set()
+
+
+def index_scan(conn, scan_id, last_name, first_name, school_id):
+    """
+    Index a newly persisted scan (inside the caller's transaction).
+    """
+    conn.execute(
+        """
+        INSERT INTO scan_search (rowid, last_name, first_name, school_id)
+        VALUES (?, ?, ?, ?)
+        """,
+        (scan_id, last_name, first_name, school_id),
+    )
+
+
+def rebuild(conn):
+    """
+    Re-index every stored scan in one transaction. Returns the number
+    of indexed scans.
+    """
+    with conn:
+        conn.execute("DELETE FROM scan_search")
+        conn.execute(
+            """
+            INSERT INTO scan_search (rowid, last_name, first_name, school_id)
+            SELECT o.id, st.last_name, st.first_name, cs.school_id
+            FROM omr_scan o
+            LEFT JOIN student st ON st.scan_id = o.id
+            LEFT JOIN current_school cs ON cs.scan_id = o.id
+            """
+        )
+        conn.execute("INSERT INTO scan_search (scan_search) VALUES ('optimize')")
+
+    return conn.execute("SELECT count(*) FROM scan_search").fetchone()[0]
+
+
+def ensure_search(conn, db_path):
+    """
+    Index a database that has scans but no index yet (first write after
+    upgrading), once per process and database.
+    """
+    key = str(db_path)
+    if key in _ensured:
+        return
+
+    indexed = conn.execute("SELECT 1 FROM scan_search LIMIT 1").fetchone()
+    if not indexed and conn.execute("SELECT 1 FROM omr_scan LIMIT 1").fetchone():
+        rebuild(conn)
+
+    _ensured.add(key)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print(__doc__)
+        sys.exit(1)
+
+    if Config.STORAGE_BACKEND != "sqlite":
+        raise SystemExit(f"[SEARCH] STORAGE_BACKEND is {Config.STORAGE_BACKEND!r}: the search index is kept for sqlite only")
+
+    conn = sqlite3.connect(Config.DB_PATH)
+    try:
+        ensure_schema(conn, Config.DB_PATH)
+
+        started = time.perf_counter()
+        scans = rebuild(conn)
+        print(f"[SEARCH] indexed {scans} scans in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
@@ -0,0 +1,179 @@
+"""
+SQLite storage backend (the default): omr.db, shared with be-omr-demo.
+
+Besides the result tables, every write keeps the dashboard summaries
+(db/summary.py) and the name / school id search index (db/search.py)
+in step, in the same transaction. One short-lived connection per call,
+so the watcher's threads and worker processes never share one.
+"""
+import sqlite3
+
+from db.fields import insert_fields
+from db.schema import ensure_schema
+from db.search import ensure_search, index_scan
+from db.storage import (
+    ANSWER_COLUMNS,
+    ASSET_COLUMNS,
+    CURRENT_SCHOOL_COLUMNS,
+    FILE_TABLES,
+    PREVIOUS_SCHOOL_COLUMNS,
+    REVIEW_CROP_COLUMNS,
+    SCAN_COLUMNS,
+    STUDENT_COLUMNS,
+    Storage,
+    sheet_rows,
+)
+from db.summary import add_scan, ensure_summary, move_status
+
+
+def insert_sql(table, columns, verb="INSERT"):
+    return (
+        f"{verb} INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})"
+    )
+
+
+class SqliteStorage(Storage):
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.layouts = set()  # (field, part) known to be in field_layout
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        ensure_schema(conn, self.db_path)
+        return conn
+
+    def persist_scans(self, sheets, exam):
+        """
+        Flow per sheet:
+        1. Insert omr_scan
+        2. Insert student, previous_school, current_school
+        3. Insert student_answers and scan_score (scored in sheet_rows)
+        4. Insert its per-field rows (db/fields.py)
+        5. Add the scan to the dashboard summaries and the search index
+        All wrapped in a single transaction.
+        """
+        from scoring import SCAN_SCORE_COLUMNS, ingest_key
+
+        conn = self.connect()
+
+        try:
+            ensure_summary(conn, self.db_path)
+            ensure_search(conn, self.db_path)
+
+            scan_ids = []
+            layouts = set()
+
+            with conn:  # transaction boundary
+                key = ingest_key(conn, exam)
+
+                for file_path, sheet in sheets:
+                    rows = sheet_rows(file_path, sheet, exam, key)
+
+                    scan_id = conn.execute(
+                        insert_sql("omr_scan", SCAN_COLUMNS),
+                        rows["scan"],
+                    ).lastrowid
+
+                    conn.execute(
+                        insert_sql("student", STUDENT_COLUMNS),
+                        (scan_id, *rows["student"]),
+                    )
+                    conn.execute(
+                        insert_sql("previous_school", PREVIOUS_SCHOOL_COLUMNS),
+                        (scan_id, *rows["previous_school"]),
+                    )
+                    conn.execute(
+                        insert_sql("current_school", CURRENT_SCHOOL_COLUMNS),
+                        (scan_id, *rows["current_school"]),
+                    )
+                    conn.executemany(
+                        insert_sql("student_answer", ANSWER_COLUMNS),
+                        [(scan_id, *answer) for answer in rows["answers"]],
+                    )
+                    conn.execute(
+                        insert_sql("scan_score", ["scan_id", *SCAN_SCORE_COLUMNS]),
+                        (scan_id, *rows["score"]),
+                    )
+
+                    layouts |= insert_fields(conn, [(scan_id, rows["fields"])], self.layouts | layouts)
+                    index_scan(conn, scan_id, *rows["search"])
+                    add_scan(conn, scan_id, rows["summary"])
+
+                    scan_ids.append(scan_id)
+
+            self.layouts |= layouts
+            return scan_ids
+        finally:
+            conn.close()
+
+    def update_scan_status(self, scan_id, file_path, file_url, status):
+        conn = self.connect()
+
+        try:
+            with conn:
+                old_status = conn.execute(
+                    "SELECT status FROM omr_scan WHERE id = ?",
+                    (scan_id,)
+                ).fetchone()
+
+                conn.execute(
+                    """
+                    UPDATE omr_scan
+                    SET file_path = ?,
+                        file_url = ?,
+                        status = ?
+                    WHERE id = ?
+                    """,
+                    (file_path, file_url, status, scan_id),
+                )
+
+                if old_status is not None:
+                    move_status(conn, scan_id, old_status[0], status)
+        finally:
+            conn.close()
+
+    def file_paths(self):
+        conn = self.connect()
+
+        try:
+            return [
+                (table, row_id, file_path)
+                for table in FILE_TABLES
+                for row_id, file_path in conn.execute(
+                    f"SELECT id, file_path FROM {table} WHERE file_path IS NOT NULL"
+                )
+            ]
+        finally:
+            conn.close()
+
+    def update_file_paths(self, rows):
+        conn = self.connect()
+
+        try:
+            with conn:
+                for table in FILE_TABLES:
+                    conn.executemany(
+                        f"UPDATE {table} SET file_path = ?, file_url = ? WHERE id = ?",
+                        [(path, url, row_id) for t, row_id, path, url in rows if t == table],
+                    )
+        finally:
+            conn.close()
+
+    def persist_scan_assets(self, rows):
+        self.replace_rows("scan_asset", ASSET_COLUMNS, rows)
+
+    def persist_review_crops(self, rows):
+        self.replace_rows("review_crop", REVIEW_CROP_COLUMNS, rows)
+
+    def replace_rows(self, table, columns, rows):
+        conn = self.connect()
+
+        try:
+            with conn:
+                conn.executemany(
+                    insert_sql(table, columns, "INSERT OR REPLACE"),
+                    rows,
+                )
+        finally:
+            conn.close()
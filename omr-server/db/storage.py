@@ -0,0 +1,303 @@
+"""
+Storage backends for scan results.
+
+db/persist_scan.py is what the watcher and processor call; it hands
+every write to the backend selected by Config.STORAGE_BACKEND:
+
+- "sqlite"   (default) omr.db at Config.DB_PATH, read by be-omr-demo;
+             also keeps the dashboard summaries and search index
+             (db/sqlite_storage.py)
+- "postgres" a PostgreSQL server at Config.POSTGRES_DSN: pooled
+             connections, rows written with COPY (db/postgres_storage.py)
+
+Both write the same rows, built once here by sheet_rows(). A backend
+implements Storage; persist_scans() takes a batch of sheets and writes
+them in one transaction, persist_scan() is a batch of one.
+
+Try a backend without the watcher (from omr-server/):
+    python -m benchmarks.storage_backends --help
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from config import Config
+from db.fields import field_rows
+
+# Columns each sheet_rows() tuple fills, scan_id first where there is one
+SCAN_COLUMNS = ["file_name", "file_path", "raw_json", "review_required"]
+STUDENT_COLUMNS = [
+    "scan_id",
+    "last_name",
+    "first_name",
+    "middle_initial",
+    "birth_month",
+    "birth_day",
+    "birth_year",
+    "gender",
+    "lrn",
+    "ssc",
+    "four_ps",
+    "special_classes",
+    "review_required",
+]
+PREVIOUS_SCHOOL_COLUMNS = [
+    "scan_id",
+    "school_id",
+    "class_size",
+    "school_year",
+    "math_grade",
+    "english_grade",
+    "science_grade",
+    "filipino_grade",
+    "ap_grade",
+    "review_required",
+]
+CURRENT_SCHOOL_COLUMNS = [
+    "scan_id",
+    "region",
+    "division",
+    "school_id",
+    "school_type",
+    "review_required",
+]
+ANSWER_COLUMNS = [
+    "scan_id",
+    "subject",
+    "question_number",
+    "answer",
+    "confidence",
+    "is_correct",
+    "review_required",
+]
+ASSET_COLUMNS = ["scan_id", "kind", "file_path", "file_url", "width", "height", "bytes"]
+REVIEW_CROP_COLUMNS = ["scan_id", "field", "x", "y", "width", "height", "format", "image"]
+
+# Tables with bucket files (file_path / file_url) behind their rows
+FILE_TABLES = ["omr_scan", "scan_asset"]
+
+# Backend instances by (process, backend); connections and pools are
+# never shared with forked workers
+_storages = {}
+
+
+def _aggregate_review_flag(section):
+    """
+    Returns True if ANY field in the section has review_required=True.
+    """
+    return any(
+        field.get("review_required", False)
+        for field in section.values()
+        if isinstance(field, dict)
+    )
+
+
+def _aggregate_answers_review_flag(answers_json):
+    """
+    Returns True if ANY question across all subjects has review_required=True.
+    """
+    for subject in answers_json.values():
+        for q in subject.get("answers", {}).values():
+            if q.get("review_required", False):
+                return True
+    return False
+
+
+def sheet_rows(file_path: Path, sheet, exam, key):
+    """
+    Rows of one sheet for every table, scored against key.
+
+    sheet: {"student", "previous_school", "current_school", "answers"}
+    section results. Tuples follow the *_COLUMNS lists without scan_id,
+    which the backend prepends once the scan row exists.
+    """
+    # Needs NumPy and the answer layout, both loaded by the time a sheet
+    # is persisted; importing this module stays light
+    from scoring import SUBJECTS, answer_array, max_score, scan_score_row, score
+
+    student_json = sheet["student"]
+    prev_school_json = sheet["previous_school"]
+    curr_school_json = sheet["current_school"]
+    answers_json = sheet["answers"]
+
+    # -----------------------------
+    # Aggregate review flags
+    # -----------------------------
+    student_review = _aggregate_review_flag(student_json)
+    prev_review = _aggregate_review_flag(prev_school_json)
+    curr_review = _aggregate_review_flag(curr_school_json)
+    answers_review = _aggregate_answers_review_flag(answers_json)
+
+    scan_review = (
+        student_review
+        or prev_review
+        or curr_review
+        or answers_review
+    )
+
+    # -----------------------------
+    # Score against the answer key
+    # -----------------------------
+    answers = answer_array(answers_json)
+    correct, totals = score(answers, key)
+
+    answer_rows = []
+    for subject_name, subject in answers_json.items():
+        for question_number, q in subject.get("answers", {}).items():
+            # Blank answers and questions without a key are never correct
+            is_correct = bool(
+                subject_name in SUBJECTS
+                and correct[SUBJECTS.index(subject_name), int(question_number) - 1]
+            )
+
+            answer_rows.append((
+                subject_name,
+                int(question_number),
+                q.get("answer"),
+                q.get("confidence"),
+                is_correct,
+                bool(q.get("review_required", False)),
+            ))
+
+    final_grade = prev_school_json.get("final_grade", {})
+
+    return {
+        "scan": (
+            file_path.name,
+            f"bucket/{file_path.name}",
+            json.dumps(sheet),
+            scan_review,
+        ),
+        "student": (
+            student_json.get("last_name", {}).get("answer"),
+            student_json.get("first_name", {}).get("answer"),
+            student_json.get("middle_initial", {}).get("answer"),
+            student_json.get("birth_month", {}).get("answer"),
+            student_json.get("birth_day", {}).get("answer"),
+            student_json.get("birth_year", {}).get("answer"),
+            student_json.get("gender", {}).get("answer"),
+            student_json.get("lrn", {}).get("answer"),
+            student_json.get("ssc", {}).get("answer"),
+            student_json.get("four_ps", {}).get("answer"),
+            json.dumps(
+                student_json.get("special_classes", {}).get("answer", [])
+            ),
+            student_review,
+        ),
+        "previous_school": (
+            prev_school_json.get("school_id", {}).get("answer"),
+            prev_school_json.get("class_size", {}).get("answer"),
+            prev_school_json.get("school_year", {}).get("answer"),
+            final_grade.get("Math", {}).get("answer"),
+            final_grade.get("English", {}).get("answer"),
+            final_grade.get("Science", {}).get("answer"),
+            final_grade.get("Filipino", {}).get("answer"),
+            final_grade.get("AP", {}).get("answer"),
+            prev_review,
+        ),
+        "current_school": (
+            curr_school_json.get("region", {}).get("answer"),
+            curr_school_json.get("division", {}).get("answer"),
+            curr_school_json.get("school_id", {}).get("answer"),
+            curr_school_json.get("school_type", {}).get("answer"),
+            curr_review,
+        ),
+        "answers": answer_rows,
+        "score": scan_score_row(exam, answers, totals, key),
+        # Dashboard summary counters (db/summary.py)
+        "summary": {
+            "scans": 1,
+            "review_scans": int(scan_review),
+            "student_review_scans": int(student_review),
+            "previous_school_review_scans": int(prev_review),
+            "current_school_review_scans": int(curr_review),
+            "answers_review_scans": int(answers_review),
+            "scored_scans": int(max_score(key) > 0),
+            "max_score_sum": max_score(key),
+            "total_score_sum": int(totals.sum()),
+            **{
+                f"{subject}_score_sum": total
+                for subject, total in zip(SUBJECTS, totals.tolist())
+            },
+        },
+        # Per-field rows (db/fields.py)
+        "fields": field_rows(sheet),
+        # Search index (db/search.py)
+        "search": (
+            student_json.get("last_name", {}).get("answer"),
+            student_json.get("first_name", {}).get("answer"),
+            curr_school_json.get("school_id", {}).get("answer"),
+        ),
+    }
+
+
+class Storage(ABC):
+    """
+    Where scan results go. Paths are bucket-relative (bucket/...) and
+    urls their Config.STATIC_URL address, as computed by persist_scan.
+    """
+
+    @abstractmethod
+    def persist_scans(self, sheets, exam):
+        """
+        Store (file_path, sheet) pairs scored against exam's key in one
+        transaction, returning their new scan ids in order.
+        """
+
+    def persist_scan(self, file_path: Path, sheet, exam):
+        return self.persist_scans([(file_path, sheet)], exam)[0]
+
+    @abstractmethod
+    def update_scan_status(self, scan_id, file_path, file_url, status):
+        """
+        Move a stored scan to status (success / error) at its new path.
+        """
+
+    @abstractmethod
+    def persist_scan_assets(self, rows):
+        """
+        Insert or replace scan_asset rows (ASSET_COLUMNS tuples).
+        """
+
+    @abstractmethod
+    def persist_review_crops(self, rows):
+        """
+        Insert or replace review_crop rows (REVIEW_CROP_COLUMNS tuples).
+        """
+
+    @abstractmethod
+    def file_paths(self):
+        """
+        (table, id, file_path) of every FILE_TABLES row with a file.
+        """
+
+    @abstractmethod
+    def update_file_paths(self, rows):
+        """
+        Point (table, id, file_path, file_url) rows at moved files, in one
+        transaction.
+        """
+
+    def close(self):
+        pass
+
+
+def open_storage(backend=None):
+    """
+    This process's Storage for backend (default Config.STORAGE_BACKEND).
+    """
+    backend = backend or Config.STORAGE_BACKEND
+    key = (os.getpid(), backend)
+
+    if key not in _storages:
+        if backend == "sqlite":
+            from db.sqlite_storage import SqliteStorage
+            _storages[key] = SqliteStorage(Config.DB_PATH)
+        elif backend == "postgres":
+            from db.postgres_storage import PostgresStorage
+            _storages[key] = PostgresStorage(Config.POSTGRES_DSN, Config.POSTGRES_POOL_SIZE)
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {backend!r} (sqlite or postgres)")
+
+    return _storages[key]
@@ -0,0 +1,270 @@
+"""
+Incremental summary counts for dashboards.
+
+scan_summary holds one row per (scope, scope_key): every scan counts
+once in "all", its region, "region/division", school id and ingest day
+(UTC, like omr_scan.created_at). Counters are only ever added to, in
+the transaction that writes the rows they describe:
+
+- persist_scan: scans, review flags, scores
+- update_scan_status: success / error (moving a scan between them)
+- scoring.rescore: score deltas
+
+so a dashboard reads one row instead of counting omr_scan /
+student_answer. Averages are sums over counts (e.g. total_score_sum /
+scored_scans).
+
+rebuild() recomputes everything from the raw tables. It runs on its
+own the first time a database without summaries is written to, and by
+hand after anything that bypasses the above:
+
+    python -m db.summary rebuild      (from omr-server/)
+
+SQLite only: the summaries serve be-omr-demo, which reads omr.db, and
+only the sqlite backend (db/sqlite_storage.py) keeps them. The rebuild
+command refuses to run with any other STORAGE_BACKEND.
+"""
+import sqlite3
+import sys
+import time
+
+from config import Config
+from db.schema import ensure_schema
+
+# Subjects with a score column in scan_score (db/schema.py)
+SUBJECTS = ["math", "english", "science", "filipino", "ap"]
+
+SCORE_SUMS = [f"{subject}_score_sum" for subject in SUBJECTS]
+
+COUNTERS = [
+    "scans",
+    "review_scans",
+    "student_review_scans",
+    "previous_school_review_scans",
+    "current_school_review_scans",
+    "answers_review_scans",
+    "success_scans",
+    "error_scans",
+    "scored_scans",
+    "max_score_sum",
+    "total_score_sum",
+    *SCORE_SUMS,
+]
+
+# scope -> its key, as an SQL expression over rebuild()'s scan columns
+SCOPES = {
+    "all": "''",
+    "region": "region",
+    "division": "region || '/' || division",
+    "school": "school_id",
+    "day": "day",
+}
+
+# Databases whose summaries this process has checked
+_ensured = set()
+
+
+def scope_keys(day, region, division, school_id):
+    """
+    (scope, scope_key) of every summary row one scan counts in.
+    """
+    return [
+        ("all", ""),
+        ("region", region),
+        ("division", f"{region}/{division}"),
+        ("school", school_id),
+        ("day", day),
+    ]
+
+
+def scan_keys(conn, scan_ids):
+    """
+    {scan id: scope_keys()} from the stored scan and current_school rows.
+    """
+    rows = conn.execute(
+        f"""
+        SELECT
+            o.id,
+            date(o.created_at),
+            coalesce(cs.region, ''),
+            coalesce(cs.division, ''),
+            coalesce(cs.school_id, '')
+        FROM omr_scan o
+        LEFT JOIN current_school cs ON cs.scan_id = o.id
+        WHERE o.id IN ({", ".join("?" * len(scan_ids))})
+        """,
+        list(scan_ids),
+    )
+    return {scan_id: scope_keys(*keys) for scan_id, *keys in rows}
+
+
+def add(conn, deltas):
+    """
+    Add counters to summary rows (inside the caller's transaction).
+
+    deltas: {(scope, scope_key): {counter: delta}}, every dict with the
+    same counters.
+    """
+    if not deltas:
+        return
+
+    columns = list(next(iter(deltas.values())))
+    names = ", ".join(columns)
+    placeholders = ", ".join("?" * len(columns))
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in columns)
+
+    conn.executemany(
+        f"""
+        INSERT INTO scan_summary (scope, scope_key, {names})
+        VALUES (?, ?, {placeholders})
+        ON CONFLICT (scope, scope_key) DO UPDATE SET
+            {updates},
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        [
+            (scope, key, *(counts[c] for c in columns))
+            for (scope, key), counts in deltas.items()
+        ],
+    )
+
+
+def add_scan(conn, scan_id, counts):
+    """
+    Count a newly persisted scan: counts {counter: value} added to each
+    of its summary rows.
+    """
+    keys = scan_keys(conn, [scan_id])[scan_id]
+    add(conn, {key: counts for key in keys})
+
+
+def add_scans(conn, scan_ids, columns, deltas):
+    """
+    Add per-scan deltas, (scans, columns) numbers, grouped by summary row.
+    """
+    keys = scan_keys(conn, scan_ids)
+    totals = {}
+
+    for scan_id, row in zip(scan_ids, deltas):
+        for key in keys.get(scan_id, []):
+            sums = totals.setdefault(key, [0] * len(columns))
+            for i, value in enumerate(row):
+                sums[i] += int(value)
+
+    add(conn, {
+        key: dict(zip(columns, sums))
+        for key, sums in totals.items()
+        if any(sums)
+    })
+
+
+def move_status(conn, scan_id, old_status, new_status):
+    """
+    Count a scan's status change (inside the caller's transaction).
+    """
+    counts = {"success_scans": 0, "error_scans": 0}
+
+    if old_status in ("success", "error"):
+        counts[f"{old_status}_scans"] -= 1
+    if new_status in ("success", "error"):
+        counts[f"{new_status}_scans"] += 1
+
+    if any(counts.values()):
+        keys = scan_keys(conn, [scan_id]).get(scan_id, [])
+        add(conn, {key: counts for key in keys})
+
+
+def rebuild(conn):
+    """
+    Recompute scan_summary from the raw tables in one transaction.
+    Returns the number of summary rows.
+    """
+    score_sums = ",\n                ".join(
+        f"coalesce(ss.{subject}_score, 0) AS {subject}_score_sum"
+        for subject in SUBJECTS
+    )
+
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS temp.summary_scan")
+        conn.execute(
+            f"""
+            CREATE TEMP TABLE summary_scan AS
+            SELECT
+                date(o.created_at) AS day,
+                coalesce(cs.region, '') AS region,
+                coalesce(cs.division, '') AS division,
+                coalesce(cs.school_id, '') AS school_id,
+                1 AS scans,
+                o.review_required AS review_scans,
+                coalesce(st.review_required, 0) AS student_review_scans,
+                coalesce(ps.review_required, 0) AS previous_school_review_scans,
+                coalesce(cs.review_required, 0) AS current_school_review_scans,
+                EXISTS (
+                    SELECT 1 FROM student_answer a
+                    WHERE a.scan_id = o.id AND a.review_required
+                ) AS answers_review_scans,
+                o.status = 'success' AS success_scans,
+                o.status = 'error' AS error_scans,
+                coalesce(ss.max_score, 0) > 0 AS scored_scans,
+                coalesce(ss.max_score, 0) AS max_score_sum,
+                coalesce(ss.total_score, 0) AS total_score_sum,
+                {score_sums}
+            FROM omr_scan o
+            LEFT JOIN student st ON st.scan_id = o.id
+            LEFT JOIN previous_school ps ON ps.scan_id = o.id
+            LEFT JOIN current_school cs ON cs.scan_id = o.id
+            LEFT JOIN scan_score ss ON ss.scan_id = o.id
+            """
+        )
+
+        conn.execute("DELETE FROM scan_summary")
+
+        names = ", ".join(COUNTERS)
+        sums = ", ".join(f"sum({c})" for c in COUNTERS)
+
+        for scope, key in SCOPES.items():
+            conn.execute(
+                f"""
+                INSERT INTO scan_summary (scope, scope_key, {names})
+                SELECT '{scope}', {key}, {sums}
+                FROM summary_scan
+                GROUP BY {key}
+                """
+            )
+
+        conn.execute("DROP TABLE temp.summary_scan")
+
+    return conn.execute("SELECT count(*) FROM scan_summary").fetchone()[0]
+
+
+def ensure_summary(conn, db_path):
+    """
+    Build the summaries of a database that has none yet (first write
+    after upgrading), once per process and database.
+    """
+    key = str(db_path)
+    if key in _ensured:
+        return
+
+    if not conn.execute("SELECT 1 FROM scan_summary WHERE scope = 'all'").fetchone():
+        rebuild(conn)
+
+    _ensured.add(key)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print(__doc__)
+        sys.exit(1)
+
+    if Config.STORAGE_BACKEND != "sqlite":
+        raise SystemExit(f"[SUMMARY] STORAGE_BACKEND is {Config.STORAGE_BACKEND!r}: summaries are kept for sqlite only")
+
+    conn = sqlite3.connect(Config.DB_PATH)
+    try:
+        ensure_schema(conn, Config.DB_PATH)
+
+        started = time.perf_counter()
+        rows = rebuild(conn)
+        print(f"[SUMMARY] rebuilt {rows} rows in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
@@ -0,0 +1,392 @@
+"""
+Columnar export of results for analytics.
+
+Streams omr.db into Parquet (or Arrow IPC) files, one row per scan:
+scan, student, current / previous school, scores, and the answer matrix
+as one fixed-width column (scan_score.answers: 200 int8 choice indexes,
+subject-major, -1 blank; null for scans without a scan_score row, see
+scoring.py rescore --backfill). Files are partitioned Hive-style by
+ingest day (UTC) and region:
+
+    <out>/scans/day=2026-03-02/region=NCR/part-0000120001.parquet
+
+which pyarrow.dataset, pandas, DuckDB and Spark read as one table.
+
+Scans are read in chunks of EXPORT_CHUNK ids, so memory stays flat
+whatever the size of the database. Exports are incremental: the last
+exported scan id and the export time are kept in <out>/_watermark.json
+and the next run starts after that id. Each chunk's files are named
+after its first scan id and the watermark moves only once they are
+written, so a re-run after an interruption rewrites the same files
+instead of adding duplicates.
+
+A scan can change after it is exported: its status when the watcher
+files it, its scores when scoring.py re-scores it. Each run therefore
+first drops and re-exports every day partition from the oldest of
+
+- the last Config.EXPORT_REFRESH_DAYS days, and
+- the day of any scan re-scored (scan_score.scored_at) since the
+  last export.
+
+Scan ids follow ingest order, so that is everything from the first
+scan of that day on. --full rewrites everything.
+
+Needs pyarrow (not required by the rest of omr-server). Reads omr.db
+only, so it refuses to run unless STORAGE_BACKEND is sqlite.
+
+Usage (from omr-server/):
+    python export.py [--out DIR] [--format parquet|arrow] [--chunk N] [--full]
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from config import Config
+from db.schema import ensure_schema
+from db.summary import SUBJECTS
+
+EXPORT_CHUNK = 20000  # scans per read
+
+# Hive's name for a null / empty partition value (pyarrow's default)
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+QUESTIONS_PER_SUBJECT = 40  # answers/read_answers.py
+ANSWER_WIDTH = len(SUBJECTS) * QUESTIONS_PER_SUBJECT
+
+# Exported column -> SQL expression, in file order. day and region are
+# the partition keys and live in the path.
+COLUMNS = {
+    "scan_id": "o.id",
+    "created_at": "o.created_at",
+    "file_name": "o.file_name",
+    "status": "o.status",
+    "confidence": "o.confidence",
+    "review_required": "o.review_required",
+    "last_name": "st.last_name",
+    "first_name": "st.first_name",
+    "middle_initial": "st.middle_initial",
+    "birth_month": "st.birth_month",
+    "birth_day": "st.birth_day",
+    "birth_year": "st.birth_year",
+    "ssc": "st.ssc",
+    "four_ps": "st.four_ps",
+    "gender": "st.gender",
+    "lrn": "st.lrn",
+    "special_classes": "st.special_classes",
+    "student_review_required": "st.review_required",
+    "division": "cs.division",
+    "school_id": "cs.school_id",
+    "school_type": "cs.school_type",
+    "current_school_review_required": "cs.review_required",
+    "previous_school_id": "ps.school_id",
+    **{f"previous_{subject}_grade": f"ps.{subject}_grade" for subject in SUBJECTS},
+    "previous_class_size": "ps.class_size",
+    "previous_school_year": "ps.school_year",
+    "previous_school_review_required": "ps.review_required",
+    "exam": "ss.exam",
+    **{f"{subject}_score": f"ss.{subject}_score" for subject in SUBJECTS},
+    "total_score": "ss.total_score",
+    "max_score": "ss.max_score",
+    "answers": "ss.answers",
+}
+
+INT_COLUMNS = {"scan_id", "max_score", "total_score", *(f"{s}_score" for s in SUBJECTS)}
+FLOAT_COLUMNS = {"confidence"}
+BOOL_COLUMNS = {c for c in COLUMNS if c.endswith("review_required")}
+
+
+def load_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise SystemExit("[EXPORT] pyarrow is not installed: pip install pyarrow")
+
+
+def arrow_schema(pa):
+    """
+    Schema of every exported file, fixed so that all parts agree even
+    when a chunk has only nulls in a column.
+    """
+    fields = []
+
+    for name in COLUMNS:
+        metadata = None
+
+        if name == "created_at":
+            type_ = pa.timestamp("s", tz="UTC")
+        elif name == "answers":
+            type_ = pa.list_(pa.int8(), ANSWER_WIDTH)
+            # Layout of the answer matrix, for readers of the files
+            metadata = {
+                "subjects": ",".join(SUBJECTS),
+                "questions_per_subject": str(QUESTIONS_PER_SUBJECT),
+                "choices": "ABCD",
+                "blank": "-1",
+            }
+        elif name in INT_COLUMNS:
+            type_ = pa.int64()
+        elif name in FLOAT_COLUMNS:
+            type_ = pa.float64()
+        elif name in BOOL_COLUMNS:
+            type_ = pa.bool_()
+        else:
+            type_ = pa.string()
+        fields.append(pa.field(name, type_, metadata=metadata))
+
+    return pa.schema(fields)
+
+
+def answer_column(pa, blobs):
+    """
+    Fixed-width answers column from scan_score blobs (None -> null).
+    """
+    missing = [blob is None or len(blob) != ANSWER_WIDTH for blob in blobs]
+    flat = b"".join(
+        bytes(ANSWER_WIDTH) if absent else blob
+        for blob, absent in zip(blobs, missing)
+    )
+    values = pa.py_buffer(flat)
+
+    return pa.FixedSizeListArray.from_arrays(
+        pa.Array.from_buffers(pa.int8(), len(flat), [None, values]),
+        ANSWER_WIDTH,
+        mask=pa.array(missing) if any(missing) else None,
+    )
+
+
+def read_chunk(conn, after, chunk):
+    """
+    Rows of the next chunk of scans after scan id `after`, each
+    (day, region, *COLUMNS values).
+    """
+    columns = ",\n            ".join(COLUMNS.values())
+
+    return conn.execute(
+        f"""
+        SELECT
+            date(o.created_at),
+            cs.region,
+            {columns}
+        FROM omr_scan o
+        LEFT JOIN student st ON st.scan_id = o.id
+        LEFT JOIN current_school cs ON cs.scan_id = o.id
+        LEFT JOIN previous_school ps ON ps.scan_id = o.id
+        LEFT JOIN scan_score ss ON ss.scan_id = o.id
+        WHERE o.id > ?
+        ORDER BY o.id
+        LIMIT ?
+        """,
+        (after, chunk),
+    ).fetchall()
+
+
+def to_table(pa, schema, rows):
+    """
+    Arrow table (schema) from read_chunk() rows without their partition keys.
+    """
+    import pyarrow.compute as pc
+
+    values = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+    arrays = []
+
+    for field, column in zip(schema, values):
+        if field.name == "created_at":
+            text = pa.array(column, pa.string())
+            arrays.append(pc.strptime(text, format="%Y-%m-%d %H:%M:%S", unit="s", error_is_null=True)
+                          .cast(field.type))
+        elif field.name == "answers":
+            arrays.append(answer_column(pa, column))
+        elif pa.types.is_boolean(field.type):
+            arrays.append(pa.array([None if v is None else bool(v) for v in column], field.type))
+        elif pa.types.is_string(field.type):
+            arrays.append(pa.array([None if v is None else str(v) for v in column], field.type))
+        else:
+            arrays.append(pa.array(column, field.type))
+
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def partition_dir(out, day, region):
+    def segment(value):
+        return quote(str(value), safe="") if value else NULL_PARTITION
+
+    return out / "scans" / f"day={segment(day)}" / f"region={segment(region)}"
+
+
+def write_table(pa, table, path, fmt):
+    """
+    Write one part file; it appears under its final name only once complete.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, tmp, compression="zstd")
+
+    os.replace(tmp, path)
+
+
+def read_watermark(out):
+    """
+    (last exported scan id, UTC time of that export as stored by SQLite's
+    CURRENT_TIMESTAMP, or None when unknown).
+    """
+    path = out / "_watermark.json"
+    if not path.exists():
+        return 0, None
+
+    watermark = json.loads(path.read_text())
+    return watermark["last_scan_id"], watermark.get("exported_at")
+
+
+def write_watermark(out, last_scan_id, fmt, exported_at):
+    path = out / "_watermark.json"
+    tmp = out / "._watermark.json.tmp"
+
+    tmp.write_text(json.dumps({
+        "last_scan_id": last_scan_id,
+        "format": fmt,
+        "exported_at": exported_at,
+    }))
+    os.replace(tmp, path)
+
+
+def refresh_from(conn, exported_at, days):
+    """
+    Oldest ingest day ("YYYY-MM-DD") whose partitions must be re-exported:
+    the last `days` days, or earlier when a scan of an earlier day was
+    re-scored after exported_at (every day when that is unknown).
+    """
+    day = conn.execute("SELECT date('now', ?)", (f"-{days} days",)).fetchone()[0]
+
+    if exported_at is None:
+        rescored = conn.execute("SELECT min(date(created_at)) FROM omr_scan").fetchone()[0]
+    else:
+        rescored = conn.execute(
+            """
+            SELECT min(date(o.created_at))
+            FROM scan_score ss
+            JOIN omr_scan o ON o.id = ss.scan_id
+            WHERE ss.scored_at >= ?
+            """,
+            (exported_at,),
+        ).fetchone()[0]
+
+    return min(day, rescored) if rescored else day
+
+
+def drop_days(out, first_day):
+    """
+    Remove the day partitions from first_day on. Returns how many.
+    """
+    scans_dir = out / "scans"
+    if not scans_dir.exists():
+        return 0
+
+    dropped = 0
+    for folder in scans_dir.iterdir():
+        day = folder.name.removeprefix("day=")
+        if folder.is_dir() and day != NULL_PARTITION and day >= first_day:
+            shutil.rmtree(folder)
+            dropped += 1
+
+    return dropped
+
+
+def export(conn, out, fmt="parquet", chunk=EXPORT_CHUNK, full=False):
+    """
+    Export scans after the watermark of out (all of them with full).
+    Returns (scans, files) written.
+    """
+    pa = load_pyarrow()
+    schema = arrow_schema(pa)
+    suffix = "parquet" if fmt == "parquet" else "arrow"
+
+    if full and (out / "scans").exists():
+        shutil.rmtree(out / "scans")
+    out.mkdir(parents=True, exist_ok=True)
+
+    started_at = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+    after, exported_at = (0, None) if full else read_watermark(out)
+
+    if after:
+        first_day = refresh_from(conn, exported_at, Config.EXPORT_REFRESH_DAYS)
+        first_id = conn.execute(
+            "SELECT min(id) FROM omr_scan WHERE created_at >= ?", (first_day,)
+        ).fetchone()[0]
+
+        if first_id is not None and first_id <= after:
+            # Watermark first: a run stopped after the drop redoes it
+            after = first_id - 1
+            write_watermark(out, after, fmt, exported_at)
+            dropped = drop_days(out, first_day)
+            print(f"[EXPORT] re-exporting from {first_day} (scan id {first_id}, {dropped} day partitions)")
+
+    total = conn.execute("SELECT count(*) FROM omr_scan WHERE id > ?", (after,)).fetchone()[0]
+    print(f"[EXPORT] {total} scans after scan id {after} -> {out}")
+
+    started = time.perf_counter()
+    scans = files = 0
+
+    while True:
+        rows = read_chunk(conn, after, chunk)
+        if not rows:
+            break
+
+        first, last = rows[0][2], rows[-1][2]
+        partitions = {}
+        for row in rows:
+            partitions.setdefault((row[0], row[1]), []).append(row[2:])
+
+        for (day, region), part in partitions.items():
+            path = partition_dir(out, day, region) / f"part-{first:010d}.{suffix}"
+            write_table(pa, to_table(pa, schema, part), path, fmt)
+            files += 1
+
+        write_watermark(out, last, fmt, exported_at)
+        after = last
+        scans += len(rows)
+
+        elapsed = time.perf_counter() - started
+        print(f"[EXPORT] {scans}/{total} scans, {files} files ({scans / elapsed:.0f} scans/s)")
+
+    # Re-scores from now on are caught by the next run
+    write_watermark(out, after, fmt, started_at)
+
+    return scans, files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export results as Parquet / Arrow IPC.")
+    parser.add_argument("--out", type=Path, default=Config.EXPORT_DIR)
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--chunk", type=int, default=EXPORT_CHUNK)
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and rewrite the export")
+    args = parser.parse_args()
+
+    if Config.STORAGE_BACKEND != "sqlite":
+        raise SystemExit(f"[EXPORT] STORAGE_BACKEND is {Config.STORAGE_BACKEND!r}: the export reads omr.db, sqlite only")
+
+    conn = sqlite3.connect(Config.DB_PATH)
+    try:
+        ensure_schema(conn, Config.DB_PATH)
+
+        started = time.perf_counter()
+        scans, files = export(conn, args.out, args.format, args.chunk, args.full)
+        print(f"[EXPORT] done: {scans} scans, {files} files in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Ingest intake with priority lanes.
+
+Detected files are submitted to a named lane. take() always hands out
+the oldest file of the highest-priority lane that is under its
+concurrency limit, so a sheet in the priority lane is picked up next
+instead of waiting behind a bulk drop. A lane's limit counts its files
+anywhere in the pipeline (taken but not yet complete()d); keeping the
+bulk limit below the pipeline's capacity leaves room for priority work.
+A taker can also be restricted to some lanes (take(lanes=...)), e.g. a
+thread kept free for priority files.
+
+Each lane tracks queue depth, in-flight count, outcomes and recent wait
+(queued -> taken) and latency (queued -> completed) times.
+"""
+import threading
+import time
+from collections import deque
+
+# Recent samples kept per lane for the latency metrics
+LATENCY_WINDOW = 200
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+class Lane:
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+
+        self.pending = deque()
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+
+        self.waits = deque(maxlen=LATENCY_WINDOW)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def metrics(self):
+        return {
+            "depth": len(self.pending),
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "wait_p50_ms": round(percentile(self.waits, 0.50) * 1000, 1),
+            "wait_p95_ms": round(percentile(self.waits, 0.95) * 1000, 1),
+            "latency_p50_ms": round(percentile(self.latencies, 0.50) * 1000, 1),
+            "latency_p95_ms": round(percentile(self.latencies, 0.95) * 1000, 1),
+        }
+
+
+class Ticket:
+    """
+    One file on its way through the pipeline.
+    """
+
+    def __init__(self, path, lane: Lane, rank: int, queued_at: float):
+        self.path = path
+        self.lane = lane
+        self.rank = rank  # lane position, 0 = highest priority
+        self.queued_at = queued_at
+
+
+class IngestQueue:
+    """
+    lanes: Lane objects, highest priority first.
+    """
+
+    def __init__(self, lanes):
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.order = list(lanes)
+
+        self._cond = threading.Condition()
+        self._stopping = False
+
+    def submit(self, path, lane_name: str):
+        with self._cond:
+            self.lanes[lane_name].pending.append((path, time.monotonic()))
+            # Takers may be restricted to some lanes: wake them all
+            self._cond.notify_all()
+
+    def take(self, lanes=None):
+        """
+        Block until a file may start; None once stop() was called.
+
+        lanes: names of the lanes to take from (default: all).
+        """
+        with self._cond:
+            while not self._stopping:
+                for rank, lane in enumerate(self.order):
+                    if lanes is not None and lane.name not in lanes:
+                        continue
+                    if lane.pending and lane.in_flight < lane.max_concurrency:
+                        path, queued_at = lane.pending.popleft()
+                        lane.in_flight += 1
+                        lane.waits.append(time.monotonic() - queued_at)
+                        return Ticket(path, lane, rank, queued_at)
+
+                self._cond.wait()
+
+            return None
+
+    def complete(self, ticket: Ticket, ok: bool):
+        """
+        Record a file's outcome and free its lane slot.
+        """
+        with self._cond:
+            lane = ticket.lane
+            lane.in_flight -= 1
+            lane.processed += 1
+            lane.failed += not ok
+            lane.latencies.append(time.monotonic() - ticket.queued_at)
+
+            # A slot freed up: a waiting lane may now be eligible
+            self._cond.notify_all()
+
+    def stop(self):
+        """
+        Stop handing out queued files; waiting take() calls return None.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def metrics(self):
+        with self._cond:
+            return {name: lane.metrics() for name, lane in self.lanes.items()}
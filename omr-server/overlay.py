@@ -0,0 +1,222 @@
+"""
+Debug overlays of read sheets.
+
+Sheets named with OVERLAY_PREFIX, and a random OVERLAY_SAMPLE_RATE share
+of the rest, get an overlay: every bubble of every field drawn on the
+half-scale review image already in memory, filled in proportion to its
+score, the decided options in green and each field boxed green, or red
+when flagged for review.
+
+Drawing and encoding run on a background thread behind a small queue.
+submit() never blocks: when the writer falls behind the overlay is
+dropped, never the sheet.
+
+Overlays are sharded like processed scans (bucket_layout.py), by the
+day they are drawn: bucket/debug/2026-10-19/3f/scan_0001.overlay.jpg.
+Day folders older than Config.OVERLAY_KEEP_DAYS, and flat overlays left
+by older versions, are deleted when the writer starts and at the first
+overlay of each day.
+"""
+import queue
+import random
+import shutil
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import cv2
+from assets import FIELD_BOXES, REVIEW_SCALE, field_path, section_readers
+from bucket_layout import shard_dir
+from config import Config
+
+QUEUE_SIZE = 4  # overlays waiting to be drawn before new ones are dropped
+OVERLAY_SUFFIX = ".overlay.jpg"
+
+# BGR
+SELECTED = (0, 160, 0)
+MARKED = (0, 140, 255)
+EMPTY = (170, 170, 170)
+REVIEW = (0, 0, 255)
+OK = (0, 160, 0)
+
+
+def field_json(sections, path):
+    """
+    A field's reader output by path (see assets.field_path), or None.
+    """
+    section, name = path.split(".", 1)
+    node = sections.get(section, {})
+
+    if section == "answers":
+        subject, question = name.split(".")
+        return node.get(subject, {}).get("answers", {}).get(question)
+
+    for part in name.split("."):
+        node = node.get(part) if isinstance(node, dict) else None
+
+    return node
+
+
+def json_columns(data):
+    """
+    Per-column dicts ("scores", usually "selected") of a field's output.
+    """
+    details = data.get("details", {})
+
+    if "digits" in details:
+        return details["digits"]
+    if "tens" in details:
+        return [details["tens"], details["ones"]]
+    return [details]
+
+
+def draw_overlay(page, sections):
+    """
+    Draw bubbles, scores and decisions of one sheet on page (the review
+    image, drawn on in place).
+    """
+    for section, reader in section_readers().items():
+        for field in reader.fields:
+            path = field_path(section, field.name)
+            data = field_json(sections, path)
+            if data is None:
+                continue
+
+            columns = json_columns(data)
+            if len(columns) != len(field.columns):
+                columns = [{}] * len(field.columns)
+
+            radius = max(max(field.roi_size) // (2 * REVIEW_SCALE), 2)
+
+            for options, col in zip(field.columns, columns):
+                scores = col.get("scores", {})
+                selected = col["selected"] if "selected" in col else data.get("answer")
+
+                for label, (x, y) in options:
+                    center = (x // REVIEW_SCALE, y // REVIEW_SCALE)
+                    picked = label == selected or (
+                        isinstance(selected, list) and label in selected
+                    )
+
+                    cv2.circle(page, center, radius, SELECTED if picked else EMPTY, 1)
+
+                    fill = round(radius * min(max(scores.get(label) or 0.0, 0.0), 1.0))
+                    if fill:
+                        cv2.circle(page, center, fill, SELECTED if picked else MARKED, -1)
+
+            left, top, right, bottom = (v // REVIEW_SCALE for v in FIELD_BOXES[path])
+            color = REVIEW if data.get("review_required") else OK
+            cv2.rectangle(page, (left, top), (right, bottom), color, 1)
+
+            # Answer rows sit too close for labels; their bubbles say it all
+            if section != "answers":
+                cv2.putText(
+                    page,
+                    f"{data.get('answer')} ({data.get('confidence')})",
+                    (left, max(top - 4, 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.4,
+                    color,
+                    1,
+                    cv2.LINE_AA
+                )
+
+    return page
+
+
+class OverlayWriter:
+    def __init__(self, out_dir: Path, queue_size: int = QUEUE_SIZE):
+        self.out_dir = out_dir
+        self.out_dir.mkdir(exist_ok=True)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.day = None  # day of the last prune
+
+        self._thread = threading.Thread(target=self._run, name="overlay", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """
+        Finish the queued overlays.
+        """
+        self.queue.put(None)
+        self._thread.join()
+
+    def wanted(self, file_path: Path) -> bool:
+        return (
+            file_path.name.startswith(Config.OVERLAY_PREFIX)
+            or random.random() < Config.OVERLAY_SAMPLE_RATE
+        )
+
+    def submit(self, file_path: Path, page, sections):
+        """
+        Queue an overlay without waiting. page is a review image nobody
+        else uses any more; it is drawn on in place.
+        """
+        try:
+            self.queue.put_nowait((file_path, page, sections))
+        except queue.Full:
+            self.dropped += 1
+            print(f"[WARN] {file_path.name}: overlay dropped, writer busy")
+
+    def prune(self):
+        """
+        Delete the day folders older than OVERLAY_KEEP_DAYS, and flat
+        overlays modified before then.
+        """
+        self.day = date.today().isoformat()
+        if Config.OVERLAY_KEEP_DAYS <= 0:
+            return
+
+        cutoff = date.today() - timedelta(days=Config.OVERLAY_KEEP_DAYS)
+        cutoff_time = time.mktime(cutoff.timetuple())
+        removed = 0
+
+        for entry in self.out_dir.iterdir():
+            if entry.is_dir() and len(entry.name) == 10 and entry.name < cutoff.isoformat():
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+            elif entry.name.endswith(OVERLAY_SUFFIX) and entry.stat().st_mtime < cutoff_time:
+                entry.unlink(missing_ok=True)
+                removed += 1
+
+        if removed:
+            print(f"[OVERLAY] removed {removed} day folders / files older than {cutoff}")
+
+    def _run(self):
+        try:
+            self.prune()
+        except Exception as e:
+            print(f"[WARN] old overlays not pruned: {e}")
+
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            file_path, page, sections = item
+
+            try:
+                if date.today().isoformat() != self.day:
+                    self.prune()
+
+                target = self.out_dir / shard_dir(file_path, self.day) / f"{file_path.stem}{OVERLAY_SUFFIX}"
+                target.parent.mkdir(parents=True, exist_ok=True)
+
+                draw_overlay(page, sections)
+                cv2.imwrite(str(target), page, [cv2.IMWRITE_JPEG_QUALITY, Config.ASSET_QUALITY])
+                self.written += 1
+            except Exception as e:
+                print(f"[WARN] {file_path.name}: overlay not written: {e}")
+
+    def metrics(self):
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
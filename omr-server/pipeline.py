@@ -0,0 +1,364 @@
+"""
+Bounded ingest pipeline: detect -> decode -> read -> persist.
+
+    intake (IngestQueue lanes, file paths only)
+      -> decode threads   (wait for the file, cv2.imread; some may be
+                           reserved for a lane, e.g. priority)
+      -> read queue       (bounded, priority-ordered)
+      -> read threads     (section readers)
+      -> persist queue    (bounded, priority-ordered)
+      -> persist thread   (SQLite writes + moving the file)
+
+Every hand-off blocks when the next queue is full, so a slow stage
+throttles the ones before it instead of letting work pile up in memory.
+On top of that a decode thread only takes a file when fewer than
+max_decoded images are alive (decoded but not yet read) and their
+pixels fit in memory_budget bytes; otherwise intake pauses and files
+stay on disk.
+
+Per stage the pipeline tracks busy time, idle time (waiting for input)
+and blocked time (waiting on the next queue or the memory budget),
+including waits still in progress. The busiest stage relative to its
+thread count is reported as the bottleneck, none while nothing is busy.
+"""
+import itertools
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Sorts after every lane so queued work drains before threads exit
+STOP_RANK = 1_000_000
+
+
+class StageStats:
+    def __init__(self, name: str, threads: int):
+        self.name = name
+        self.threads = threads
+        self.processed = 0
+        self.failed = 0
+
+        # Seconds since the last metrics() call
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+
+        # Intervals in progress: thread id -> (kind, counted from)
+        self._open = {}
+
+        self._lock = threading.Lock()
+
+    def add(self, processed=0, failed=0):
+        with self._lock:
+            self.processed += processed
+            self.failed += failed
+
+    @contextmanager
+    def timing(self, kind: str):
+        """
+        Count the time spent in the block as kind: busy, idle or blocked.
+        """
+        thread = threading.get_ident()
+        with self._lock:
+            self._open[thread] = (kind, time.monotonic())
+        try:
+            yield
+        finally:
+            with self._lock:
+                kind, start = self._open.pop(thread)
+                setattr(self, kind, getattr(self, kind) + time.monotonic() - start)
+
+    def snapshot(self, window: float):
+        """
+        Metrics over the last window seconds; resets the time counters.
+        """
+        with self._lock:
+            # A thread waiting through the whole window counts too: credit
+            # its interval so far and count the rest in the next window
+            now = time.monotonic()
+            for thread, (kind, start) in self._open.items():
+                setattr(self, kind, getattr(self, kind) + now - start)
+                self._open[thread] = (kind, now)
+
+            capacity = max(window * self.threads, 1e-9)
+            metrics = {
+                "threads": self.threads,
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy_pct": round(100 * self.busy / capacity, 1),
+                "idle_pct": round(100 * self.idle / capacity, 1),
+                "blocked_pct": round(100 * self.blocked / capacity, 1),
+            }
+            self.busy = self.idle = self.blocked = 0.0
+
+        return metrics
+
+
+class Pipeline:
+    """
+    Stage callbacks (all run on pipeline threads):
+        decode(ticket) -> image
+        read(ticket, image) -> result (must not keep the image alive)
+        persist(ticket, result) -> bool, handles its own errors
+        fail(ticket, error): a decode or read error, file not persisted
+    """
+
+    def __init__(
+        self,
+        intake,
+        decode,
+        read,
+        persist,
+        fail,
+        decode_threads: int,
+        read_threads: int,
+        queue_size: int,
+        max_decoded: int,
+        memory_budget: int,
+        reserved_decode=None
+    ):
+        """
+        reserved_decode: {lane name: threads} decode threads that only
+        take that lane's files, on top of the decode_threads shared by
+        all lanes. A bulk file waiting to stabilize or decoding on a
+        shared thread then never delays a priority one.
+        """
+        self.intake = intake
+        self.decode = decode
+        self.read = read
+        self.persist = persist
+        self.fail = fail
+
+        self.max_decoded = max_decoded
+        self.memory_budget = memory_budget
+
+        self.read_queue = queue.PriorityQueue(maxsize=queue_size)
+        self.persist_queue = queue.PriorityQueue(maxsize=queue_size)
+        self._seq = itertools.count()
+
+        # Decoded images alive and their bytes, guarded by _memory
+        self._memory = threading.Condition()
+        self.decoded = 0
+        self.decoded_bytes = 0
+        self._estimate = None  # size of the last decoded image
+
+        reserved_decode = reserved_decode or {}
+
+        self.stats = {
+            "decode": StageStats("decode", decode_threads),
+            **{
+                f"decode[{lane}]": StageStats(f"decode[{lane}]", threads)
+                for lane, threads in reserved_decode.items()
+            },
+            "read": StageStats("read", read_threads),
+            "persist": StageStats("persist", 1),
+        }
+        self._last_metrics = time.monotonic()
+
+        self._decoders = [
+            threading.Thread(
+                target=self._decode_loop,
+                args=("decode", None),
+                name=f"decode-{i}",
+                daemon=True,
+            )
+            for i in range(decode_threads)
+        ] + [
+            threading.Thread(
+                target=self._decode_loop,
+                args=(f"decode[{lane}]", {lane}),
+                name=f"decode-{lane}-{i}",
+                daemon=True,
+            )
+            for lane, threads in reserved_decode.items()
+            for i in range(threads)
+        ]
+        self._readers = [
+            threading.Thread(target=self._read_loop, name=f"read-{i}", daemon=True)
+            for i in range(read_threads)
+        ]
+        self._persister = threading.Thread(
+            target=self._persist_loop, name="persist", daemon=True
+        )
+
+    # -----------------
+    # LIFECYCLE
+    # -----------------
+
+    def start(self):
+        for thread in self._decoders + self._readers + [self._persister]:
+            thread.start()
+
+    def stop(self):
+        """
+        Stop taking files from intake, finish everything already decoded.
+        """
+        self.intake.stop()
+        for thread in self._decoders:
+            thread.join()
+
+        for _ in self._readers:
+            self.read_queue.put((STOP_RANK, next(self._seq), None, None))
+        for thread in self._readers:
+            thread.join()
+
+        self.persist_queue.put((STOP_RANK, next(self._seq), None, None))
+        self._persister.join()
+
+    # -----------------
+    # MEMORY BUDGET
+    # -----------------
+
+    def _reserve(self, reserved_lane=False):
+        """
+        Wait for room for one more decoded image; returns bytes reserved.
+        """
+        with self._memory:
+            # Until one image was decoded its size is unknown: one at a
+            # time, except on a reserved-lane thread, which would otherwise
+            # wait out the first (bulk) decode
+            while self.decoded >= self.max_decoded or (
+                self.decoded > 0 and (
+                    (self._estimate is None and not reserved_lane)
+                    or (
+                        self._estimate is not None
+                        and self.decoded_bytes + self._estimate > self.memory_budget
+                    )
+                )
+            ):
+                self._memory.wait()
+
+            reserved = self._estimate or 0
+            self.decoded += 1
+            self.decoded_bytes += reserved
+            return reserved
+
+    def _settle(self, reserved: int, actual: int):
+        with self._memory:
+            self.decoded_bytes += actual - reserved
+            self._estimate = actual
+        return actual
+
+    def _release(self, nbytes: int):
+        with self._memory:
+            self.decoded -= 1
+            self.decoded_bytes -= nbytes
+            self._memory.notify_all()
+
+    # -----------------
+    # STAGES
+    # -----------------
+
+    def _failed(self, stage: str, ticket, error: Exception):
+        self.stats[stage].add(failed=1)
+        try:
+            self.fail(ticket, error)
+        finally:
+            self.intake.complete(ticket, ok=False)
+
+    def _decode_loop(self, stage: str, lanes):
+        stats = self.stats[stage]
+
+        while True:
+            with stats.timing("idle"):
+                ticket = self.intake.take(lanes)
+
+            if ticket is None:
+                return
+
+            with stats.timing("blocked"):
+                reserved = self._reserve(reserved_lane=lanes is not None)
+
+            try:
+                with stats.timing("busy"):
+                    image = self.decode(ticket)
+            except Exception as e:
+                self._release(reserved)
+                self._failed(stage, ticket, e)
+                continue
+            stats.add(processed=1)
+
+            nbytes = self._settle(reserved, image.nbytes)
+
+            with stats.timing("blocked"):
+                self.read_queue.put((ticket.rank, next(self._seq), ticket, (image, nbytes)))
+
+    def _read_loop(self):
+        stats = self.stats["read"]
+
+        while True:
+            with stats.timing("idle"):
+                _, _, ticket, payload = self.read_queue.get()
+
+            if ticket is None:
+                return
+
+            image, nbytes = payload
+            payload = None
+
+            try:
+                with stats.timing("busy"):
+                    result = self.read(ticket, image)
+            except Exception as e:
+                self._failed("read", ticket, e)
+                continue
+            finally:
+                image = None
+                self._release(nbytes)
+            stats.add(processed=1)
+
+            with stats.timing("blocked"):
+                self.persist_queue.put((ticket.rank, next(self._seq), ticket, result))
+
+    def _persist_loop(self):
+        stats = self.stats["persist"]
+
+        while True:
+            with stats.timing("idle"):
+                _, _, ticket, result = self.persist_queue.get()
+
+            if ticket is None:
+                return
+
+            with stats.timing("busy"):
+                try:
+                    ok = self.persist(ticket, result)
+                except Exception as e:
+                    print(f"[ERROR] {ticket.path}: {e}")
+                    ok = False
+            stats.add(processed=1, failed=not ok)
+
+            self.intake.complete(ticket, ok=ok)
+
+    # -----------------
+    # METRICS
+    # -----------------
+
+    def metrics(self):
+        now = time.monotonic()
+        window = now - self._last_metrics
+        self._last_metrics = now
+
+        stages = {name: stats.snapshot(window) for name, stats in self.stats.items()}
+        bottleneck = max(stages, key=lambda name: stages[name]["busy_pct"])
+        if stages[bottleneck]["busy_pct"] == 0:
+            bottleneck = None
+
+        with self._memory:
+            memory = {
+                "decoded": self.decoded,
+                "max_decoded": self.max_decoded,
+                "decoded_mb": round(self.decoded_bytes / 2**20, 1),
+                "budget_mb": round(self.memory_budget / 2**20, 1),
+            }
+
+        return {
+            "lanes": self.intake.metrics(),
+            "queues": {
+                "read": self.read_queue.qsize(),
+                "persist": self.persist_queue.qsize(),
+            },
+            "stages": stages,
+            "memory": memory,
+            "bottleneck": bottleneck,
+        }
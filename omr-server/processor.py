@@ -1,20 +1,93 @@
+import importlib
+import os
 import time
 from pathlib import Path
-from student.read_student_info import read_student_info
-from school.previous.prev_read_info import read_previous_school_info
-from school.current.curr_read_info import read_current_school_info
-from answers.read_answers import detect_answers
-from db.persist_scan import persist_scan
-import cv2
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
 
-def wait_until_stable(file_path: Path, timeout: int = 10):
+# Modules that build the compiled grids at import. Imported on first use
+# (or up front by worker processes, see workers.py) so that importing
+# processor itself stays cheap.
+READER_MODULES = [
+    "student.read_student_info",
+    "school.previous.prev_read_info",
+    "school.current.curr_read_info",
+    "answers.read_answers",
+]
+
+
+def load_readers():
+    """
+    Import the section readers up front instead of on the first sheet.
+    """
+    for name in READER_MODULES:
+        importlib.import_module(name)
+
+
+# Section readers for PARALLEL_SECTIONS, created on first use
+_section_pool = None
+
+
+def read_sections(img, parallel: bool = Config.PARALLEL_SECTIONS):
+    """
+    Run the four section readers over one shared grayscale page.
+
+    The page is converted once and marked read-only, and its
+    illumination map is shared by the readers that use it. In parallel mode
+    each reader runs on its own thread: their time is spent in OpenCV /
+    NumPy calls that release the GIL, so a single sheet finishes in
+    about the time of its slowest section.
+    """
+    global _section_pool
+
+    import cv2
+    from reader.illumination import Illumination
+    from student.read_student_info import read_student_info_gray
+    from school.previous.prev_read_info import read_previous_school_info_gray
+    from school.current.curr_read_info import read_current_school_info_gray
+    from answers.read_answers import detect_answers_gray
+
+    readers = {
+        "student": read_student_info_gray,
+        "previous_school": read_previous_school_info_gray,
+        "current_school": read_current_school_info_gray,
+        "answers": detect_answers_gray,
+    }
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray.flags.writeable = False
+    illumination = Illumination(gray)
+
+    if not parallel:
+        return {name: read(gray, illumination) for name, read in readers.items()}
+
+    if _section_pool is None:
+        _section_pool = ThreadPoolExecutor(
+            max_workers=len(readers),
+            thread_name_prefix="section"
+        )
+
+    futures = {
+        name: _section_pool.submit(read, gray, illumination)
+        for name, read in readers.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+def wait_until_stable(file_path: Path, timeout: int = 10, interval: float = 0.5):
     """
     Wait until file size stops changing.
     Prevents processing partially-written files.
+
+    A file untouched for a whole interval already counts as stable, so
+    files that sat in a queue are not polled again.
     """
     start_time = time.time()
     last_size = -1
 
+    if start_time - file_path.stat().st_mtime >= interval:
+        return
+
     while True:
         current_size = file_path.stat().st_size
 
@@ -25,42 +98,157 @@ def wait_until_stable(file_path: Path, timeout: int = 10):
             raise TimeoutError(f"File {file_path} did not stabilize.")
 
         last_size = current_size
-        time.sleep(0.5)
+        time.sleep(interval)
 
-def extract_test_data(file_path: Path):
+def decode_image(file_path: Path, data=None):
     """
-    Placeholder for OMR extraction logic.
-    Replace with real processing later.
+    Load a scan as a BGR image, from data (the file's bytes, e.g. a
+    memory map of it) when given.
     """
-    print(f"[PROCESSING] {file_path}")
+    import cv2
+
+    if data is None:
+        img = cv2.imread(str(file_path))
+    else:
+        import numpy as np
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
 
-    # Load image using OpenCV
-    img = cv2.imread(str(file_path))
     if img is None:
         raise ValueError(f"Failed to load image: {file_path}")
 
-    student_info = read_student_info(img)
-    prev_school = read_previous_school_info(img)
-    curr_school = read_current_school_info(img)
-    answers = detect_answers(img)
+    return img
+
+
+def load_sheet(file_path: Path, mapped: bool = Config.MMAP_DECODE):
+    """
+    Decode a scan after the fast-path checks (see classifier.py).
+
+    Raises SheetRejected for blank pages, non-forms and wrong sizes;
+    size is checked from the PNG header before decoding.
+
+    mapped: read the file once, through a read-only memory map shared
+    by the header check and the decoder.
+    """
+    if not mapped:
+        from classifier import png_size
+        return check_decoded(file_path, png_size(file_path))
+
+    import mmap
+
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Failed to load image: {file_path}")
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            from classifier import png_header_size
+            return check_decoded(file_path, png_header_size(data[:24]), data)
+
+
+def check_decoded(file_path: Path, size, data=None):
+    """
+    Size check (size from the PNG header), decode and classify.
+    """
+    from classifier import WRONG_SIZE, SheetRejected, check_sheet, size_reason
+
+    if size is not None and size_reason(*size):
+        raise SheetRejected(WRONG_SIZE, {"width": size[0], "height": size[1]})
+
+    img = decode_image(file_path, data)
+    check_sheet(img)
+
+    return img
+
+
+def persist_sections(file_path: Path, sections):
+    """
+    Store one sheet's section results, returning the new scan id.
+    """
+    from db.persist_scan import persist_scan
 
     # Persist to database (scan + student)
-    scan_id = persist_scan(
+    return persist_scan(
         file_path=file_path,
-        student_json=student_info,
-        prev_school_json=prev_school,
-        curr_school_json=curr_school,
-        answers_json=answers,
+        student_json=sections["student"],
+        prev_school_json=sections["previous_school"],
+        curr_school_json=sections["current_school"],
+        answers_json=sections["answers"],
     )
 
+
+def render_review(img, sections):
+    """
+    Review derivatives of a read sheet (assets.py), encoded while the
+    decoded image is still alive: (review image, assets, review crops),
+    (None, {}, []) with ASSETS_ENABLED off.
+    """
+    if not Config.ASSETS_ENABLED:
+        return None, {}, []
+
+    from assets import render_assets, render_review_crops, review_image
+
+    review = review_image(img)
+    return review, render_assets(review), render_review_crops(review, sections)
+
+
+def save_assets(scan_id, file_path: Path, relative_dir: str, assets, review_crops):
+    """
+    Write review derivatives next to the stored scan (relative_dir: its
+    bucket-relative folder) and store the flagged-field crops. A failure
+    here only costs the thumbnails, never the scan itself.
+    """
+    if not assets and not review_crops:
+        return
+
+    from assets import write_assets
+    from db.persist_scan import persist_review_crops, persist_scan_assets
+
+    try:
+        written = write_assets(file_path, assets, relative_dir)
+        persist_scan_assets(scan_id, written)
+        persist_review_crops(scan_id, review_crops, Config.ASSET_FORMAT)
+    except Exception as e:
+        print(f"[WARN] {file_path.name}: review assets not saved: {e}")
+
+
+def extract_test_data(file_path: Path, parallel: bool = Config.PARALLEL_SECTIONS):
+    """
+    Decode, read and persist one sheet in the calling thread, with its
+    review assets. The scan stays where it is (bucket/<name>, as
+    persist_scan stores it).
+    """
+    print(f"[PROCESSING] {file_path}")
+
+    img = load_sheet(file_path)
+    sections = read_sections(img, parallel=parallel)
+    _, assets, review_crops = render_review(img, sections)
+
+    scan_id = persist_sections(file_path, sections)
+    save_assets(scan_id, file_path, "bucket", assets, review_crops)
+
     print(f"[SUCCESS] {file_path.name}")
     return scan_id
 
 
-def process_existing_pngs(directory: Path):
+def process_one(file_path: Path):
+    """
+    Wait for one file and process it, returning an error message on failure.
+    """
+    try:
+        print(f"[MANUAL TRIGGER] {file_path.name}")
+        wait_until_stable(file_path)
+        extract_test_data(file_path)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+def process_existing_pngs(directory: Path, workers: int = Config.WORKERS):
     """
     For testing: manually scan a directory and process all existing PNG files.
     This simulates new file triggers without using watchdog events.
+
+    With workers > 1 the files are spread over a pool of preloaded
+    worker processes (see workers.py).
     """
     if not directory.exists():
         raise FileNotFoundError(f"{directory} does not exist")
@@ -71,10 +259,14 @@ def process_existing_pngs(directory: Path):
         print("[INFO] No PNG files found.")
         return
 
-    for file_path in png_files:
-        try:
-            print(f"[MANUAL TRIGGER] {file_path.name}")
-            wait_until_stable(file_path)
-            extract_test_data(file_path)
-        except Exception as e:
-            print(f"[ERROR] {file_path.name}: {e}")
\ No newline at end of file
+    if workers > 1:
+        from workers import start_pool
+
+        with start_pool(workers) as pool:
+            errors = pool.map(process_one, png_files, chunksize=1)
+    else:
+        errors = map(process_one, png_files)
+
+    for file_path, error in zip(png_files, errors):
+        if error is not None:
+            print(f"[ERROR] {file_path.name}: {error}")
\ No newline at end of file
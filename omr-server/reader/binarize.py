@@ -0,0 +1,65 @@
+import cv2
+
+# =========================
+# PAGE-LEVEL BINARIZERS
+# =========================
+# Each takes a grayscale page and returns a 0/255 map where
+# dark (pencil) pixels are 255.
+
+
+def otsu_page(gray):
+    """
+    Blur + global OTSU. Separates graphite from the light orange print.
+    """
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+    _, thresh = cv2.threshold(
+        gray,
+        0,
+        255,
+        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
+    )
+    return thresh
+
+
+def equalized_adaptive_page(gray):
+    """
+    Histogram equalization + Gaussian adaptive threshold (31px blocks).
+    """
+    gray = cv2.equalizeHist(gray)
+
+    return cv2.adaptiveThreshold(
+        gray,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY_INV,
+        31,
+        5
+    )
+
+
+# =========================
+# PER-ROI BINARIZERS
+# =========================
+# Each takes a single grayscale ROI and thresholds it in isolation.
+
+
+def otsu_roi(roi):
+    _, thresh = cv2.threshold(
+        roi,
+        0,
+        255,
+        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
+    )
+    return thresh
+
+
+def adaptive_roi(roi):
+    return cv2.adaptiveThreshold(
+        roi,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY_INV,
+        21,
+        5
+    )
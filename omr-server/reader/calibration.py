@@ -0,0 +1,184 @@
+"""
+Online threshold calibration for the section readers.
+
+Fixed fill thresholds push whole batches into review when the pencil is
+lighter or the scanner darker than the sheets they were tuned on. With
+ADAPTIVE_THRESHOLDS on, every threshold group of a SectionReader (fields
+of one kind, see Field.group) keeps a histogram of its bubble scores
+over the last CALIBRATION_WINDOW sheets. Its threshold follows the
+valley between the empty and the filled scores:
+
+- the best two-class (OTSU) split of the window histogram; when the
+  classes are separated by empty bins, the middle of that gap
+- only once CALIBRATION_MIN_SHEETS sheets were seen and both classes
+  hold at least MIN_CLASS_SHARE of the bubbles
+- clamped to the declared threshold +- CALIBRATION_MAX_SHIFT
+
+Every move of AUDIT_STEP or more is printed and, when
+CALIBRATION_AUDIT_PATH is set, appended to it as a JSON line.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from config import Config
+from reader.confidence import confidence_table
+
+BINS = 100              # score histogram resolution (scores are 0..1)
+MIN_CLASS_SHARE = 0.01  # both empty and filled bubbles must be this common
+PLATEAU = 0.999         # splits this close to the best count as equal
+AUDIT_STEP = 0.01       # threshold moves smaller than this are not logged
+
+BIN_CENTERS = (np.arange(BINS) + 0.5) / BINS
+
+
+def valley_threshold(hist):
+    """
+    (threshold, empty mean, filled mean) of the best two-class split of
+    a score histogram, None without two classes.
+    """
+    total = hist.sum()
+    w0 = np.cumsum(hist)
+    w1 = total - w0
+    m0 = np.cumsum(hist * BIN_CENTERS)
+
+    valid = (w0 >= MIN_CLASS_SHARE * total) & (w1 >= MIN_CLASS_SHARE * total)
+    if total == 0 or not valid.any():
+        return None
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu0 = m0 / w0
+        mu1 = (m0[-1] - m0) / w1
+        between = np.where(valid, w0 * w1 * (mu0 - mu1) ** 2, 0.0)
+
+    # Every split inside a run of empty bins is equally good: take the middle
+    best = between.max() * PLATEAU
+    first = last = int(np.argmax(between >= best))
+    while last + 1 < BINS and between[last + 1] >= best:
+        last += 1
+
+    threshold = ((first + last) / 2 + 1) / BINS
+    return threshold, float(mu0[first]), float(mu1[first])
+
+
+class SectionCalibration:
+    """
+    Sliding-window thresholds for the groups of one SectionReader.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        section,
+        window: int,
+        min_sheets: int,
+        max_shift: float,
+        audit_path: str = ""
+    ):
+        self.name = name
+        self.groups = section.groups
+        self.bubble_groups = section.bubble_groups
+        self.base = section.group_thresholds
+        self.lower = np.maximum(self.base - max_shift, 0.0)
+        self.upper = self.base + max_shift
+
+        self.min_sheets = min_sheets
+        self.audit_path = audit_path
+
+        # Replaced, never modified in place: readers use it without the lock
+        self.thresholds = self.base.copy()
+        self._logged = self.base.copy()
+
+        self._window = deque(maxlen=window)
+        self._total = np.zeros((len(self.groups), BINS), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def observe(self, scores):
+        """
+        Add the scores of one sheet (bubbles,) or a batch (..., bubbles).
+        """
+        scores = np.asarray(scores).reshape(-1, self.bubble_groups.size)
+        bins = np.clip((scores * BINS).astype(np.intp), 0, BINS - 1)
+
+        for sheet_bins in bins:
+            hist = np.bincount(
+                self.bubble_groups * BINS + sheet_bins,
+                minlength=len(self.groups) * BINS
+            ).reshape(len(self.groups), BINS)
+
+            with self._lock:
+                if len(self._window) == self._window.maxlen:
+                    self._total -= self._window[0]
+                self._window.append(hist)
+                self._total += hist
+
+                if len(self._window) >= self.min_sheets:
+                    self._update()
+
+    def _update(self):
+        thresholds = self.thresholds.copy()
+
+        for g, hist in enumerate(self._total):
+            found = valley_threshold(hist)
+            if found is None:
+                continue
+
+            threshold, empty_mean, filled_mean = found
+            thresholds[g] = min(max(threshold, self.lower[g]), self.upper[g])
+
+            if abs(thresholds[g] - self._logged[g]) >= AUDIT_STEP:
+                self._audit(g, thresholds[g], empty_mean, filled_mean)
+                self._logged[g] = thresholds[g]
+
+        self.thresholds = thresholds
+
+    def _audit(self, g, threshold, empty_mean, filled_mean):
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "section": self.name,
+            "group": self.groups[g],
+            "from": round(float(self._logged[g]), 3),
+            "to": round(float(threshold), 3),
+            "base": round(float(self.base[g]), 3),
+            "sheets": len(self._window),
+            "empty_mean": round(empty_mean, 3),
+            "filled_mean": round(filled_mean, 3),
+        }
+
+        print(
+            f"[CALIBRATION] {self.name}/{record['group']}: threshold "
+            f"{record['from']} -> {record['to']} (base {record['base']}, "
+            f"{record['sheets']} sheets, empty {record['empty_mean']}, "
+            f"filled {record['filled_mean']})"
+        )
+
+        if self.audit_path:
+            with open(self.audit_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def metrics(self):
+        return {
+            group: round(float(threshold), 3)
+            for group, threshold in zip(self.groups, self.thresholds)
+        }
+
+
+def calibrated(section, name: str):
+    """
+    section, with online thresholds attached when ADAPTIVE_THRESHOLDS is on
+    and its P(correct) table when CONFIDENCE_TABLE has one for name.
+    """
+    section.confidence = confidence_table(name)
+
+    if Config.ADAPTIVE_THRESHOLDS:
+        section.calibration = SectionCalibration(
+            name,
+            section,
+            window=Config.CALIBRATION_WINDOW,
+            min_sheets=Config.CALIBRATION_MIN_SHEETS,
+            max_shift=Config.CALIBRATION_MAX_SHIFT,
+            audit_path=Config.CALIBRATION_AUDIT_PATH,
+        )
+    return section
@@ -0,0 +1,170 @@
+"""
+Calibrated probability that a decision is correct.
+
+Reader confidences are raw fill ratios (or averages of them) and every
+reader flags review with its own rule. Instead, every column decision
+is described by its status (blank / single / multi) and four features
+
+    top    fill of the highest option
+    gap    top minus the runner-up (top for one-option columns)
+    rest   mean fill of the other options
+    paper  paper level under the column, 0..1 (reader/illumination.py)
+
+and looked up in a per-section table of P(correct), trained offline on
+sheets with known marks (train_confidence.py). A field is correct when
+all its columns are.
+
+With a table at CONFIDENCE_TABLE, review is routed by that probability,
+the same rule for every section: a field goes to review when its
+P(correct) is below 1 - REVIEW_MAX_ERROR. Without one the readers keep
+their own rules.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from config import Config
+
+FEATURES = ["top", "gap", "rest", "paper"]
+STATUSES = 3  # BLANK / SINGLE / MULTI (reader/engine.py)
+
+# Training: quantile bins per feature; each cell is pulled towards its
+# coarser parent (status, then +top, +gap, +rest) by PRIOR_WEIGHT samples
+BINS = {"top": 12, "gap": 8, "rest": 5, "paper": 4}
+PRIOR_WEIGHT = 5.0
+
+
+class ConfidenceTable:
+    """
+    P(correct) of one section's columns by status and binned features.
+    """
+
+    def __init__(self, edges, probabilities):
+        self.edges = [np.asarray(edges[feature], dtype=np.float64) for feature in FEATURES]
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+
+    def cells(self, status, features):
+        return (status,) + tuple(
+            np.searchsorted(edges, values, side="right")
+            for edges, values in zip(self.edges, features)
+        )
+
+    def lookup(self, status, features):
+        """
+        status: (...) column statuses; features: FEATURES arrays of the
+        same shape. Returns P(correct), (...).
+        """
+        return self.probabilities[self.cells(status, features)]
+
+    def to_json(self):
+        return {
+            "edges": {
+                feature: edges.round(4).tolist()
+                for feature, edges in zip(FEATURES, self.edges)
+            },
+            "probabilities": self.probabilities.round(4).tolist(),
+        }
+
+
+def quantile_edges(values, bins):
+    """
+    Inner bin edges splitting values into about equally full bins.
+    """
+    edges = np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])
+    return np.unique(edges.round(4))
+
+
+def fit_table(status, features, correct):
+    """
+    Train a ConfidenceTable from labeled columns.
+
+    status: (columns,) statuses; features: FEATURES arrays (columns,);
+    correct: (columns,) booleans, the decision matched the marks.
+    """
+    edges = {
+        feature: quantile_edges(values, BINS[feature])
+        for feature, values in zip(FEATURES, features)
+    }
+    table = ConfidenceTable(edges, np.zeros(0))
+
+    shape = (STATUSES,) + tuple(len(e) + 1 for e in table.edges)
+    cells = table.cells(status, features)
+
+    seen = np.zeros(shape)
+    right = np.zeros(shape)
+    np.add.at(seen, cells, 1)
+    np.add.at(right, cells, np.asarray(correct, dtype=np.float64))
+
+    # Shrink every level towards the one above it, starting from the
+    # overall rate; empty cells end up with their parent's estimate
+    p = (right.sum() + 1) / (seen.sum() + 2)
+    for depth in range(1, len(shape) + 1):
+        axes = tuple(range(depth, len(shape)))
+        n = seen.sum(axis=axes, keepdims=True)
+        c = right.sum(axis=axes, keepdims=True)
+        p = (c + PRIOR_WEIGHT * p) / (n + PRIOR_WEIGHT)
+
+    table.probabilities = p
+    return table
+
+
+@lru_cache(maxsize=None)
+def load_tables(path: Path):
+    """
+    {section name: ConfidenceTable} from a train_confidence.py file,
+    empty when there is none.
+    """
+    if not path.is_file():
+        return {}
+
+    with open(path) as f:
+        data = json.load(f)
+
+    return {
+        name: ConfidenceTable(table["edges"], table["probabilities"])
+        for name, table in data["sections"].items()
+    }
+
+
+def confidence_table(name: str):
+    """
+    The configured table of a section, or None.
+    """
+    return load_tables(Path(Config.CONFIDENCE_TABLE)).get(name)
+
+
+def review_cutoff():
+    return 1.0 - Config.REVIEW_MAX_ERROR
+
+
+def route_review(results, fields):
+    """
+    Set p_correct and review_required of every field output that has a
+    calibrated probability (engine fields read with a table). Outputs are
+    found by name at the top level of results or one level down
+    (previous school grades). Returns results.
+    """
+    cutoff = review_cutoff()
+
+    for name, field in fields.items():
+        p = field.get("p_correct")
+        if p is None:
+            continue
+
+        entry = results.get(name)
+        if entry is None:
+            entry = next(
+                (
+                    group[name] for group in results.values()
+                    if isinstance(group, dict) and isinstance(group.get(name), dict)
+                ),
+                None
+            )
+        if entry is None:
+            continue
+
+        entry["p_correct"] = round(p, 3)
+        entry["review_required"] = p < cutoff
+
+    return results
@@ -0,0 +1,414 @@
+import numpy as np
+from reader.grid import CompiledGrid, circle_mask
+from reader.illumination import Illumination
+
+# =========================
+# FIELD TYPES
+# =========================
+
+SINGLE_CHOICE = "single_choice"  # one column, at most one option (region, month, gender)
+TEXT = "text"                    # several letter columns, blanks read as spaces (names)
+DIGITS = "digits"                # several digit columns, blanks dropped (LRN, school IDs)
+MULTI_SELECT = "multi_select"    # every option decided on its own (special classes, SSC)
+
+# Column status codes (see decide())
+BLANK = 0
+SINGLE = 1
+MULTI = 2
+
+STATUS_NAMES = ["blank", "single", "multi"]
+
+
+def column(points, labels):
+    """
+    Pair bubble centers with their labels: [(label, (x, y)), ...]
+    """
+    return list(zip(labels, points))
+
+
+class Field:
+    """
+    Declaration of one form field.
+
+    columns: list of columns, each a list of (label, (x, y)) options.
+    SINGLE_CHOICE and MULTI_SELECT fields have exactly one column.
+    A column is "single" when its top score reaches threshold and beats
+    the runner-up by dominance_gap (0 disables the dominance rule).
+    group: fields of one kind share a threshold calibrator (see
+    reader/calibration.py); defaults to the field's own name.
+    """
+
+    def __init__(
+        self,
+        name,
+        kind,
+        columns,
+        threshold,
+        dominance_gap=0.0,
+        roi_size=(14, 14),
+        mask=None,
+        group=None
+    ):
+        if kind in (SINGLE_CHOICE, MULTI_SELECT) and len(columns) != 1:
+            raise ValueError(f"{name}: {kind} fields take exactly one column.")
+
+        self.name = name
+        self.kind = kind
+        self.columns = columns
+        self.threshold = threshold
+        self.dominance_gap = dominance_gap
+        self.roi_size = roi_size
+        self.mask = mask
+        self.group = group or name
+
+
+class SectionReader:
+    """
+    Reads a set of fields that share one binarization step.
+
+    All bubbles of all fields are compiled into as few grids as their
+    ROI geometry allows and scored in one pass; every column is then
+    decided in a single vectorized top-1/top-2 step.
+
+    binarize: page-level function gray -> 0/255 map (computed once)
+    roi_binarize: per-ROI function, applied to each cut ROI instead
+    ink_ratio: instead of a binarizer, count a ROI pixel as ink when it
+        is darker than ink_ratio x the paper level at that ROI (see
+        reader/illumination.py)
+    """
+
+    def __init__(
+        self,
+        fields,
+        binarize=None,
+        roi_binarize=None,
+        ink_ratio=None
+    ):
+        if sum(option is not None for option in (binarize, roi_binarize, ink_ratio)) != 1:
+            raise ValueError("Provide exactly one of binarize / roi_binarize / ink_ratio.")
+
+        self.fields = fields
+        self.binarize = binarize
+        self.roi_binarize = roi_binarize
+        self.ink_ratio = ink_ratio
+
+        # Online thresholds and the P(correct) table (reader/confidence.py),
+        # attached by reader.calibration.calibrated()
+        self.calibration = None
+        self.confidence = None
+
+        # Group bubbles by ROI geometry so each group is one CompiledGrid
+        groups = {}
+        for field in fields:
+            key = (field.roi_size, field.mask)
+            for col in field.columns:
+                for _, center in col:
+                    groups.setdefault(key, []).append(center)
+
+        self.grids = []
+        offsets = {}
+        offset = 0
+        for (roi_size, mask), centers in groups.items():
+            width, height = roi_size
+            mask_img = circle_mask(width, height) if mask == "circle" else None
+
+            self.grids.append(CompiledGrid(centers, width, height, mask=mask_img))
+            offsets[(roi_size, mask)] = offset
+            offset += len(centers)
+
+        self.size = offset
+
+        # Flat score position of every option, columns padded with -1
+        next_slot = dict(offsets)
+        positions = []
+        thresholds = []
+        gaps = []
+        self.labels = []
+        self.field_columns = []
+
+        # Threshold groups: label, threshold, and the group of every
+        # column and bubble
+        self.groups = []
+        group_thresholds = []
+        column_groups = []
+        self.bubble_groups = np.empty(self.size, dtype=np.intp)
+
+        for field in fields:
+            key = (field.roi_size, field.mask)
+            start = len(positions)
+
+            if field.group not in self.groups:
+                self.groups.append(field.group)
+                group_thresholds.append(field.threshold)
+            group = self.groups.index(field.group)
+            if group_thresholds[group] != field.threshold:
+                raise ValueError(f"{field.name}: fields of group {field.group} need one threshold.")
+
+            for col in field.columns:
+                col_positions = []
+                for _ in col:
+                    col_positions.append(next_slot[key])
+                    next_slot[key] += 1
+
+                positions.append(col_positions)
+                thresholds.append(field.threshold)
+                gaps.append(field.dominance_gap)
+                column_groups.append(group)
+                self.labels.append([label for label, _ in col])
+                self.bubble_groups[col_positions] = group
+
+            self.field_columns.append((start, len(positions)))
+
+        width = max(len(p) for p in positions)
+        self.column_index = np.full((len(positions), width), -1, dtype=np.intp)
+        for i, col_positions in enumerate(positions):
+            self.column_index[i, :len(col_positions)] = col_positions
+
+        self.thresholds = np.array(thresholds, dtype=np.float64)
+        self.gaps = np.array(gaps, dtype=np.float64)
+        self.group_thresholds = np.array(group_thresholds, dtype=np.float64)
+        self.column_groups = np.array(column_groups, dtype=np.intp)
+
+    def field_boxes(self, margin=0):
+        """
+        {field name: (left, top, right, bottom)} page box around each
+        field's bubbles, widened by margin.
+        """
+        boxes = {}
+        for field in self.fields:
+            width, height = field.roi_size
+            centers = np.array([center for col in field.columns for _, center in col])
+
+            left, top = centers.min(axis=0) - [width // 2 + margin, height // 2 + margin]
+            right, bottom = centers.max(axis=0) + [width // 2 + margin, height // 2 + margin]
+            boxes[field.name] = (max(int(left), 0), max(int(top), 0), int(right), int(bottom))
+
+        return boxes
+
+    def bounds(self, field_names=None, margin=0):
+        """
+        (left, top, right, bottom) page box around the bubbles of the
+        named fields (all fields by default), widened by margin.
+        """
+        boxes = np.array([
+            box
+            for name, box in self.field_boxes(margin).items()
+            if field_names is None or name in field_names
+        ])
+
+        left, top = boxes[:, :2].min(axis=0)
+        right, bottom = boxes[:, 2:].max(axis=0)
+
+        return int(left), int(top), int(right), int(bottom)
+
+    # -----------------
+    # SCORING
+    # -----------------
+
+    def score(self, gray, illumination=None):
+        """
+        Raw fill ratio of every bubble in the section, flat (bubbles,).
+
+        illumination: the sheet's shared Illumination, used (or created)
+        by ink_ratio sections only.
+        """
+        if self.ink_ratio is not None:
+            illumination = illumination or Illumination(gray)
+            scores = []
+            for grid in self.grids:
+                ink = illumination.levels(grid) * self.ink_ratio
+                scores.append(grid.score_stack(grid.cut(gray) < ink[:, None, None]))
+            return np.concatenate(scores)
+
+        if self.roi_binarize is not None:
+            scores = []
+            for grid in self.grids:
+                stack = grid.cut(gray)
+                binary = np.stack([self.roi_binarize(roi) for roi in stack])
+                scores.append(grid.score_stack(binary))
+            return np.concatenate(scores)
+
+        binary = self.binarize(gray)
+        return np.concatenate([grid.score_flat(binary) for grid in self.grids])
+
+    def score_batch(self, grays):
+        """
+        Raw fill ratios for a batch of same-size sheets, (sheets, bubbles).
+        """
+        if self.binarize is None:
+            return np.stack([self.score(gray) for gray in grays])
+
+        binaries = [self.binarize(gray) for gray in grays]
+        return np.concatenate(
+            [grid.score_batch(binaries) for grid in self.grids],
+            axis=-1
+        )
+
+    def paper(self, illumination):
+        """
+        Paper level (0..1) under every bubble, flat (bubbles,).
+        """
+        return np.concatenate([illumination.levels(grid) for grid in self.grids]) / 255.0
+
+    # -----------------
+    # DECISION
+    # -----------------
+
+    def column_scores(self, scores):
+        """
+        Scores regrouped per column, (..., columns, options), padded with -inf.
+        """
+        return np.where(
+            self.column_index >= 0,
+            scores[..., self.column_index],
+            -np.inf
+        )
+
+    def decide(self, scores):
+        """
+        Top-1 / top-2 decision for every column at once.
+
+        scores: (..., bubbles), e.g. one sheet or a batch of sheets.
+        Returns a dict of (..., columns) arrays:
+            top_idx: option index of the highest score (first on ties)
+            top: highest score
+            second: runner-up score (-inf for one-option columns)
+            status: BLANK / SINGLE / MULTI
+        and threshold, the (columns,) thresholds used.
+
+        With a calibration attached, the sheets are decided with the
+        thresholds learned so far and then added to its window.
+        """
+        thresholds = self.thresholds
+        if self.calibration is not None:
+            thresholds = self.calibration.thresholds[self.column_groups]
+
+        candidates = self.column_scores(scores)
+
+        top_idx = candidates.argmax(axis=-1)
+        top = np.take_along_axis(candidates, top_idx[..., None], axis=-1)[..., 0]
+
+        np.put_along_axis(candidates, top_idx[..., None], -np.inf, axis=-1)
+        second = candidates.max(axis=-1)
+
+        status = np.where(
+            top < thresholds,
+            BLANK,
+            np.where(top - second < self.gaps, MULTI, SINGLE)
+        )
+
+        if self.calibration is not None:
+            self.calibration.observe(scores)
+
+        return {
+            "top_idx": top_idx,
+            "top": top,
+            "second": second,
+            "status": status,
+            "threshold": thresholds,
+        }
+
+    def column_features(self, scores, decision, paper):
+        """
+        Confidence features of every column (reader.confidence.FEATURES:
+        top, gap, rest, paper), each (..., columns).
+
+        paper: (..., bubbles) from paper().
+        """
+        options = (self.column_index >= 0).sum(axis=-1)
+        top = decision["top"]
+
+        filled = np.where(self.column_index >= 0, scores[..., self.column_index], 0.0)
+        rest = (filled.sum(axis=-1) - top) / np.maximum(options - 1, 1)
+        gap = np.where(options > 1, top - decision["second"], top)
+
+        return top, gap, rest, paper[..., self.column_index[:, 0]]
+
+    def p_correct(self, scores, decision, paper):
+        """
+        Calibrated P(correct) of every column, (..., columns).
+        """
+        return self.confidence.lookup(
+            decision["status"],
+            self.column_features(scores, decision, paper)
+        )
+
+    # -----------------
+    # OUTPUT BOUNDARY
+    # -----------------
+
+    def to_fields(self, scores, decision):
+        """
+        Convert one sheet's arrays into per-field dicts:
+
+        {name: {"value": ..., "columns": [
+            {"selected", "confidence", "status", "scores"}, ...
+        ]}}
+
+        plus "p_correct", the product over the field's columns, when the
+        decision carries one. Scores and confidences stay raw; readers
+        round for output.
+        """
+        scores = scores.tolist()
+        top_idx = decision["top_idx"].tolist()
+        top = decision["top"].tolist()
+        status = decision["status"].tolist()
+        threshold = decision["threshold"].tolist()
+        p_correct = decision.get("p_correct")
+
+        results = {}
+
+        for field, (start, stop) in zip(self.fields, self.field_columns):
+            columns = []
+
+            for c in range(start, stop):
+                labels = self.labels[c]
+                col_scores = {
+                    label: scores[pos]
+                    for label, pos in zip(labels, self.column_index[c])
+                }
+
+                columns.append({
+                    "selected": labels[top_idx[c]] if status[c] == SINGLE else None,
+                    "confidence": top[c],
+                    "status": STATUS_NAMES[status[c]],
+                    "scores": col_scores,
+                })
+
+            results[field.name] = {
+                "value": field_value(field, columns, threshold[start]),
+                "columns": columns,
+            }
+
+            if p_correct is not None:
+                results[field.name]["p_correct"] = float(np.prod(p_correct[start:stop]))
+
+        return results
+
+    def read(self, gray, illumination=None):
+        illumination = illumination or Illumination(gray)
+
+        scores = self.score(gray, illumination)
+        decision = self.decide(scores)
+
+        if self.confidence is not None:
+            decision["p_correct"] = self.p_correct(scores, decision, self.paper(illumination))
+
+        return self.to_fields(scores, decision)
+
+
+def field_value(field, columns, threshold):
+    if field.kind == SINGLE_CHOICE:
+        return columns[0]["selected"]
+
+    if field.kind == MULTI_SELECT:
+        return [
+            label
+            for label, score in columns[0]["scores"].items()
+            if score >= threshold
+        ]
+
+    if field.kind == TEXT:
+        return "".join(col["selected"] or " " for col in columns).strip()
+
+    return "".join(col["selected"] for col in columns if col["selected"])
@@ -0,0 +1,161 @@
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def circle_mask(roi_width, roi_height):
+    """
+    Filled circle inscribed in the ROI, used to ignore print around a bubble.
+    """
+    mask = np.zeros((roi_height, roi_width), dtype=np.uint8)
+    center = (roi_width // 2, roi_height // 2)
+    radius = min(roi_width, roi_height) // 2
+    cv2.circle(mask, center, radius, 255, -1)
+    return mask
+
+
+class CompiledGrid:
+    """
+    A fixed set of rectangular bubble ROIs, prepared once per process.
+
+    Every sheet's work then reduces to "integrate the covered block of a
+    binary (0/255) map and read four corners per ROI". Scores come back
+    as raw fill ratios (dark pixels / ROI area).
+
+    With a mask, only pixels inside the mask are counted (still divided
+    by the full ROI area); those grids are scored by gathering the ROI
+    stack instead of through the integral image.
+    """
+
+    def __init__(self, centers, roi_width, roi_height, mask=None):
+        centers = np.asarray(centers, dtype=np.int32)
+
+        # Leading shape of the centers array, e.g. (subjects, questions, choices)
+        self.shape = centers.shape[:-1]
+        self.roi_width = roi_width
+        self.roi_height = roi_height
+        self.mask = None if mask is None else mask > 0
+
+        flat = centers.reshape(-1, 2)
+        self.x1 = flat[:, 0] - roi_width // 2
+        self.x2 = flat[:, 0] + roi_width // 2
+        self.y1 = flat[:, 1] - roi_height // 2
+        self.y2 = flat[:, 1] + roi_height // 2
+
+    @property
+    def size(self):
+        return len(self.x1)
+
+    def _bounds(self, h, w):
+        """
+        Clip ROIs to the page and express them relative to the covered block.
+        """
+        x1 = np.clip(self.x1, 0, w)
+        x2 = np.clip(self.x2, 0, w)
+        y1 = np.clip(self.y1, 0, h)
+        y2 = np.clip(self.y2, 0, h)
+
+        top, left = int(y1.min()), int(x1.min())
+        bottom, right = int(y2.max()), int(x2.max())
+
+        return (top, bottom, left, right), (x1 - left, x2 - left, y1 - top, y2 - top)
+
+    def cut(self, image):
+        """
+        All ROIs as one (bubbles, roi_height, roi_width) stack, in one gather.
+        """
+        h, w = image.shape[:2]
+
+        if (
+            self.x1.min() < 0 or self.y1.min() < 0
+            or self.x2.max() > w or self.y2.max() > h
+        ):
+            raise ValueError("Bubble grid extends outside the page.")
+
+        window = (int(self.y2[0] - self.y1[0]), int(self.x2[0] - self.x1[0]))
+
+        # Copies each window row-by-row instead of gathering single pixels
+        return sliding_window_view(image, window)[self.y1, self.x1]
+
+    def score_stack(self, stack):
+        """
+        Fill ratios from an already binarized ROI stack (see cut()).
+        """
+        stack = stack > 0
+        if self.mask is not None:
+            stack = stack & self.mask
+
+        _, h, w = stack.shape
+        return stack.reshape(len(stack), -1).sum(axis=1) / float(h * w)
+
+    def integrate(self, binary):
+        """
+        Integral image of only the block this grid covers.
+        """
+        h, w = binary.shape[:2]
+        (top, bottom, left, right), _ = self._bounds(h, w)
+
+        # float64 keeps 255 * area sums exact for any block size
+        return cv2.integral(binary[top:bottom, left:right], sdepth=cv2.CV_64F)
+
+    def score_integrals(self, integrals, page_shape):
+        """
+        Fill ratios from block integrals produced by integrate().
+
+        integrals: (sheets, block_h + 1, block_w + 1) array or a list of
+        block integrals. Returns a (sheets, bubbles) matrix.
+        """
+        integrals = np.asarray(integrals)
+        _, (x1, x2, y1, y2) = self._bounds(*page_shape[:2])
+
+        dark = (
+            integrals[:, y2, x2] - integrals[:, y1, x2]
+            - integrals[:, y2, x1] + integrals[:, y1, x1]
+        ) / 255.0
+        area = (x2 - x1) * (y2 - y1)
+
+        return np.divide(
+            dark,
+            area,
+            out=np.zeros(dark.shape, dtype=np.float64),
+            where=area > 0
+        )
+
+    def score_flat(self, binary):
+        """
+        Fill ratios for one sheet as a flat (bubbles,) vector.
+        """
+        if self.mask is not None:
+            return self.score_stack(self.cut(binary))
+
+        integral = self.integrate(binary)[None]
+        return self.score_integrals(integral, binary.shape)[0]
+
+    def score(self, binary):
+        """
+        Fill ratios for one sheet, shaped like the compiled centers.
+        """
+        return self.score_flat(binary).reshape(self.shape)
+
+    def score_batch(self, binaries):
+        """
+        Fill ratios for a batch of sheets in one vectorized gather.
+
+        binaries: stacked (sheets, H, W) array or a list of same-size
+        binary maps. Returns a (sheets, bubbles) matrix; reshape with
+        (-1, *grid.shape) to recover the field layout.
+        """
+        if len(binaries) == 0:
+            return np.zeros((0, self.size), dtype=np.float64)
+
+        page_shape = binaries[0].shape[:2]
+
+        if any(b.shape[:2] != page_shape for b in binaries):
+            raise ValueError("All sheets in a batch must share the same page size.")
+
+        if self.mask is not None:
+            return np.stack([self.score_flat(b) for b in binaries])
+
+        integrals = np.stack([self.integrate(b) for b in binaries])
+
+        return self.score_integrals(integrals, page_shape)
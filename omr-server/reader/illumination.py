@@ -0,0 +1,78 @@
+"""
+Per-sheet illumination map.
+
+A low-resolution estimate of the paper brightness under every part of
+the page: the page shrunk STEP times, a max filter wider than any bubble
+or mark (so only paper survives), then a blur. Readers compare each ROI
+pixel with the paper level at that ROI instead of equalizing or
+thresholding the whole page, so shadows and scanner falloff cancel out
+and only ROI pixels are ever touched.
+
+One Illumination is created per sheet and handed to every section
+reader; the map is computed on first use and shared.
+"""
+import threading
+
+import cv2
+import numpy as np
+
+STEP = 16          # page px per map px
+STRIDE = 4         # page px sampled per STEP (area-averaged in between)
+PAPER_WINDOW = 5   # map px of the max filter (80 page px)
+BLUR_SIGMA = 2.0   # map px
+
+# Pencil is darker than this share of the paper level. The orange print
+# sits at ~70% of it in grayscale and must stay out
+INK_RATIO = 0.65
+
+
+def paper_map(gray):
+    """
+    Paper brightness, (height // STEP, width // STEP) float32.
+    """
+    h, w = gray.shape
+
+    # Striding first keeps the area resize off the full page
+    small = cv2.resize(
+        gray[::STRIDE, ::STRIDE],
+        (w // STEP, h // STEP),
+        interpolation=cv2.INTER_AREA
+    )
+    small = cv2.dilate(small, np.ones((PAPER_WINDOW, PAPER_WINDOW), np.uint8))
+
+    return cv2.GaussianBlur(small, (0, 0), BLUR_SIGMA).astype(np.float32)
+
+
+class Illumination:
+    def __init__(self, gray):
+        self.gray = gray
+        self._paper = None
+        self._lock = threading.Lock()
+
+    @property
+    def paper(self):
+        with self._lock:
+            if self._paper is None:
+                self._paper = paper_map(self.gray)
+            return self._paper
+
+    def levels(self, grid):
+        """
+        Paper level at every ROI center of a CompiledGrid, (rois,).
+        Bilinear in the map; a ROI is far smaller than a map pixel.
+        """
+        paper = self.paper
+        h, w = paper.shape
+
+        x = (grid.x1 + grid.x2) / (2 * STEP) - 0.5
+        y = (grid.y1 + grid.y2) / (2 * STEP) - 0.5
+
+        x0 = np.clip(np.floor(x).astype(np.intp), 0, w - 2)
+        y0 = np.clip(np.floor(y).astype(np.intp), 0, h - 2)
+        fx = np.clip(x - x0, 0.0, 1.0)
+        fy = np.clip(y - y0, 0.0, 1.0)
+
+        top = paper[y0, x0] * (1 - fx) + paper[y0, x0 + 1] * fx
+        bottom = paper[y0 + 1, x0] * (1 - fx) + paper[y0 + 1, x0 + 1] * fx
+
+        return top * (1 - fy) + bottom * fy
@@ -1,6 +1,15 @@
 import cv2
-import numpy as np
-from school.current.curr_overlay_test import (
+from reader.binarize import adaptive_roi
+from reader.calibration import calibrated
+from reader.confidence import route_review
+from reader.engine import (
+    DIGITS,
+    SINGLE_CHOICE,
+    Field,
+    SectionReader,
+    column
+)
+from school.current.curr_grid import (
     build_region_grid,
     build_division_grid,
     build_school_id_grid,
@@ -14,6 +23,7 @@ from school.current.curr_overlay_test import (
 
 FILL_THRESHOLD = 0.45
 DOMINANCE_GAP = 0.10
+ROI_SIZE = 28
 
 REGION_ROWS = [
     "REGION I",
@@ -50,100 +60,68 @@ SCHOOL_TYPE_ROWS = [
 ]
 
 
-# =========================
-# CORE SCORING UTIL
-# =========================
-
-def compute_fill_score(gray_roi: np.ndarray) -> float:
-    thresh = cv2.adaptiveThreshold(
-        gray_roi,
-        255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV,
-        21,
-        5
-    )
-
-    filled = cv2.countNonZero(thresh)
-    total = thresh.shape[0] * thresh.shape[1]
-    return filled / float(total)
-
-
-def decide_selection(scores: dict, threshold=FILL_THRESHOLD):
-    sorted_items = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-    top_val, top_score = sorted_items[0]
-    second_score = sorted_items[1][1] if len(sorted_items) > 1 else 0
-
-    if top_score < threshold:
-        return None, top_score
-
-    if (top_score - second_score) < DOMINANCE_GAP:
-        return None, top_score
-
-    return top_val, top_score
+def normalize_scores(scores):
+    return {k: round(v, 2) for k, v in scores.items()}
 
 
 # =========================
-# GRID READER (COORDINATE STYLE)
+# SECTION DECLARATION
 # =========================
 
-def read_grid(gray_img, grid, rows, threshold=FILL_THRESHOLD):
+def grid_columns(grid, rows):
     """
     Supports:
     1. Region grid: { row_index: (x, y) }
     2. Multi-column grid: { col_index: { row_index: (x, y) } }
     """
-
-    results = {}
-    decoded = ""
-
-    # -----------------
-    # REGION STYLE
-    # -----------------
     if all(isinstance(v, tuple) for v in grid.values()):
-        scores = {}
-
-        for row_idx, (x, y) in grid.items():
-            roi = gray_img[int(y-14):int(y+14), int(x-14):int(x+14)]
-            score = compute_fill_score(roi)
-            scores[rows[row_idx]] = round(score, 2)
-
-        selected, confidence = decide_selection(scores, threshold)
-
-        if selected:
-            decoded += selected
-
-        results[0] = {
-            "selected": selected,
-            "confidence": round(confidence, 2),
-            "scores": scores
-        }
-
-        return decoded, results
-
-    # -----------------
-    # MULTI-COLUMN STYLE
-    # -----------------
-    for col_idx, col_dict in grid.items():
-        scores = {}
-
-        for row_idx, (x, y) in col_dict.items():
-            roi = gray_img[int(y-14):int(y+14), int(x-14):int(x+14)]
-            score = compute_fill_score(roi)
-            scores[rows[row_idx]] = round(score, 2)
-
-        selected, confidence = decide_selection(scores, threshold)
-
-        if selected:
-            decoded += selected
-
-        results[col_idx] = {
-            "selected": selected,
-            "confidence": round(confidence, 2),
-            "scores": scores
-        }
-
-    return decoded, results
+        return [column(list(grid.values()), [rows[r] for r in grid.keys()])]
+
+    return [
+        column(list(col.values()), [rows[r] for r in col.keys()])
+        for _, col in sorted(grid.items())
+    ]
+
+
+def build_current_school_section():
+    common = dict(dominance_gap=DOMINANCE_GAP, roi_size=(ROI_SIZE, ROI_SIZE))
+
+    fields = [
+        Field(
+            "region",
+            SINGLE_CHOICE,
+            grid_columns(build_region_grid(), REGION_ROWS),
+            threshold=0.38,
+            **common
+        ),
+        Field(
+            "division",
+            DIGITS,
+            grid_columns(build_division_grid(), DIGIT_ROWS),
+            threshold=0.42,
+            **common
+        ),
+        Field(
+            "school_id",
+            DIGITS,
+            grid_columns(build_school_id_grid(), DIGIT_ROWS),
+            threshold=0.42,
+            **common
+        ),
+        Field(
+            "school_type",
+            SINGLE_CHOICE,
+            grid_columns(build_school_type_grid(), SCHOOL_TYPE_ROWS),
+            threshold=0.40,
+            **common
+        ),
+    ]
+
+    # Each 28x28 ROI is adaptively thresholded on its own
+    return SectionReader(fields, roi_binarize=adaptive_roi)
+
+
+CURRENT_SCHOOL_SECTION = calibrated(build_current_school_section(), "current_school")
 
 
 # =========================
@@ -152,35 +130,26 @@ def read_grid(gray_img, grid, rows, threshold=FILL_THRESHOLD):
 
 def read_current_school_info(
     img
-    # region_grid,
-    # division_grid,
-    # school_id_grid,
-    # school_type_grid
 ):
-    region_grid = build_region_grid()
-    division_grid = build_division_grid()
-    school_id_grid = build_school_id_grid()
-    school_type_grid = build_school_type_grid()
-
-
     if img is None:
         raise ValueError("Unable to load image.")
 
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-    region_value, region_details = read_grid(gray, region_grid, REGION_ROWS, threshold=0.38)
+    return read_current_school_info_gray(gray)
+
 
-    division_value, division_details = read_grid(gray, division_grid, DIGIT_ROWS, threshold=0.42)
-    school_id_value, school_id_details = read_grid(gray, school_id_grid, DIGIT_ROWS, threshold=0.42)
+def read_current_school_info_gray(gray, illumination=None):
+    """
+    read_current_school_info over an already converted grayscale page.
+    """
+    fields = CURRENT_SCHOOL_SECTION.read(gray, illumination)
 
-    school_type_value, school_type_details = read_grid(
-        gray,
-        school_type_grid,
-        SCHOOL_TYPE_ROWS,
-        threshold=0.40
-    )
+    return route_review(current_school_fields_to_json(fields), fields)
 
-    def wrap_field(answer, details_dict):
+
+def current_school_fields_to_json(fields):
+    def wrap_field(field):
         """
         Convert raw grid output into deterministic schema:
         ✔ answer
@@ -188,7 +157,11 @@ def read_current_school_info(
         ✔ review_required (confidence < 0.50)
         ✔ details with standardized keys
         """
-        if not details_dict:
+        # Blank columns decode to "" rather than None
+        answer = field["value"] or ""
+        columns = field["columns"]
+
+        if not columns:
             return {
                 "answer": answer,
                 "confidence": 0.00,
@@ -200,16 +173,15 @@ def read_current_school_info(
         digits = []
 
         # multi-column style (true multi-column = more than 1 column)
-        if len(details_dict) > 1:
-            for idx in sorted(details_dict.keys()):
-                col = details_dict[idx]
+        if len(columns) > 1:
+            for col in columns:
                 conf = round(float(col.get("confidence", 0)), 2)
                 confidences.append(conf)
 
                 digits.append({
                     "selected": col.get("selected"),
                     "confidence": conf,
-                    "scores": col.get("scores", {})
+                    "scores": normalize_scores(col.get("scores", {}))
                 })
 
             final_conf = round(sum(confidences) / len(confidences), 2) if confidences else 0.00
@@ -222,21 +194,21 @@ def read_current_school_info(
             }
 
         # single-column style (e.g., region / school_type)
-        col = list(details_dict.values())[0]
+        col = columns[0]
         conf = round(float(col.get("confidence", 0)), 2)
 
         return {
             "answer": answer,
             "confidence": conf,
             "review_required": conf < 0.50,
-            "details": {"scores": col.get("scores", {})}
+            "details": {"scores": normalize_scores(col.get("scores", {}))}
         }
 
     return {
-        "region": wrap_field(region_value, region_details),
-        "division": wrap_field(division_value, division_details),
-        "school_id": wrap_field(school_id_value, school_id_details),
-        "school_type": wrap_field(school_type_value, school_type_details),
+        "region": wrap_field(fields["region"]),
+        "division": wrap_field(fields["division"]),
+        "school_id": wrap_field(fields["school_id"]),
+        "school_type": wrap_field(fields["school_type"]),
     }
 
 
@@ -1,6 +1,15 @@
 import cv2
-import numpy as np
-from school.previous.prev_overlay_test import (
+from reader.binarize import otsu_roi
+from reader.calibration import calibrated
+from reader.confidence import route_review
+from reader.engine import (
+    DIGITS,
+    SINGLE_CHOICE,
+    Field,
+    SectionReader,
+    column
+)
+from school.previous.prev_grid import (
     build_sy_grid,
     build_class_size_grid,
     build_final_grade_grid,
@@ -19,51 +28,124 @@ def normalize_conf(val):
     return round(float(val), 2)
 
 
-# =========================
-# HELPERS
-# =========================
-
-def extract_roi(gray, center):
-    x, y = center
-    return gray[
-        int(y - ROI_RADIUS):int(y + ROI_RADIUS),
-        int(x - ROI_RADIUS):int(x + ROI_RADIUS)
-    ]
+DIGIT_LABELS = list("0123456789")
+TENS_LABELS = ["6", "7", "8", "9"]
+SUBJECT_NAMES = ["Math", "English", "Science", "Filipino", "AP"]
+SY_LABELS = ["SY 2015-2016", "Before SY 2015-2016"]
 
 
-def compute_fill_score(gray, center):
-    roi = extract_roi(gray, center)
+# =========================
+# SECTION DECLARATION
+# =========================
 
-    if roi.size == 0:
-        return 0.0
+def build_previous_school_section():
+    school_id_grid = build_prev_school_id_grid()
+    final_grade_grid = build_final_grade_grid()
+    class_grid = build_class_size_grid()
+    sy_grid = build_sy_grid()
 
-    _, thresh = cv2.threshold(
-        roi,
-        0,
-        255,
-        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
+    common = dict(
+        threshold=FILL_THRESHOLD,
+        roi_size=(ROI_RADIUS * 2, ROI_RADIUS * 2),
+        group="bubble"
     )
 
-    filled = np.count_nonzero(thresh)
-    total = thresh.size
+    fields = [
+        Field(
+            "school_id",
+            DIGITS,
+            [
+                column([(col_x, y) for y in school_id_grid["row_y"]], DIGIT_LABELS)
+                for col_x in school_id_grid["col_x"]
+            ],
+            **common
+        ),
+    ]
 
-    return filled / float(total)
+    # FINAL GRADE: one tens + ones column pair per subject
+    col_x_list = final_grade_grid["col_x"]
 
+    for i in range(0, len(col_x_list), 2):
+        fields.append(Field(
+            SUBJECT_NAMES[i // 2],
+            DIGITS,
+            [
+                column(
+                    [(col_x_list[i], y) for y in final_grade_grid["tens_row_y"]],
+                    TENS_LABELS
+                ),
+                column(
+                    [(col_x_list[i + 1], y) for y in final_grade_grid["ones_row_y"]],
+                    DIGIT_LABELS
+                ),
+            ],
+            **common
+        ))
+
+    fields.append(Field(
+        "class_size",
+        DIGITS,
+        [
+            column([(class_grid["tens_col_x"], y) for y in class_grid["tens_row_y"]], DIGIT_LABELS),
+            column([(class_grid["ones_col_x"], y) for y in class_grid["ones_row_y"]], DIGIT_LABELS),
+        ],
+        **common
+    ))
+
+    fields.append(Field(
+        "school_year",
+        SINGLE_CHOICE,
+        [column(sy_grid["options"], SY_LABELS)],
+        **common
+    ))
+
+    # Each 36x36 ROI gets its own OTSU threshold
+    return SectionReader(fields, roi_binarize=otsu_roi)
+
+
+PREVIOUS_SCHOOL_SECTION = calibrated(build_previous_school_section(), "previous_school")
+
+
+def two_digit_field(field):
+    """
+    Tens + ones pair (final grades, class size).
+    Value only when both digits are read; confidence averages the selected ones.
+    """
+    tens, ones = field["columns"]
+
+    tens_val = tens["selected"]
+    ones_val = ones["selected"]
+
+    value = None
+    confidences = []
 
-def read_column(gray, col_x, row_y_list, values):
-    scores = {}
+    if tens_val:
+        confidences.append(tens["confidence"])
+    if ones_val:
+        confidences.append(ones["confidence"])
 
-    for idx, y in enumerate(row_y_list):
-        score = compute_fill_score(gray, (col_x, y))
-        scores[values[idx]] = score
+    if tens_val and ones_val:
+        value = tens_val + ones_val
 
-    best_value = max(scores, key=scores.get)
-    best_score = scores[best_value]
+    avg_conf = sum(confidences) / len(confidences) if confidences else 0.0
 
-    if best_score >= FILL_THRESHOLD:
-        return best_value, best_score, scores
-    else:
-        return None, best_score, scores
+    return {
+        "answer": value,
+        "confidence": normalize_conf(avg_conf),
+        "review_required": normalize_conf(avg_conf) < REVIEW_THRESHOLD,
+        "details": {
+            "tens": {
+                "selected": tens_val,
+                "confidence": normalize_conf(tens["confidence"]),
+                "scores": {k: normalize_conf(v) for k, v in tens["scores"].items()}
+            },
+            "ones": {
+                "selected": ones_val,
+                "confidence": normalize_conf(ones["confidence"]),
+                "scores": {k: normalize_conf(v) for k, v in ones["scores"].items()}
+            }
+        }
+    }
 
 
 # =========================
@@ -73,45 +155,40 @@ def read_column(gray, col_x, row_y_list, values):
 def read_previous_school_info(
     img
 ):
-    school_id_grid = build_prev_school_id_grid()
-    final_grade_grid = build_final_grade_grid()
-    class_grid = build_class_size_grid()
-    sy_grid = build_sy_grid()
-    
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
+    return read_previous_school_info_gray(gray)
+
+
+def read_previous_school_info_gray(gray, illumination=None):
+    """
+    read_previous_school_info over an already converted grayscale page.
+    """
+    fields = PREVIOUS_SCHOOL_SECTION.read(gray, illumination)
+
+    return route_review(previous_school_fields_to_json(fields), fields)
+
+
+def previous_school_fields_to_json(fields):
     result = {}
 
     # -------------------------
     # SCHOOL ID (6 digits)
     # -------------------------
-    school_id_digits = []
     school_id_details = []
     confidences = []
 
-    for col_idx, col_x in enumerate(school_id_grid["col_x"]):
-        digit, confidence, scores = read_column(
-            gray,
-            col_x,
-            school_id_grid["row_y"],
-            list("0123456789")
-        )
-
-        digit_struct = {
-            "selected": digit,
-            "confidence": normalize_conf(confidence),
-            "scores": {k: normalize_conf(v) for k, v in scores.items()}
-        }
-
-        school_id_details.append(digit_struct)
+    for col in fields["school_id"]["columns"]:
+        school_id_details.append({
+            "selected": col["selected"],
+            "confidence": normalize_conf(col["confidence"]),
+            "scores": {k: normalize_conf(v) for k, v in col["scores"].items()}
+        })
 
-        if digit:
-            school_id_digits.append(digit)
-            confidences.append(confidence)
-        else:
-            school_id_digits.append("")
+        if col["selected"]:
+            confidences.append(col["confidence"])
 
-    school_id_value = "".join(school_id_digits)
+    school_id_value = fields["school_id"]["value"]
     avg_conf = sum(confidences) / len(confidences) if confidences else 0.0
 
     result["school_id"] = {
@@ -126,141 +203,28 @@ def read_previous_school_info(
     # -------------------------
     # FINAL GRADE (per subject)
     # -------------------------
-    final_grade_struct = {}
-
-    col_x_list = final_grade_grid["col_x"]
-    tens_rows = final_grade_grid["tens_row_y"]
-    ones_rows = final_grade_grid["ones_row_y"]
-
-    subject_names = ["Math", "English", "Science", "Filipino", "AP"]
-
-    for i in range(0, len(col_x_list), 2):
-        subject_index = i // 2
-        subject_name = subject_names[subject_index]
-
-        tens_x = col_x_list[i]
-        ones_x = col_x_list[i + 1]
-
-        tens_val, tens_conf, tens_scores = read_column(
-            gray,
-            tens_x,
-            tens_rows,
-            ["6", "7", "8", "9"]
-        )
-
-        ones_val, ones_conf, ones_scores = read_column(
-            gray,
-            ones_x,
-            ones_rows,
-            list("0123456789")
-        )
-
-        grade_value = None
-        confidences = []
-
-        if tens_val:
-            confidences.append(tens_conf)
-        if ones_val:
-            confidences.append(ones_conf)
-
-        if tens_val and ones_val:
-            grade_value = tens_val + ones_val
-
-        avg_conf = sum(confidences) / len(confidences) if confidences else 0.0
-
-        final_grade_struct[subject_name] = {
-            "answer": grade_value,
-            "confidence": normalize_conf(avg_conf),
-            "review_required": normalize_conf(avg_conf) < REVIEW_THRESHOLD,
-            "details": {
-                "tens": {
-                    "selected": tens_val,
-                    "confidence": normalize_conf(tens_conf),
-                    "scores": {k: normalize_conf(v) for k, v in tens_scores.items()}
-                },
-                "ones": {
-                    "selected": ones_val,
-                    "confidence": normalize_conf(ones_conf),
-                    "scores": {k: normalize_conf(v) for k, v in ones_scores.items()}
-                }
-            }
-        }
-
-    result["final_grade"] = final_grade_struct
+    result["final_grade"] = {
+        subject_name: two_digit_field(fields[subject_name])
+        for subject_name in SUBJECT_NAMES
+    }
 
     # -------------------------
     # CLASS SIZE
     # -------------------------
-    tens_val, tens_conf, tens_scores = read_column(
-        gray,
-        class_grid["tens_col_x"],
-        class_grid["tens_row_y"],
-        list("0123456789")
-    )
-
-    ones_val, ones_conf, ones_scores = read_column(
-        gray,
-        class_grid["ones_col_x"],
-        class_grid["ones_row_y"],
-        list("0123456789")
-    )
-
-    class_size = None
-    confidences = []
-
-    if tens_val:
-        confidences.append(tens_conf)
-    if ones_val:
-        confidences.append(ones_conf)
-
-    if tens_val and ones_val:
-        class_size = tens_val + ones_val
-
-    avg_conf = sum(confidences) / len(confidences) if confidences else 0.0
-
-    result["class_size"] = {
-        "answer": class_size,
-        "confidence": normalize_conf(avg_conf),
-        "review_required": normalize_conf(avg_conf) < REVIEW_THRESHOLD,
-        "details": {
-            "tens": {
-                "selected": tens_val,
-                "confidence": normalize_conf(tens_conf),
-                "scores": {k: normalize_conf(v) for k, v in tens_scores.items()}
-            },
-            "ones": {
-                "selected": ones_val,
-                "confidence": normalize_conf(ones_conf),
-                "scores": {k: normalize_conf(v) for k, v in ones_scores.items()}
-            }
-        }
-    }
+    result["class_size"] = two_digit_field(fields["class_size"])
 
     # -------------------------
     # SCHOOL YEAR (SY)
     # -------------------------
-    sy_scores = {}
-    sy_selected = None
-    best_score = 0
-
-    for idx, center in enumerate(sy_grid["options"]):
-        score = compute_fill_score(gray, center)
-        label = "SY 2015-2016" if idx == 0 else "Before SY 2015-2016"
-        sy_scores[label] = score
-
-        if score > best_score:
-            best_score = score
-            sy_selected = label
-
-    if best_score < FILL_THRESHOLD:
-        sy_selected = None
+    sy_col = fields["school_year"]["columns"][0]
+    best_score = sy_col["confidence"]
 
     result["school_year"] = {
-        "answer": sy_selected,
+        "answer": fields["school_year"]["value"],
         "confidence": normalize_conf(best_score),
         "review_required": normalize_conf(best_score) < REVIEW_THRESHOLD,
         "details": {
-            "scores": {k: normalize_conf(v) for k, v in sy_scores.items()}
+            "scores": {k: normalize_conf(v) for k, v in sy_col["scores"].items()}
         }
     }
 
@@ -0,0 +1,442 @@
+"""
+Answer-key scoring.
+
+Keys live in answer_key, one row per scored (exam, subject, question).
+A sheet is scored at ingest against the key of Config.EXAM_ID: its
+answers as a (subjects, questions) array of choice indexes (-1 blank)
+compared with the key array in one step. The key array is loaded once
+per process and reloaded only when the exam's rows change, so a
+correction reaches the running watcher without a restart.
+
+Each scan keeps that answer array, one byte per question, in scan_score
+next to its per-subject totals. Re-scoring an exam after a key
+correction works from those arrays alone and never touches an image:
+they are streamed in chunks of scans, scored in one comparison per
+chunk and written back with executemany, one transaction per chunk.
+Loading a corrected key rewrites is_correct only for the questions
+that changed.
+
+A scan ingested while its exam has no key is stored unscored: scores
+NULL and max_score 0 in scan_score (student_answer.is_correct, NOT NULL
+in the drizzle schema, stays 0 and means nothing until then). The
+watcher warns once per exam; loading the key scores those scans too.
+
+Usage (from omr-server/):
+    python scoring.py key <exam> <key.json>         load or replace a key, re-score
+    python scoring.py rescore <exam> [--backfill]   re-score every scan of an exam
+
+--backfill first gives scans stored before scoring existed a scan_score
+row under exam, rebuilt from student_answer.
+
+key.json: {"math": "ABCD...", ...}, one letter per question, "-" for a
+question that is not scored.
+
+Both commands work on omr.db and need STORAGE_BACKEND=sqlite; with
+another backend they exit without touching anything.
+"""
+import argparse
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+from answers.read_answers import CHOICES, QUESTIONS_PER_SUBJECT, SUBJECTS
+from config import Config
+from db.schema import ensure_schema
+from db.summary import add_scans, ensure_summary
+
+NO_ANSWER = -1
+UNSCORED = "-"
+
+RESCORE_CHUNK = 1000  # scans per re-score transaction
+
+SHAPE = (len(SUBJECTS), QUESTIONS_PER_SUBJECT)
+SCORE_COLUMNS = [f"{subject}_score" for subject in SUBJECTS]
+
+# exam -> ((rows, last row id), key array); see load_key()
+_keys = {}
+# Exams already warned about at ingest for having no key
+_unkeyed = set()
+
+
+def answer_array(answers_json):
+    """
+    (subjects, questions) int8 choice indexes of a sheet's answer JSON,
+    NO_ANSWER where blank.
+    """
+    answers = np.full(SHAPE, NO_ANSWER, dtype=np.int8)
+
+    for i, subject in enumerate(SUBJECTS):
+        for q, item in answers_json.get(subject, {}).get("answers", {}).items():
+            if item.get("answer") in CHOICES:
+                answers[i, int(q) - 1] = CHOICES.index(item["answer"])
+
+    return answers
+
+
+def parse_key(key_json):
+    """
+    (subjects, questions) key array from {"math": "ABCD-...", ...};
+    NO_ANSWER where a question is not scored.
+    """
+    key = np.full(SHAPE, NO_ANSWER, dtype=np.int8)
+
+    for subject, letters in key_json.items():
+        if subject not in SUBJECTS:
+            raise ValueError(f"Unknown subject in key: {subject}")
+        if len(letters) != QUESTIONS_PER_SUBJECT:
+            raise ValueError(f"{subject}: key needs {QUESTIONS_PER_SUBJECT} answers, got {len(letters)}.")
+
+        for q, letter in enumerate(letters.upper()):
+            if letter == UNSCORED:
+                continue
+            if letter not in CHOICES:
+                raise ValueError(f"{subject} {q + 1}: invalid key answer {letter!r}.")
+            key[SUBJECTS.index(subject), q] = CHOICES.index(letter)
+
+    return key
+
+
+def load_key(conn, exam, placeholder="?"):
+    """
+    Key array of exam, None when it has no key. Cached; the cheap
+    version query picks up corrections made by other processes.
+
+    conn is any DB-API connection with execute() (placeholder "%s" for
+    PostgreSQL, see db/postgres_storage.py).
+    """
+    version = tuple(conn.execute(
+        f"SELECT count(*), max(id) FROM answer_key WHERE exam = {placeholder}",
+        (exam,)
+    ).fetchone())
+
+    cached = _keys.get(exam)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    key = None
+    if version[0]:
+        key = np.full(SHAPE, NO_ANSWER, dtype=np.int8)
+        rows = conn.execute(
+            f"SELECT subject, question_number, answer FROM answer_key WHERE exam = {placeholder}",
+            (exam,)
+        )
+        for subject, question, answer in rows:
+            if subject in SUBJECTS and answer in CHOICES and 1 <= question <= QUESTIONS_PER_SUBJECT:
+                key[SUBJECTS.index(subject), question - 1] = CHOICES.index(answer)
+
+    _keys[exam] = (version, key)
+    return key
+
+
+def ingest_key(conn, exam, placeholder="?"):
+    """
+    load_key() for ingest: warns once per exam and process when the exam
+    has no key, so its scans are stored unscored.
+    """
+    key = load_key(conn, exam, placeholder)
+
+    if key is None and exam not in _unkeyed:
+        _unkeyed.add(exam)
+        print(
+            f"[WARN] exam {exam!r} has no answer key: scans are stored unscored "
+            f"until one is loaded (python scoring.py key {exam} <key.json>)"
+        )
+
+    return key
+
+
+def score(answers, key):
+    """
+    Score answer arrays (..., subjects, questions) against a key array.
+
+    Returns (correct, totals): correct per question, (..., subjects,
+    questions) bool, and correct answers per subject, (..., subjects).
+    Without a key nothing is correct.
+    """
+    if key is None:
+        correct = np.zeros(answers.shape, dtype=bool)
+    else:
+        correct = (answers == key) & (key != NO_ANSWER)
+
+    return correct, correct.sum(axis=-1)
+
+
+def max_score(key):
+    return 0 if key is None else int((key != NO_ANSWER).sum())
+
+
+# scan_score columns written at ingest, in scan_score_row() order
+SCAN_SCORE_COLUMNS = ["exam", "answers", *SCORE_COLUMNS, "total_score", "max_score"]
+
+
+def scan_score_row(exam, answers, totals, key):
+    """
+    A scan's scan_score values (SCAN_SCORE_COLUMNS): its answer array
+    and totals against key, NULL totals without a key.
+    """
+    if key is None:
+        return (exam, answers.tobytes(), *[None] * (len(SCORE_COLUMNS) + 1), 0)
+
+    return (
+        exam,
+        answers.tobytes(),
+        *totals.tolist(),
+        int(totals.sum()),
+        max_score(key),
+    )
+
+
+# scan_score columns re-scoring rewrites, and the summary counters
+# (db/summary.py) that add them up
+STORED_SCORES = ["max_score", "total_score", *SCORE_COLUMNS]
+SUMMARY_SUMS = ["scored_scans", "max_score_sum", "total_score_sum", *(f"{c}_sum" for c in SCORE_COLUMNS)]
+
+
+def stored_answers(blobs):
+    """
+    (scans, subjects, questions) answer arrays of scan_score blobs.
+    """
+    return np.frombuffer(b"".join(blobs), dtype=np.int8).reshape(-1, *SHAPE)
+
+
+def rescore_chunk(conn, scan_ids, answers, old_scores, key, items):
+    """
+    Rewrite totals and the is_correct of items (flat question indexes)
+    for one chunk of scans, and move the summaries by the difference
+    to old_scores ((scans, STORED_SCORES)), in one transaction.
+    """
+    correct, totals = score(answers, key)
+    assignments = ", ".join(f"{column} = ?" for column in SCORE_COLUMNS)
+    possible = max_score(key)
+
+    new_scores = np.column_stack([
+        np.full(len(scan_ids), possible),
+        totals.sum(axis=-1),
+        totals,
+    ])
+    deltas = np.column_stack([
+        (new_scores[:, 0] > 0).astype(int) - (old_scores[:, 0] > 0),
+        new_scores - old_scores,
+    ])
+
+    with conn:
+        add_scans(conn, scan_ids, SUMMARY_SUMS, deltas.tolist())
+
+        conn.executemany(
+            f"""
+            UPDATE scan_score
+            SET {assignments},
+                total_score = ?,
+                max_score = ?,
+                scored_at = CURRENT_TIMESTAMP
+            WHERE scan_id = ?
+            """,
+            [
+                (*subject_totals, sum(subject_totals), possible, scan_id)
+                if key is not None
+                else (*[None] * len(subject_totals), None, 0, scan_id)
+                for scan_id, subject_totals in zip(scan_ids, totals.tolist())
+            ],
+        )
+
+        flags = correct.reshape(len(scan_ids), -1)[:, items].astype(int).tolist()
+        questions = [
+            (SUBJECTS[i], int(q) + 1)
+            for i, q in zip(*np.unravel_index(items, SHAPE))
+        ]
+
+        conn.executemany(
+            """
+            UPDATE student_answer
+            SET is_correct = ?
+            WHERE scan_id = ? AND subject = ? AND question_number = ?
+                AND is_correct != ?
+            """,
+            [
+                (flag, scan_id, subject, question, flag)
+                for scan_id, scan_flags in zip(scan_ids, flags)
+                for flag, (subject, question) in zip(scan_flags, questions)
+            ],
+        )
+
+
+def rescore(conn, exam, questions=None, chunk=RESCORE_CHUNK):
+    """
+    Re-score the stored scans of exam against its current key.
+
+    Streams scan_score in scan id order, chunk scans per transaction.
+    questions: (subjects, questions) bool mask of the answers whose
+    is_correct is rewritten (all by default); totals are always
+    recomputed. Returns the number of scans.
+    """
+    key = load_key(conn, exam)
+    items = np.flatnonzero(np.ones(SHAPE, dtype=bool) if questions is None else questions)
+
+    total = conn.execute("SELECT count(*) FROM scan_score WHERE exam = ?", (exam,)).fetchone()[0]
+    done = 0
+    last_id = 0
+    started = time.perf_counter()
+
+    while True:
+        rows = conn.execute(
+            f"""
+            SELECT scan_id, answers, {", ".join(f"coalesce({c}, 0)" for c in STORED_SCORES)} FROM scan_score
+            WHERE exam = ? AND scan_id > ?
+            ORDER BY scan_id
+            LIMIT ?
+            """,
+            (exam, last_id, chunk)
+        ).fetchall()
+        if not rows:
+            break
+
+        scan_ids = [row[0] for row in rows]
+        rescore_chunk(
+            conn,
+            scan_ids,
+            stored_answers([row[1] for row in rows]),
+            np.array([row[2:] for row in rows], dtype=np.int64),
+            key,
+            items
+        )
+
+        done += len(rows)
+        last_id = scan_ids[-1]
+        elapsed = time.perf_counter() - started
+        print(
+            f"[RESCORE] {exam}: {done}/{total} scans "
+            f"({done / elapsed:.0f} scans/s, {done * len(items) / elapsed:.0f} answers/s)"
+        )
+
+    return done
+
+
+def backfill(conn, exam, chunk=RESCORE_CHUNK):
+    """
+    Give scans stored without a scan_score row (before scoring existed)
+    one under exam, their answer arrays rebuilt from student_answer.
+    Their totals and is_correct are set by the next rescore(). Returns
+    the number of scans.
+    """
+    done = 0
+    last_id = 0
+
+    while True:
+        scan_ids = [row[0] for row in conn.execute(
+            """
+            SELECT id FROM omr_scan
+            WHERE id > ? AND id NOT IN (SELECT scan_id FROM scan_score)
+            ORDER BY id
+            LIMIT ?
+            """,
+            (last_id, chunk)
+        )]
+        if not scan_ids:
+            break
+
+        rows = conn.execute(
+            f"""
+            SELECT scan_id, subject, question_number, answer FROM student_answer
+            WHERE scan_id IN ({", ".join("?" * len(scan_ids))})
+            """,
+            scan_ids
+        ).fetchall()
+
+        position = {scan_id: n for n, scan_id in enumerate(scan_ids)}
+        answers = np.full((len(scan_ids), *SHAPE), NO_ANSWER, dtype=np.int8)
+
+        for scan_id, subject, question, answer in rows:
+            if subject in SUBJECTS and answer in CHOICES and 1 <= question <= QUESTIONS_PER_SUBJECT:
+                answers[position[scan_id], SUBJECTS.index(subject), question - 1] = CHOICES.index(answer)
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO scan_score (scan_id, exam, answers) VALUES (?, ?, ?)",
+                [
+                    (scan_id, exam, scan_answers.tobytes())
+                    for scan_id, scan_answers in zip(scan_ids, answers)
+                ],
+            )
+
+        done += len(scan_ids)
+        last_id = scan_ids[-1]
+        print(f"[BACKFILL] {exam}: {done} scans")
+
+    return done
+
+
+def write_key(conn, exam, key):
+    """
+    Replace exam's key with a key array. Returns the (subjects,
+    questions) mask of changed questions (answer or scored / unscored).
+    """
+    old = load_key(conn, exam)
+    changed = key != (NO_ANSWER if old is None else old)
+
+    with conn:
+        conn.execute("DELETE FROM answer_key WHERE exam = ?", (exam,))
+        conn.executemany(
+            """
+            INSERT INTO answer_key (exam, subject, question_number, answer)
+            VALUES (?, ?, ?, ?)
+            """,
+            [
+                (exam, SUBJECTS[i], int(q) + 1, CHOICES[key[i, q]])
+                for i, q in zip(*np.nonzero(key != NO_ANSWER))
+            ],
+        )
+
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("key", help="load or replace an exam's key, re-scoring what changed")
+    load.add_argument("exam")
+    load.add_argument("key_json", type=Path)
+
+    full = commands.add_parser("rescore", help="re-score every stored scan of an exam")
+    full.add_argument("exam")
+    full.add_argument("--backfill", action="store_true", help="first give scans stored before scoring a scan_score row under exam")
+
+    for command in (load, full):
+        command.add_argument("--chunk", type=int, default=RESCORE_CHUNK, help="scans per transaction")
+
+    args = parser.parse_args()
+
+    # Keys, scan_score and the summaries below are read and written as
+    # SQLite; with another backend the scans are not in omr.db at all
+    if Config.STORAGE_BACKEND != "sqlite":
+        raise SystemExit(
+            f"[SCORING] STORAGE_BACKEND is {Config.STORAGE_BACKEND!r}: "
+            "keys and re-scoring only work on the sqlite backend"
+        )
+
+    conn = sqlite3.connect(Config.DB_PATH)
+    try:
+        ensure_schema(conn, Config.DB_PATH)
+        ensure_summary(conn, Config.DB_PATH)
+
+        if args.command == "key":
+            key = parse_key(json.loads(args.key_json.read_text()))
+            changed = write_key(conn, args.exam, key)
+            print(f"[KEY] {args.exam}: {max_score(key)} scored questions, {int(changed.sum())} changed")
+
+            if changed.any():
+                rescore(conn, args.exam, questions=changed, chunk=args.chunk)
+            return
+
+        if args.backfill:
+            backfill(conn, args.exam, chunk=args.chunk)
+
+        rescore(conn, args.exam, chunk=args.chunk)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
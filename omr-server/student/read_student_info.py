@@ -1,6 +1,19 @@
 import cv2
-import numpy as np
-from student.student_overlay_test import (
+from config import Config
+from reader.binarize import otsu_page
+from reader.illumination import INK_RATIO
+from reader.calibration import calibrated
+from reader.confidence import route_review
+from reader.engine import (
+    DIGITS,
+    MULTI_SELECT,
+    SINGLE_CHOICE,
+    TEXT,
+    Field,
+    SectionReader,
+    column
+)
+from student.student_grid import (
     build_last_name_grid,
     build_first_name_grid,
     build_mi_grid,
@@ -17,7 +30,7 @@ from student.student_overlay_test import (
 # ----------------------------
 # TEXT FIELD AGGREGATION HELPER
 # ----------------------------
-def aggregate_text_field(answer, details):
+def aggregate_text_field(answer, columns):
     """
     Production-grade aggregation for text fields.
 
@@ -30,7 +43,7 @@ def aggregate_text_field(answer, details):
         * average confidence < 0.70
     """
 
-    if not details:
+    if not columns:
         return {
             "answer": answer,
             "confidence": normalize_conf(0.00),
@@ -41,7 +54,7 @@ def aggregate_text_field(answer, details):
         }
 
     # Determine last meaningful column (last with selected char)
-    selected_columns = [col for col, data in details.items() if data.get("selected") is not None]
+    selected_columns = [col for col, data in enumerate(columns) if data.get("selected") is not None]
 
     if not selected_columns:
         return {
@@ -59,9 +72,7 @@ def aggregate_text_field(answer, details):
     has_multi = False
     internal_blank = False
 
-    for col in sorted(details.keys()):
-        col_data = details[col]
-
+    for col, col_data in enumerate(columns):
         # Ignore trailing blanks after last selected character
         if col > last_selected_col:
             continue
@@ -77,7 +88,7 @@ def aggregate_text_field(answer, details):
             # Blank before last selected character = internal gap
             internal_blank = True
         else:
-            confidences.append(confidence)
+            confidences.append(normalize_conf(confidence))
 
     # Compute field confidence
     if confidences:
@@ -96,13 +107,11 @@ def aggregate_text_field(answer, details):
 
     # Transform dict-based column details into deterministic digits array (ignore trailing blanks after last selected)
     digit_entries = []
-    for col in sorted(details.keys()):
+    for col, col_data in enumerate(columns):
         # Ignore trailing blanks after last selected character
         if col > last_selected_col:
             continue
 
-        col_data = details[col]
-
         digit_entries.append({
             "selected": col_data.get("selected"),
             "confidence": normalize_conf(col_data.get("confidence", 0.0)),
@@ -125,8 +134,16 @@ def aggregate_text_field(answer, details):
 # CONFIG
 # ----------------------------
 #IMAGE_PATH = "template/answer3.png" 
+# Tuned for the OTSU map ("global"). Normalized scores are close to
+# binary: on the synthetic truth sheets (clean, light pencil, shadowed)
+# marks score ~0.75 and blanks 0.00, so a lower fill cut only recovers
+# light marks (401 -> 344 misread columns of 1368 on the light set, no
+# false marks), and any review cut from 0.30 to 0.50 routes the same
+# fields; 0.70 adds 1-3% review without catching more. Pencil lighter
+# than INK_RATIO of the paper stays unread in this mode
 FILL_THRESHOLD = 0.55
-REVIEW_THRESHOLD = 0.70
+NORMALIZED_FILL_THRESHOLD = 0.20
+REVIEW_THRESHOLD = 0.50 if Config.PAGE_THRESHOLD_MODE == "normalized" else 0.70
 DOMINANCE_GAP = 0.07
 
 # Helper for normalizing confidence values
@@ -146,86 +163,110 @@ DIGITS_0_9 = [str(i) for i in range(10)]
 DIGITS_0_3 = [str(i) for i in range(4)]
 
 
-# ----------------------------
-# CORE DETECTION
-# ----------------------------
-def detect_name_from_grid(img, grid):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    # Reduce micro-noise from paper texture and print
-    gray = cv2.GaussianBlur(gray, (5, 5), 0)
-
-    # Use OTSU to separate graphite from light orange print
-    _, thresh = cv2.threshold(
-        gray,
-        0,
-        255,
-        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-    )
-
-    detected_name = ""
-    detailed = {}
-
-    for col in sorted(grid.keys()):
-        scores = {}
+FOUR_PS_OPTIONS = ["Yes", "No", "I don't know"]
 
-        for letter, (x, y) in grid[col].items():
-            x1 = int(x - ROI_WIDTH // 2)
-            x2 = int(x + ROI_WIDTH // 2)
-            y1 = int(y - ROI_HEIGHT // 2)
-            y2 = int(y + ROI_HEIGHT // 2)
+SPECIAL_CLASS_LABELS = [
+    "Special science class",
+    "Special educational class",
+    "Class under MISOSA",
+    "Class in a BRAC",
+    "ALIVE / Madrasah class"
+]
 
-            roi = thresh[y1:y2, x1:x2]
-            if roi.size == 0:
-                continue
+GENDER_LABELS = ["Male", "Female"]
 
-            # Apply circular mask to avoid counting outside-bubble noise
-            h, w = roi.shape
-            mask = np.zeros((h, w), dtype=np.uint8)
-            center = (w // 2, h // 2)
-            radius = min(w, h) // 2
-            cv2.circle(mask, center, radius, 255, -1)
-            roi = cv2.bitwise_and(roi, mask)
 
-            dark_pixels = cv2.countNonZero(roi)
-            fill_ratio = dark_pixels / float(roi.size)
-            scores[letter] = round(fill_ratio, 2)
+# ----------------------------
+# SECTION DECLARATION
+# ----------------------------
+def grid_columns(grid):
+    """
+    Calibration grid {col: {label: (x, y)}} -> engine columns.
+    """
+    return [
+        column(list(options.values()), [str(label) for label in options.keys()])
+        for _, options in sorted(grid.items())
+    ]
 
-        # Sort by fill strength
-        sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
 
-        if not sorted_scores:
-            detected_name += " "
-            continue
+def build_student_section(mode=Config.PAGE_THRESHOLD_MODE):
+    threshold = NORMALIZED_FILL_THRESHOLD if mode == "normalized" else FILL_THRESHOLD
 
-        top_letter, top_score = sorted_scores[0]
+    # Name bubbles sit close to printed letters, so only the inscribed
+    # circle of each ROI is counted
+    name = dict(
+        threshold=threshold,
+        dominance_gap=DOMINANCE_GAP,
+        roi_size=(ROI_WIDTH, ROI_HEIGHT),
+        mask="circle",
+        group="name"
+    )
+    plain = dict(
+        threshold=threshold,
+        roi_size=(ROI_WIDTH, ROI_HEIGHT),
+        group="mark"
+    )
 
-        # Get second score for dominance rule
-        second_score = sorted_scores[1][1] if len(sorted_scores) > 1 else 0
+    fields = [
+        Field("last_name", TEXT, grid_columns(build_last_name_grid()), **name),
+        Field("first_name", TEXT, grid_columns(build_first_name_grid()), **name),
+        Field("middle_initial", TEXT, grid_columns(build_mi_grid()), **name),
+        Field(
+            "birth_month",
+            SINGLE_CHOICE,
+            [column(list(build_month_grid().values()), MONTH_ROWS)],
+            **plain
+        ),
+        Field(
+            "birth_day",
+            DIGITS,
+            grid_columns(build_day_grid()),
+            dominance_gap=DOMINANCE_GAP,
+            **plain
+        ),
+        Field(
+            "birth_year",
+            DIGITS,
+            grid_columns(build_year_grid()),
+            dominance_gap=DOMINANCE_GAP,
+            **plain
+        ),
+        Field(
+            "ssc",
+            MULTI_SELECT,
+            [column(list(build_ssc_grid().values()), ["Yes"])],
+            **plain
+        ),
+        Field(
+            "four_ps",
+            SINGLE_CHOICE,
+            [column(list(build_4ps_grid().values()), FOUR_PS_OPTIONS)],
+            **plain
+        ),
+        Field(
+            "special_classes",
+            MULTI_SELECT,
+            [column(list(build_special_class_grid().values()), SPECIAL_CLASS_LABELS)],
+            **plain
+        ),
+        Field(
+            "gender",
+            SINGLE_CHOICE,
+            [column(list(build_gender_grid().values()), GENDER_LABELS)],
+            **plain
+        ),
+        Field("lrn", DIGITS, grid_columns(build_lrn_grid()), **plain),
+    ]
 
-        if top_score < FILL_THRESHOLD:
-            detected_name += " "
-            status = "blank"
-            selected_letter = None
+    if mode == "normalized":
+        # Each ROI against the paper level under it: immune to shadows
+        return SectionReader(fields, ink_ratio=INK_RATIO)
 
-        elif (top_score - second_score) >= DOMINANCE_GAP:
-            detected_name += top_letter
-            status = "single"
-            selected_letter = top_letter
+    # One blurred OTSU map serves every student field
+    return SectionReader(fields, binarize=otsu_page)
 
-        else:
-            # Ambiguous (dominance gap too small) → force review
-            detected_name += " "
-            status = "multi"
-            selected_letter = None
-
-        detailed[col] = {
-            "selected": selected_letter,
-            "confidence": round(top_score, 2),
-            "status": status,
-            "scores": scores
-        }
 
-    return detected_name.strip(), detailed
+STUDENT_SECTION = calibrated(build_student_section(), "student")
 
 
 # ----------------------------
@@ -234,49 +275,39 @@ def detect_name_from_grid(img, grid):
 def read_student_info(
     img
 ):
-    # Build grids from calibration
-    last_grid = build_last_name_grid()
-    first_grid = build_first_name_grid()
-    mi_grid = build_mi_grid()
-    month_grid = build_month_grid()
-    day_grid = build_day_grid()
-    year_grid = build_year_grid()
-    ssc_grid = build_ssc_grid()
-    four_ps_grid = build_4ps_grid()
-    special_class_grid = build_special_class_grid()
-    gender_grid = build_gender_grid()
-    lrn_grid = build_lrn_grid()     
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    return read_student_info_gray(gray)
 
 
+def read_student_info_gray(gray, illumination=None):
+    """
+    read_student_info over an already converted grayscale page.
+    """
+    fields = STUDENT_SECTION.read(gray, illumination)
+
+    return route_review(student_fields_to_json(fields), fields)
+
+
+def student_fields_to_json(fields):
     # --- NAME ---
-    last_name, last_detail = detect_name_from_grid(img, last_grid)
-    first_name, first_detail = detect_name_from_grid(img, first_grid)
-    mi, mi_detail = detect_name_from_grid(img, mi_grid)
+    last_name = fields["last_name"]
+    first_name = fields["first_name"]
+    mi = fields["middle_initial"]
 
     # # --- BIRTH + SSC ---
-    birth_info = read_birth_and_ssc(
-        img,
-        month_grid,
-        day_grid,
-        year_grid,
-        ssc_grid
-    )
+    birth_info = read_birth_and_ssc(fields)
 
     # # --- 4Ps / Special Classes / Gender ---
-    flags_info = read_student_flags(
-        img,
-        four_ps_grid,
-        special_class_grid,
-        gender_grid
-    )
+    flags_info = read_student_flags(fields)
 
     # # --- LRN (12-digit numeric) ---
-    lrn = read_lrn(img, lrn_grid)
+    lrn = read_lrn(fields)
 
     return {
-        "last_name": aggregate_text_field(last_name, last_detail),
-        "first_name": aggregate_text_field(first_name, first_detail),
-        "middle_initial": aggregate_text_field(mi, mi_detail),
+        "last_name": aggregate_text_field(last_name["value"], last_name["columns"]),
+        "first_name": aggregate_text_field(first_name["value"], first_name["columns"]),
+        "middle_initial": aggregate_text_field(mi["value"], mi["columns"]),
         "birth_month": birth_info["birth_month"],
         "birth_day": birth_info["birth_day"],
         "birth_year": birth_info["birth_year"],
@@ -291,74 +322,11 @@ def read_student_info(
 # ----------------------------
 # BIRTHDATE & SSC READER
 # ----------------------------
-def read_birth_and_ssc(img, month_grid, day_grid, year_grid, ssc_grid):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (5, 5), 0)
-
-    _, thresh = cv2.threshold(
-        gray,
-        0,
-        255,
-        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-    )
-
-    def read_single_column(grid, labels):
-        scores = {}
-        for label, (x, y) in grid.items():
-            x1 = int(x - ROI_WIDTH // 2)
-            x2 = int(x + ROI_WIDTH // 2)
-            y1 = int(y - ROI_HEIGHT // 2)
-            y2 = int(y + ROI_HEIGHT // 2)
-
-            roi = thresh[y1:y2, x1:x2]
-            if roi.size == 0:
-                continue
-
-            dark_pixels = cv2.countNonZero(roi)
-            fill_ratio = dark_pixels / float(roi.size)
-            scores[label] = round(fill_ratio, 2)
-
-        sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        if not sorted_scores:
-            return None
-
-        top_label, top_score = sorted_scores[0]
-        second_score = sorted_scores[1][1] if len(sorted_scores) > 1 else 0
-
-        if top_score >= FILL_THRESHOLD and (top_score - second_score) >= DOMINANCE_GAP:
-            return top_label
-        return None
-
+def read_birth_and_ssc(fields):
     # MONTH (categorical with full option scoring)
-    month_scores = {}
-    for label, (x, y) in month_grid.items():
-        x1 = int(x - ROI_WIDTH // 2)
-        x2 = int(x + ROI_WIDTH // 2)
-        y1 = int(y - ROI_HEIGHT // 2)
-        y2 = int(y + ROI_HEIGHT // 2)
-
-        roi = thresh[y1:y2, x1:x2]
-        if roi.size == 0:
-            continue
-
-        dark_pixels = cv2.countNonZero(roi)
-        fill_ratio = dark_pixels / float(roi.size)
-        month_scores[label] = round(fill_ratio, 2)
-
-    month = None
-    month_confidence = 0.0
-
-    if month_scores:
-        sorted_month = sorted(month_scores.items(), key=lambda x: x[1], reverse=True)
-        top_label, top_score = sorted_month[0]
-        second_score = sorted_month[1][1] if len(sorted_month) > 1 else 0
-
-        if top_score >= FILL_THRESHOLD:
-            month = MONTH_ROWS[int(top_label)]
-            month_confidence = top_score
-
-    # Replace return month in dict later
-    month_confidence = round(month_confidence, 2)
+    month_col = fields["birth_month"]["columns"][0]
+    month = fields["birth_month"]["value"]
+    month_confidence = round(month_col["confidence"], 2) if month else 0.0
 
     month_result = {
         "answer": month,
@@ -366,21 +334,16 @@ def read_birth_and_ssc(img, month_grid, day_grid, year_grid, ssc_grid):
         "review_required": (month is None) or (normalize_conf(month_confidence) < REVIEW_THRESHOLD),
         "details": {
             "scores": {
-                MONTH_ROWS[int(k)]: normalize_conf(v) for k, v in month_scores.items()
+                k: normalize_conf(v) for k, v in month_col["scores"].items()
             }
         }
     }
 
     # DAY (2 columns: first = tens 0–3, second = ones 0–9)
     day = None
-    tens = None
-    ones = None
-
-    day_cols = sorted(day_grid.keys())
-
-    if len(day_cols) >= 2:
-        tens = read_single_column(day_grid[day_cols[0]], DIGITS_0_3)
-        ones = read_single_column(day_grid[day_cols[1]], DIGITS_0_9)
+    tens_col, ones_col = fields["birth_day"]["columns"]
+    tens = tens_col["selected"]
+    ones = ones_col["selected"]
 
     if tens is not None and ones is not None:
         day_val = int(tens) * 10 + int(ones)
@@ -389,68 +352,18 @@ def read_birth_and_ssc(img, month_grid, day_grid, year_grid, ssc_grid):
 
     # YEAR (2 columns 0–9 each) — use dominance gap and return confidence
     year = None
-    year_cols = sorted(year_grid.keys())
-
-    y1 = y2 = None
-    y1_conf = y2_conf = 0.0
-
-    def read_year_column(grid):
-        scores = {}
-
-        # Use explicit digit labels from calibration grid
-        for digit_label, (x, y) in grid.items():
-            x1 = int(x - ROI_WIDTH // 2)
-            x2 = int(x + ROI_WIDTH // 2)
-            y1 = int(y - ROI_HEIGHT // 2)
-            y2 = int(y + ROI_HEIGHT // 2)
-
-            roi = thresh[y1:y2, x1:x2]
-            if roi.size == 0:
-                continue
-
-            dark_pixels = cv2.countNonZero(roi)
-            fill_ratio = dark_pixels / float(roi.size)
-
-            scores[str(digit_label)] = round(fill_ratio, 2)
-
-        if not scores:
-            return None, 0.0
-
-        sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-
-        top_label, top_score = sorted_scores[0]
-        second_score = sorted_scores[1][1] if len(sorted_scores) > 1 else 0.0
-
-        if top_score >= FILL_THRESHOLD and (top_score - second_score) >= DOMINANCE_GAP:
-            return top_label, top_score
-
-        return None, 0.0
+    year_cols = fields["birth_year"]["columns"]
 
-    if len(year_cols) >= 2:
-        y1, y1_conf = read_year_column(year_grid[year_cols[0]])
-        y2, y2_conf = read_year_column(year_grid[year_cols[1]])
+    y1 = year_cols[0]["selected"]
+    y2 = year_cols[1]["selected"]
+    y1_conf = round(year_cols[0]["confidence"], 2) if y1 is not None else 0.0
+    y2_conf = round(year_cols[1]["confidence"], 2) if y2 is not None else 0.0
 
-        if y1 is not None and y2 is not None:
-            year = y1 + y2
+    if y1 is not None and y2 is not None:
+        year = y1 + y2
 
     # SSC (single bubble, no dominance rule)
-    ssc = False
-    for _, (x, y) in ssc_grid.items():
-        ssc_x1 = int(x - ROI_WIDTH // 2)
-        ssc_x2 = int(x + ROI_WIDTH // 2)
-        ssc_y1 = int(y - ROI_HEIGHT // 2)
-        ssc_y2 = int(y + ROI_HEIGHT // 2)
-
-        roi = thresh[ssc_y1:ssc_y2, ssc_x1:ssc_x2]
-        if roi.size == 0:
-            continue
-
-        dark_pixels = cv2.countNonZero(roi)
-        fill_ratio = dark_pixels / float(roi.size)
-
-        if fill_ratio >= FILL_THRESHOLD:
-            ssc = True
-            break
+    ssc = bool(fields["ssc"]["value"])
 
     # Conservative confidence: weakest digit governs the field
     day_confidence = min(
@@ -507,7 +420,7 @@ def read_birth_and_ssc(img, month_grid, day_grid, year_grid, ssc_grid):
                         for d in DIGITS_0_9
                     }
                 }
-            ] if len(year_cols) >= 2 else []
+            ]
         }
     }
 
@@ -537,92 +450,24 @@ def read_birth_and_ssc(img, month_grid, day_grid, year_grid, ssc_grid):
 # ----------------------------
 # 4Ps / SPECIAL CLASSES / GENDER READER
 # ----------------------------
-def read_student_flags(img, four_ps_grid, special_class_grid, gender_grid):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (5, 5), 0)
-
-    _, thresh = cv2.threshold(
-        gray,
-        0,
-        255,
-        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-    )
-
-    def bubble_filled(x, y):
-        x1 = int(x - ROI_WIDTH // 2)
-        x2 = int(x + ROI_WIDTH // 2)
-        y1 = int(y - ROI_HEIGHT // 2)
-        y2 = int(y + ROI_HEIGHT // 2)
-
-        roi = thresh[y1:y2, x1:x2]
-        if roi.size == 0:
-            return False
-
-        dark_pixels = cv2.countNonZero(roi)
-        fill_ratio = dark_pixels / float(roi.size)
-        return fill_ratio >= FILL_THRESHOLD
-
+def read_student_flags(fields):
     # ---- 4Ps (single select, 3 options)
-    four_ps_options = ["Yes", "No", "I don't know"]
-    four_ps = None
-
-    for idx, (x, y) in four_ps_grid.items():
-        if bubble_filled(x, y):
-            four_ps = four_ps_options[idx]
-            break
+    four_ps = fields["four_ps"]["value"]
 
     # ---- Special Classes (multi-select)
-    special_labels = [
-        "Special science class",
-        "Special educational class",
-        "Class under MISOSA",
-        "Class in a BRAC",
-        "ALIVE / Madrasah class"
-    ]
-
-    selected_special = []
-    for idx, (x, y) in special_class_grid.items():
-        if bubble_filled(x, y):
-            selected_special.append(special_labels[idx])
+    selected_special = fields["special_classes"]["value"]
 
     # ---- Gender (single select)
-    gender_labels = ["Male", "Female"]
-    gender_scores = {}
-
-    for idx, (x, y) in gender_grid.items():
-        x1 = int(x - ROI_WIDTH // 2)
-        x2 = int(x + ROI_WIDTH // 2)
-        y1 = int(y - ROI_HEIGHT // 2)
-        y2 = int(y + ROI_HEIGHT // 2)
-
-        roi = thresh[y1:y2, x1:x2]
-        if roi.size == 0:
-            continue
-
-        dark_pixels = cv2.countNonZero(roi)
-        fill_ratio = dark_pixels / float(roi.size)
-        gender_scores[gender_labels[idx]] = round(fill_ratio, 2)
-
-    gender = None
-    gender_confidence = 0.0
-
-    if gender_scores:
-        sorted_gender = sorted(gender_scores.items(), key=lambda x: x[1], reverse=True)
-        top_label, top_score = sorted_gender[0]
-        second_score = sorted_gender[1][1] if len(sorted_gender) > 1 else 0
-
-        if top_score >= FILL_THRESHOLD:
-            gender = top_label
-            gender_confidence = top_score
-
-    gender_confidence = round(gender_confidence, 2)
+    gender_col = fields["gender"]["columns"][0]
+    gender = fields["gender"]["value"]
+    gender_confidence = round(gender_col["confidence"], 2) if gender else 0.0
 
     gender_result = {
         "answer": gender,
         "confidence": normalize_conf(gender_confidence),
         "review_required": (gender is None) or (normalize_conf(gender_confidence) < REVIEW_THRESHOLD),
         "details": {
-            "scores": {k: normalize_conf(v) for k, v in gender_scores.items()}
+            "scores": {k: normalize_conf(v) for k, v in gender_col["scores"].items()}
         }
     }
 
@@ -635,7 +480,7 @@ def read_student_flags(img, four_ps_grid, special_class_grid, gender_grid):
         "details": {
             "scores": {
                 opt: (normalize_conf(four_ps_conf) if opt == four_ps else normalize_conf(1.00 - four_ps_conf))
-                for opt in ["Yes", "No", "I don't know"]
+                for opt in FOUR_PS_OPTIONS
             }
         }
     }
@@ -649,13 +494,7 @@ def read_student_flags(img, four_ps_grid, special_class_grid, gender_grid):
         "details": {
             "scores": {
                 label: normalize_conf(1.00 if label in selected_special else 0.00)
-                for label in [
-                    "Special science class",
-                    "Special educational class",
-                    "Class under MISOSA",
-                    "Class in a BRAC",
-                    "ALIVE / Madrasah class"
-                ]
+                for label in SPECIAL_CLASS_LABELS
             }
         }
     }
@@ -670,47 +509,11 @@ def read_student_flags(img, four_ps_grid, special_class_grid, gender_grid):
 # ----------------------------
 # LRN READER
 # ----------------------------
-def read_lrn(img, lrn_grid):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    gray = cv2.GaussianBlur(gray, (5, 5), 0)
-
-    _, thresh = cv2.threshold(
-        gray,
-        0,
-        255,
-        cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-    )
-
-    lrn_digits = []
-
-    for col in sorted(lrn_grid.keys()):
-        scores = {}
-
-        for digit, (x, y) in lrn_grid[col].items():
-            x1 = int(x - ROI_WIDTH // 2)
-            x2 = int(x + ROI_WIDTH // 2)
-            y1 = int(y - ROI_HEIGHT // 2)
-            y2 = int(y + ROI_HEIGHT // 2)
-
-            roi = thresh[y1:y2, x1:x2]
-            if roi.size == 0:
-                continue
-
-            dark_pixels = cv2.countNonZero(roi)
-            fill_ratio = dark_pixels / float(roi.size)
-            scores[digit] = round(fill_ratio, 2)
-
-        if not scores:
-            lrn_digits.append("")
-            continue
-
-        top_digit, top_score = max(scores.items(), key=lambda x: x[1])
-        top_score = round(top_score, 2)
-
-        if top_score >= FILL_THRESHOLD:
-            lrn_digits.append(str(top_digit))
-        else:
-            lrn_digits.append("")
+def read_lrn(fields):
+    lrn_digits = [
+        col["selected"] or ""
+        for col in fields["lrn"]["columns"]
+    ]
 
     digit_details = []
     digit_confidences = []
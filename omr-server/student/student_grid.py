@@ -0,0 +1,294 @@
+"""
+Student section bubble geometry: calibration points and grid builders.
+
+Pure Python so the readers can import it without pulling in OpenCV or
+the overlay tooling (see student_overlay_test.py).
+"""
+
+ROWS = [
+    "A","B","C","D","E","F","G","H","I","J",
+    "K","L","M","N","O","P","Q","R","S","T",
+    "U","V","W","X","Y","Z","Ñ","-"
+]
+
+ROW_COUNT = len(ROWS)
+
+# Provided calibration clicks (LAST NAME)
+# 1: Column 1 - A
+# 2: Column 1 - -
+# 3: Column 2 - A
+col1_A = (307, 597)
+col1_dash = (307, 1908)
+col2_A = (354, 595)
+
+# Manually mapped Column-A positions (add more if needed)
+# Currently using first two detected columns
+COLUMN_A_POINTS = [
+    (307, 597),
+    (356, 596),
+    (403, 595),
+    (451, 597),
+    (501, 595),
+    (549, 597),
+    (598, 596),
+    (646, 598),
+    (695, 596),
+    (744, 596),
+    (793, 595),
+    (841, 597),
+    (890, 596),
+    (939, 597),
+    (987, 596),
+]
+
+base_row_y = sum(pt[1] for pt in COLUMN_A_POINTS) / len(COLUMN_A_POINTS)
+
+# FIRST NAME calibration
+first_col1_A = (1085, 596)
+first_col1_dash = (1083, 1907)
+
+FIRST_COLUMN_A_POINTS = [
+    (1085, 596),
+    (1133, 596),
+    (1181, 596),
+    (1230, 596),
+    (1279, 596),
+    (1328, 596),
+    (1376, 596),
+    (1424, 596),
+    (1474, 596),
+    (1523, 596),
+    (1571, 596),
+    (1620, 596),
+    (1668, 596),
+    (1717, 598),
+    (1764, 596),
+    (1813, 596),
+    (1862, 596),
+    (1910, 596),
+    (1959, 598),
+]
+
+first_base_row_y = sum(pt[1] for pt in FIRST_COLUMN_A_POINTS) / len(FIRST_COLUMN_A_POINTS)
+first_vertical_spacing = (first_col1_dash[1] - first_col1_A[1]) / (ROW_COUNT - 1)
+
+
+vertical_spacing = (col1_dash[1] - col1_A[1]) / (ROW_COUNT - 1)
+
+# MI calibration
+mi_col1_A = (2057, 598)
+mi_col1_dash = (2056, 1907)
+
+MI_COLUMN_A_POINTS = [
+    (2058, 596),
+    (2106, 597),
+]
+
+# =============================
+# BIRTH DATE CALIBRATION
+# =============================
+
+# MONTH (JAN–DEC)
+MONTH_TOP = (1910, 2783)
+MONTH_BOTTOM = (1910, 3318)
+MONTH_COUNT = 12
+
+# DAY (2 columns)
+# Column 1 = 0–3
+DAY_COL1_TOP = (2105, 2880)
+DAY_COL1_BOTTOM = (2105, 3027)
+DAY_COL1_ROWS = 4
+
+# Column 2 = 0–9
+DAY_COL2_TOP = (2154, 2879)
+DAY_COL2_ROWS = 10
+
+# YEAR (2 columns, 0–9 each)
+YEAR_COL1_TOP = (2202, 2879)
+YEAR_COL1_BOTTOM = (2202, 3319)
+YEAR_COL2_TOP = (2251, 2880)
+YEAR_ROWS = 10
+
+
+# SSC
+SSC_POINT = (1958, 3462)
+
+# =============================
+# 4Ps / SPECIAL CLASSES / GENDER
+# =============================
+
+# 4Ps (Yes, No, I don't know)
+FOUR_PS_POINTS = [
+    (178, 3951),   # Yes
+    (373, 3950),   # No
+    (568, 3952),   # I don't know
+]
+
+# Special Classes (left → right, top row first)
+SPECIAL_CLASS_POINTS = [
+    (859, 3949),   # Special science class
+    (859, 3999),   # Special educational class
+    (1297, 3950),  # Class under MISOSA
+    (1296, 3998),  # Class in a BRAC
+    (1685, 3950),  # ALIVE / Madrasah class
+]
+
+# Gender (Male, Female)
+
+GENDER_POINTS = [
+    (2172, 3951),  # Male
+    (2173, 3999),  # Female
+]
+
+# =============================
+# LRN (Learner Reference Number)
+# =============================
+
+# Column 1 vertical calibration
+LRN_COL1_TOP = (1716, 2103)      # digit 0
+LRN_COL1_BOTTOM = (1715, 2540)   # digit 9
+LRN_ROWS = 10
+
+# Column 0-digit positions for all columns (for horizontal spacing)
+LRN_COLUMN_0_POINTS = [
+    (1715, 2101),
+    (1764, 2102),
+    (1813, 2102),
+    (1862, 2102),
+    (1910, 2102),
+    (1958, 2100),
+    (2006, 2101),
+    (2056, 2101),
+    (2105, 2102),
+    (2153, 2101),
+    (2203, 2102),
+    (2251, 2101),
+]
+
+def build_last_name_grid():
+    grid = {}
+
+    for col_index, (col_x, _) in enumerate(COLUMN_A_POINTS):
+        column_dict = {}
+
+        for r in range(ROW_COUNT):
+            y = base_row_y + r * vertical_spacing
+            column_dict[ROWS[r]] = (int(round(col_x)), int(round(y)))
+
+        grid[col_index] = column_dict
+
+    return grid
+
+
+# Build FIRST NAME grid
+def build_first_name_grid():
+    grid = {}
+
+    for col_index, (col_x, _) in enumerate(FIRST_COLUMN_A_POINTS):
+        column_dict = {}
+
+        for r in range(ROW_COUNT):
+            y = first_base_row_y + r * first_vertical_spacing
+            column_dict[ROWS[r]] = (int(round(col_x)), int(round(y)))
+
+        grid[col_index] = column_dict
+
+    return grid
+
+
+def build_mi_grid():
+    grid = {}
+
+    mi_base_row_y = sum(pt[1] for pt in MI_COLUMN_A_POINTS) / len(MI_COLUMN_A_POINTS)
+    mi_vertical_spacing = (mi_col1_dash[1] - mi_col1_A[1]) / (ROW_COUNT - 1)
+
+    for col_index, (col_x, _) in enumerate(MI_COLUMN_A_POINTS):
+        column_dict = {}
+
+        for r in range(ROW_COUNT):
+            y = mi_base_row_y + r * mi_vertical_spacing
+            column_dict[ROWS[r]] = (int(round(col_x)), int(round(y)))
+
+        grid[col_index] = column_dict
+
+    return grid
+
+
+
+# ----------------------------
+# BIRTH GRID BUILDERS
+# ----------------------------
+
+def build_month_grid():
+    grid = {}
+    vertical_spacing = (MONTH_BOTTOM[1] - MONTH_TOP[1]) / (MONTH_COUNT - 1)
+
+    for r in range(MONTH_COUNT):
+        y = MONTH_TOP[1] + r * vertical_spacing
+        grid[r] = (int(round(MONTH_TOP[0])), int(round(y)))
+
+    return grid
+
+
+def build_day_grid():
+    grid = {}
+
+    # Column 1 (0–3)
+    col1_spacing = (DAY_COL1_BOTTOM[1] - DAY_COL1_TOP[1]) / (DAY_COL1_ROWS - 1)
+    grid[0] = {}
+    for r in range(DAY_COL1_ROWS):
+        y = DAY_COL1_TOP[1] + r * col1_spacing
+        grid[0][r] = (int(round(DAY_COL1_TOP[0])), int(round(y)))
+
+    # Column 2 (0–9)
+    grid[1] = {}
+    for r in range(DAY_COL2_ROWS):
+        y = DAY_COL1_TOP[1] + r * col1_spacing
+        grid[1][r] = (int(round(DAY_COL2_TOP[0])), int(round(y)))
+
+    return grid
+
+
+def build_year_grid():
+    grid = {}
+    vertical_spacing = (YEAR_COL1_BOTTOM[1] - YEAR_COL1_TOP[1]) / (YEAR_ROWS - 1)
+
+    col_x = [YEAR_COL1_TOP[0], YEAR_COL2_TOP[0]]
+
+    for col in range(2):
+        grid[col] = {}
+        for r in range(YEAR_ROWS):
+            y = YEAR_COL1_TOP[1] + r * vertical_spacing
+            grid[col][r] = (int(round(col_x[col])), int(round(y)))
+
+    return grid
+
+
+def build_ssc_grid():
+    return {0: SSC_POINT}
+
+
+# 4Ps, Special Classes, Gender grid builders
+def build_4ps_grid():
+    return {i: pt for i, pt in enumerate(FOUR_PS_POINTS)}
+
+def build_special_class_grid():
+    return {i: pt for i, pt in enumerate(SPECIAL_CLASS_POINTS)}
+
+
+def build_gender_grid():
+    return {i: pt for i, pt in enumerate(GENDER_POINTS)}
+
+# LRN grid builder
+def build_lrn_grid():
+    grid = {}
+
+    vertical_spacing = (LRN_COL1_BOTTOM[1] - LRN_COL1_TOP[1]) / (LRN_ROWS - 1)
+
+    for col_index, (col_x, _) in enumerate(LRN_COLUMN_0_POINTS):
+        grid[col_index] = {}
+        for r in range(LRN_ROWS):
+            y = LRN_COL1_TOP[1] + r * vertical_spacing
+            grid[col_index][r] = (int(round(col_x)), int(round(y)))
+
+    return grid
@@ -0,0 +1,196 @@
+"""
+Train the review-routing confidence tables (reader/confidence.py).
+
+Input: a folder of sheets <stem>.png, each with a <stem>.truth.json
+holding its marked bubbles as {"x,y": ...}: bubble centers in page px,
+as declared in the grids (values are ignored). Synthetic sheets and
+scans whose marks a reviewer confirmed both work.
+
+Every column of every section is read as at runtime and labeled correct
+when its decision matches the marks. Every HOLDOUT-th sheet is held out
+first: the report compares, per section, the readers' own review rules
+with routing by P(correct) at a few REVIEW_MAX_ERROR values (share of
+fields sent to review, share of wrong fields that are not). The tables
+written to out.json are then trained on all sheets.
+
+Usage (from omr-server/):
+    python train_confidence.py <sheets_dir> [out.json]
+"""
+import json
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from answers.read_answers import answers_to_json, decide_answers
+from assets import field_path, flagged_fields, section_readers
+from config import Config
+from reader.confidence import fit_table
+from reader.engine import BLANK, MULTI, MULTI_SELECT, SINGLE
+from reader.illumination import Illumination
+from school.current.curr_read_info import current_school_fields_to_json
+from school.previous.prev_read_info import previous_school_fields_to_json
+from student.read_student_info import student_fields_to_json
+
+HOLDOUT = 4
+MAX_ERRORS = [0.001, 0.005, 0.01, 0.02, 0.05]
+
+# Section JSON with the readers' own review rules
+READER_JSON = {
+    "student": lambda section, scores, decision: student_fields_to_json(section.to_fields(scores, decision)),
+    "previous_school": lambda section, scores, decision: previous_school_fields_to_json(section.to_fields(scores, decision)),
+    "current_school": lambda section, scores, decision: current_school_fields_to_json(section.to_fields(scores, decision)),
+    "answers": lambda section, scores, decision: answers_to_json(*decide_answers(scores)),
+}
+
+
+def column_marks(section, marked):
+    """
+    Marked option indices of every column, and whether it belongs to a
+    MULTI_SELECT field.
+    """
+    marks = []
+    multi_select = []
+
+    for field in section.fields:
+        for col in field.columns:
+            marks.append({
+                i for i, (_, (x, y)) in enumerate(col)
+                if f"{int(x)},{int(y)}" in marked
+            })
+            multi_select.append(field.kind == MULTI_SELECT)
+
+    return marks, multi_select
+
+
+def correct_columns(section, scores, decision, marks, multi_select):
+    """
+    (columns,) booleans: the decision matches the marks.
+    """
+    candidates = section.column_scores(scores)
+    status = decision["status"]
+    top_idx = decision["top_idx"]
+    thresholds = decision["threshold"]
+
+    correct = np.zeros(len(marks), dtype=bool)
+
+    for c, marked in enumerate(marks):
+        if multi_select[c]:
+            correct[c] = set(np.flatnonzero(candidates[c] >= thresholds[c])) == marked
+        elif not marked:
+            correct[c] = status[c] == BLANK
+        elif len(marked) == 1:
+            correct[c] = status[c] == SINGLE and top_idx[c] in marked
+        else:
+            correct[c] = status[c] == MULTI
+
+    return correct
+
+
+def read_sheet(path, sections):
+    """
+    {section: (status, features, correct, flagged)} of one labeled sheet;
+    flagged marks the fields the reader's own rule sends to review.
+    """
+    marked = json.loads(path.with_suffix(".truth.json").read_text())
+    gray = cv2.cvtColor(cv2.imread(str(path)), cv2.COLOR_BGR2GRAY)
+    illumination = Illumination(gray)
+
+    samples = {}
+
+    for name, section in sections.items():
+        scores = section.score(gray, illumination)
+        decision = section.decide(scores)
+
+        marks, multi_select = column_marks(section, marked)
+        features = section.column_features(scores, decision, section.paper(illumination))
+        correct = correct_columns(section, scores, decision, marks, multi_select)
+
+        flagged = set(flagged_fields({name: READER_JSON[name](section, scores, decision)}))
+        reader_flags = np.array([
+            field_path(name, field.name) in flagged for field in section.fields
+        ])
+
+        samples[name] = (decision["status"], np.stack(features), correct, reader_flags)
+
+    return samples
+
+
+def field_p(section, p_columns):
+    return np.array([np.prod(p_columns[start:stop]) for start, stop in section.field_columns])
+
+
+def field_correct(section, correct):
+    return np.array([correct[start:stop].all() for start, stop in section.field_columns])
+
+
+def routing_line(label, review, wrong):
+    missed = (wrong & ~review).sum()
+    return (
+        f"  {label:<22} review {review.mean():6.1%}  "
+        f"missed {missed:4d} / {wrong.sum()} wrong fields"
+    )
+
+
+def report(name, section, train, held):
+    status, features, correct, _ = (np.concatenate(parts, axis=-1) for parts in zip(*train))
+    table = fit_table(status, features, correct)
+
+    reader_review = []
+    p_fields = []
+    wrong = []
+    for status, features, correct, flags in held:
+        reader_review.append(flags)
+        p_fields.append(field_p(section, table.lookup(status, features)))
+        wrong.append(~field_correct(section, correct))
+
+    reader_review = np.concatenate(reader_review)
+    p_fields = np.concatenate(p_fields)
+    wrong = np.concatenate(wrong)
+
+    print(f"{name}: {len(held)} held-out sheets, {len(wrong)} fields")
+    print(routing_line("reader rules", reader_review, wrong))
+    for max_error in MAX_ERRORS:
+        print(routing_line(f"REVIEW_MAX_ERROR={max_error}", p_fields < 1 - max_error, wrong))
+
+
+def main(sheets_dir: Path, out: Path):
+    sections = section_readers()
+    sheets = sorted(p for p in sheets_dir.glob("*.png") if p.with_suffix(".truth.json").is_file())
+    if not sheets:
+        print(f"[ERROR] No labeled sheets in {sheets_dir}")
+        return
+
+    samples = [read_sheet(path, sections) for path in sheets]
+    print(f"{len(sheets)} labeled sheets\n")
+
+    tables = {}
+    for name, section in sections.items():
+        per_sheet = [sheet[name] for sheet in samples]
+
+        held = per_sheet[HOLDOUT - 1::HOLDOUT]
+        train = [s for i, s in enumerate(per_sheet) if i % HOLDOUT != HOLDOUT - 1]
+        if held and train:
+            report(name, section, train, held)
+
+        status, features, correct, _ = (np.concatenate(parts, axis=-1) for parts in zip(*per_sheet))
+        tables[name] = {
+            **fit_table(status, features, correct).to_json(),
+            "columns": int(correct.size),
+            "error_rate": round(float(1 - correct.mean()), 5),
+        }
+
+    out.write_text(json.dumps({"sheets": len(sheets), "sections": tables}))
+    print(f"\nWrote {out}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    main(
+        Path(sys.argv[1]),
+        Path(sys.argv[2]) if len(sys.argv) > 2 else Config.CONFIDENCE_TABLE
+    )
@@ -1,19 +1,81 @@
-import shutil
+import json
+import time
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from processor import extract_test_data, wait_until_stable
+from config import Config
+from assets import review_image, section_readers
+from bucket_layout import FileMover, bucket_relative, check_same_filesystem, shard_path
+from ingest_queue import IngestQueue, Lane
+from overlay import OverlayWriter
+from pipeline import Pipeline
+from processor import (
+    load_readers,
+    load_sheet,
+    persist_sections,
+    read_sections,
+    render_review,
+    save_assets,
+    wait_until_stable
+)
 from db.persist_scan import update_scan_status
 
+PRIORITY = "priority"
+BULK = "bulk"
+
+# A reviewer is waiting on priority scans: poll the file size faster and
+# read the sections on threads
+PRIORITY_STABLE_INTERVAL = 0.1
+
+
 class PNGHandler(FileSystemEventHandler):
     def __init__(self, bucket_path: Path):
         self.bucket_path = bucket_path
+        self.priority_path = bucket_path / "priority"
         self.success_path = bucket_path / "success"
         self.error_path = bucket_path / "error"
 
+        self.priority_path.mkdir(exist_ok=True)
         self.success_path.mkdir(exist_ok=True)
         self.error_path.mkdir(exist_ok=True)
 
+        # Scans are renamed into success/ and error/, never copied
+        check_same_filesystem(
+            self.bucket_path,
+            self.priority_path,
+            self.success_path,
+            self.error_path,
+        )
+        self.mover = FileMover()
+
+        self.queue = IngestQueue([
+            Lane(PRIORITY, Config.PRIORITY_CONCURRENCY),
+            Lane(BULK, Config.BULK_CONCURRENCY),
+        ])
+
+        self.overlays = OverlayWriter(bucket_path / "debug")
+
+        self.pipeline = Pipeline(
+            self.queue,
+            decode=self.decode,
+            read=self.read,
+            persist=self.persist,
+            fail=self.move_to_error,
+            decode_threads=Config.DECODE_THREADS,
+            reserved_decode={PRIORITY: Config.PRIORITY_DECODE_THREADS},
+            read_threads=Config.READ_THREADS,
+            queue_size=Config.STAGE_QUEUE_SIZE,
+            max_decoded=Config.MAX_DECODED_IMAGES,
+            memory_budget=Config.MEMORY_BUDGET_MB * 2**20,
+        )
+
+    def lane_for(self, file_path: Path) -> str:
+        if file_path.parent == self.priority_path:
+            return PRIORITY
+        if file_path.name.startswith(Config.PRIORITY_PREFIX):
+            return PRIORITY
+        return BULK
+
     def on_created(self, event):
         if event.is_directory:
             return
@@ -23,55 +85,177 @@ class PNGHandler(FileSystemEventHandler):
         if file_path.suffix.lower() != ".png":
             return
 
-        print(f"[DETECTED] {file_path.name}")
+        lane = self.lane_for(file_path)
+        print(f"[DETECTED] {file_path.name} ({lane})")
 
-        try:
-            wait_until_stable(file_path)
+        self.queue.submit(file_path, lane)
 
-            scan_id = extract_test_data(file_path)
+    # -----------------
+    # PIPELINE STAGES
+    # -----------------
+
+    def decode(self, ticket):
+        if ticket.lane.name == PRIORITY:
+            wait_until_stable(ticket.path, interval=PRIORITY_STABLE_INTERVAL)
+        else:
+            wait_until_stable(ticket.path)
+
+        print(f"[PROCESSING] {ticket.path}")
+        return load_sheet(ticket.path)
+
+    def read(self, ticket, img):
+        priority = ticket.lane.name == PRIORITY
+        sections = read_sections(img, parallel=priority or Config.PARALLEL_SECTIONS)
+
+        # Encoded here while the decoded image is still alive; only the
+        # compressed bytes travel on to the persist stage
+        review, assets, review_crops = render_review(img, sections)
+
+        # Drawn on the overlay thread, on the review image (already
+        # encoded above, so it can be drawn on)
+        if self.overlays.wanted(ticket.path):
+            if review is None:
+                review = review_image(img)
+            self.overlays.submit(ticket.path, review, sections)
+
+        return {"sections": sections, "assets": assets, "review_crops": review_crops}
+
+    def persist(self, ticket, result) -> bool:
+        file_path = ticket.path
+        scan_id = None
+
+        try:
+            scan_id = persist_sections(file_path, result["sections"])
+            print(f"[SUCCESS] {file_path.name}")
 
-            target = self.success_path / file_path.name
-            shutil.move(str(file_path), target)
+            target = shard_path(self.success_path, file_path)
+            self.mover.move(file_path, target)
 
-            relative_path = f"bucket/success/{file_path.name}"
+            relative_path = bucket_relative(self.bucket_path, target)
             update_scan_status(
                 scan_id=scan_id,
                 new_file_path=Path(relative_path),
                 status="success",
             )
 
-            print(f"[MOVED] {file_path.name} → success/")
+            print(f"[MOVED] {file_path.name} → {target.parent.relative_to(self.bucket_path)}/")
+
+            save_assets(
+                scan_id,
+                target,
+                bucket_relative(self.bucket_path, target.parent),
+                result["assets"],
+                result["review_crops"],
+            )
+
+            return True
 
         except Exception as e:
-            print(f"[ERROR] {file_path.name}: {e}")
+            self.move_to_error(ticket, e, scan_id=scan_id)
+            return False
+
+    def move_to_error(self, ticket, error, scan_id=None):
+        from classifier import SheetRejected
+
+        file_path = ticket.path
+        rejected = isinstance(error, SheetRejected)
 
-            if file_path.exists():
-                target = self.error_path / file_path.name
-                shutil.move(str(file_path), target)
+        if rejected:
+            print(f"[REJECTED] {file_path.name}: {error.reason}")
+        else:
+            print(f"[ERROR] {file_path.name}: {error}")
 
-                if 'scan_id' in locals():
-                    relative_path = f"bucket/error/{file_path.name}"
-                    update_scan_status(
-                        scan_id=scan_id,
-                        new_file_path=Path(relative_path),
-                        status="error",
-                    )
+        if file_path.exists():
+            target = shard_path(self.error_path, file_path)
+            self.mover.move(file_path, target)
 
-                print(f"[MOVED] {file_path.name} → error/")
+            # Reason code next to the file, e.g.
+            # error/2026-10-19/3f/scan_01.png.reason.json
+            if rejected:
+                reason_path = target.parent / f"{file_path.name}.reason.json"
+                reason_path.write_text(json.dumps({
+                    "reason": error.reason,
+                    "details": error.details,
+                }))
+
+            if scan_id is not None:
+                relative_path = bucket_relative(self.bucket_path, target)
+                update_scan_status(
+                    scan_id=scan_id,
+                    new_file_path=Path(relative_path),
+                    status="error",
+                )
+
+            print(f"[MOVED] {file_path.name} → {target.parent.relative_to(self.bucket_path)}/")
 
 
 def start_watching(bucket_path: Path):
+    # Long-running process: pay the reader import before the first scan
+    load_readers()
+
     event_handler = PNGHandler(bucket_path)
+    event_handler.overlays.start()
+    event_handler.pipeline.start()
+
     observer = Observer()
     observer.schedule(event_handler, str(bucket_path), recursive=False)
+    observer.schedule(event_handler, str(event_handler.priority_path), recursive=False)
     observer.start()
 
     print(f"[WATCHING] {bucket_path}")
 
     try:
         while True:
-            pass
+            time.sleep(Config.METRICS_INTERVAL)
+            log_metrics(event_handler.pipeline, event_handler.overlays)
+            event_handler.mover.flush()
     except KeyboardInterrupt:
         observer.stop()
 
-    observer.join()
\ No newline at end of file
+    observer.join()
+    event_handler.pipeline.stop()
+    event_handler.overlays.stop()
+    event_handler.mover.flush()
+
+
+def log_metrics(pipeline: Pipeline, overlays: OverlayWriter):
+    metrics = pipeline.metrics()
+
+    for lane, m in metrics["lanes"].items():
+        print(
+            f"[METRICS] {lane}: depth={m['depth']} in_flight={m['in_flight']} "
+            f"done={m['processed']} failed={m['failed']} "
+            f"wait p50/p95={m['wait_p50_ms']}/{m['wait_p95_ms']}ms "
+            f"latency p50/p95={m['latency_p50_ms']}/{m['latency_p95_ms']}ms"
+        )
+
+    for stage, m in metrics["stages"].items():
+        print(
+            f"[METRICS] stage {stage}: threads={m['threads']} done={m['processed']} "
+            f"failed={m['failed']} busy={m['busy_pct']}% idle={m['idle_pct']}% "
+            f"blocked={m['blocked_pct']}%"
+        )
+
+    memory = metrics["memory"]
+    print(
+        f"[METRICS] queues read={metrics['queues']['read']} "
+        f"persist={metrics['queues']['persist']} | decoded "
+        f"{memory['decoded']}/{memory['max_decoded']} images, "
+        f"{memory['decoded_mb']}/{memory['budget_mb']} MB | "
+        f"bottleneck: {metrics['bottleneck'] or 'none'}"
+    )
+
+    overlays = overlays.metrics()
+    if overlays["written"] or overlays["dropped"]:
+        print(
+            f"[METRICS] overlays written={overlays['written']} "
+            f"dropped={overlays['dropped']} queued={overlays['queued']}"
+        )
+
+    for name, section in section_readers().items():
+        if section.calibration is not None:
+            thresholds = " ".join(
+                f"{group}={threshold}"
+                for group, threshold in section.calibration.metrics().items()
+            )
+            print(f"[METRICS] thresholds {name}: {thresholds}")
@@ -0,0 +1,31 @@
+"""
+Process pool whose workers pay the reader import cost once.
+
+Importing the readers (OpenCV, NumPy, compiled grids) costs far more
+than reading a sheet, so workers must not re-import per task. Where the
+platform supports it the pool uses the "forkserver" start method and
+preloads the reader modules into the fork server: every worker is then
+forked with them already imported. Elsewhere each worker imports them
+once in its initializer.
+"""
+import multiprocessing
+
+from processor import READER_MODULES, load_readers
+
+
+def _init_worker():
+    # No-op under forkserver (already imported); the one import otherwise
+    load_readers()
+
+
+def start_pool(workers: int):
+    """
+    Pool of preloaded worker processes, usable as a context manager.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(READER_MODULES)
+    else:
+        ctx = multiprocessing.get_context("spawn")
+
+    return ctx.Pool(processes=workers, initializer=_init_worker)